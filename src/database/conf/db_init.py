@@ -1,89 +1,24 @@
-import sqlite3
+import argparse
 import os
+import sys
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH = os.path.join(BASE_DIR, '..', '..', 'database', 'simulation_data.db')
 
-def initialize_database():
+# Das Schema ist in scripts/storage/schema.py definiert
+sys.path.insert(0, os.path.join(BASE_DIR, '..', '..'))
+from scripts.storage.schema import migrate
+
+def initialize_database(compact=False):
     """
     Initialize the simulation_data.db database.
-    Creates tables for the simulation data and the results.
+    Creates or migrates the tables for the simulation data and the results.
     """
-    # Verbindung zur Datenbank aufbauen (wird erstellt, falls noch nicht vorhanden)
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # Tabellen erstellen
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS gravity_data (
-        id INTEGER PRIMARY KEY,
-        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-        time REAL,
-        position_x REAL,
-        position_y REAL,
-        position_z REAL,
-        velocity_x REAL,
-        velocity_y REAL,
-        velocity_z REAL
-    );
-    """)
-
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS electromagnetic_data (
-        id INTEGER PRIMARY KEY,
-        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-        time REAL,
-        electric_field REAL,
-        magnetic_field REAL
-    );
-    """)
-
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS strong_force_data (
-        id INTEGER PRIMARY KEY,
-        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-        time REAL,
-        particle_id INTEGER,
-        position_x REAL,
-        position_y REAL,
-        position_z REAL,
-        force REAL
-    );
-    """)
-
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS weak_force_data (
-        id INTEGER PRIMARY KEY,
-        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-        time REAL,
-        particle_id INTEGER,
-        decay_rate REAL,
-        position_x REAL,
-        position_y REAL,
-        position_z REAL
-    );
-    """)
-
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS results (
-        id INTEGER PRIMARY KEY,
-        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-        calculated_force REAL,
-        unified_theory REAL
-    );
-    """)
-
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS simulation_state (
-        id INTEGER PRIMARY KEY,
-        last_time INTEGER NOT NULL
-    )
-    """)
-
-    # Änderungen speichern und Verbindung schließen
-    conn.commit()
-    conn.close()
-    print("Database initialized successfully!")
+    version = migrate(DB_PATH, compact)
+    print(f"Database initialized successfully! (Schema version {version})")
 
 if __name__ == "__main__":
-    initialize_database()
+    parser = argparse.ArgumentParser(description="Datenbank anlegen bzw. auf den aktuellen Schemastand bringen.")
+    parser.add_argument('--compact', action='store_true', help="Kompaktes Layout (STRICT, WITHOUT ROWID) für neue Tabellen")
+    args = parser.parse_args()
+    initialize_database(args.compact)
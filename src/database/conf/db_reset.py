@@ -1,95 +1,18 @@
-import sqlite3
+import argparse
 import os
+import sys
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH = os.path.join(BASE_DIR, '..', '..', 'database', 'simulation_data.db')
 
-def reset_database():
-    """
-    Setzt die gesamte Datenbank zurück, indem alle Tabellen gelöscht und neu erstellt werden.
-    """
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    # Lösche alle Tabellen, falls sie existieren
-    cursor.execute("DROP TABLE IF EXISTS gravity_data")
-    cursor.execute("DROP TABLE IF EXISTS electromagnetic_data")
-    cursor.execute("DROP TABLE IF EXISTS strong_force_data")
-    cursor.execute("DROP TABLE IF EXISTS weak_force_data")
-    cursor.execute("DROP TABLE IF EXISTS simulation_results")
-    cursor.execute("DROP TABLE IF EXISTS simulation_state")
-
-    # Erstelle die Tabellen erneut
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS gravity_data (
-        id INTEGER PRIMARY KEY,
-        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-        time REAL,
-        position_x REAL,
-        position_y REAL,
-        position_z REAL,
-        velocity_x REAL,
-        velocity_y REAL,
-        velocity_z REAL
-    );
-    """)
-
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS electromagnetic_data (
-        id INTEGER PRIMARY KEY,
-        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-        time REAL,
-        electric_field REAL,
-        magnetic_field REAL
-    );
-    """)
-
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS strong_force_data (
-        id INTEGER PRIMARY KEY,
-        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-        time REAL,
-        particle_id INTEGER,
-        position_x REAL,
-        position_y REAL,
-        position_z REAL,
-        force REAL
-    );
-    """)
-
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS weak_force_data (
-        id INTEGER PRIMARY KEY,
-        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-        time REAL,
-        particle_id INTEGER,
-        decay_rate REAL,
-        position_x REAL,
-        position_y REAL,
-        position_z REAL
-    );
-    """)
-
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS results (
-        id INTEGER PRIMARY KEY,
-        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-        calculated_force REAL,
-        unified_theory REAL
-    );
-    """)
-
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS simulation_state (
-        id INTEGER PRIMARY KEY,
-        last_time INTEGER NOT NULL
-    )
-    """)
-
-    conn.commit()
-    conn.close()
-
-    print("Database reset complete.")
+# Das Schema ist in scripts/storage/schema.py definiert
+sys.path.insert(0, os.path.join(BASE_DIR, '..', '..'))
+from scripts.storage.schema import reset_database
 
 if __name__ == "__main__":
-    reset_database()
+    parser = argparse.ArgumentParser(description="Läufe aus der Datenbank löschen.")
+    parser.add_argument('--run', type=int, nargs='+', dest='run_ids', help="Nur diese Läufe löschen")
+    parser.add_argument('--rebuild', action='store_true', help="Alle Tabellen löschen und neu erstellen")
+    args = parser.parse_args()
+    reset_database(DB_PATH, args.run_ids, args.rebuild)
+    print("Database reset complete.")
@@ -3,38 +3,178 @@
 ###########
 # IMPORTS #
 ###########
+import os
+import time
 from multiprocessing import Process
-from scripts.simulations.electromagnetic_simulation import run_elec_simulation
-from scripts.simulations.gravity_simulation import init_simulation_state, run_grav_simulation
-from scripts.simulations.strong_force_simulation import run_strong_force_simulation
-from scripts.funcs.timestamp_dec import *
+from scripts.orchestration.aggregation import aggregate
+from scripts.orchestration.orchestrator import SIMULATIONS
+from scripts.storage.storage_process import StorageProcess, format_report, run_with_storage
+from scripts.storage.schema import DB_PATH, migrate
+from scripts.storage.shards import create_shard
+from scripts.funcs.metrics import (MetricsCollector, configure_metrics, export_metrics, format_metrics, process_report,
+                                   run_with_metrics, timer)
+from scripts.funcs.sim_logging import configure_logging, run_with_logging
+
+#################
+# CONFIGURATION #
+#################
+# Taktsteuerung je Simulation: 'fast' (so schnell wie möglich), 'realtime' (ratio simulierte Sekunden
+# pro Sekunde) oder 'rate' (steps_per_second Schritte pro Sekunde), siehe scripts.funcs.pacing.
+# Gestartet werden die hier aufgeführten Simulationen (Namen aus scripts.orchestration.orchestrator.SIMULATIONS).
+PACING = {
+    'electromagnetic': {'mode': 'rate', 'steps_per_second': 10.0},
+    'gravity': {'mode': 'rate', 'steps_per_second': 10.0},
+    'strong_force': {'mode': 'rate', 'steps_per_second': 10.0},
+    'weak_force': {'mode': 'rate', 'steps_per_second': 10.0},
+}
+
+# Log-Level je Simulation ('DEBUG', 'INFO', 'WARNING', ...) und Sampling der Meldungen aus der Rechenschleife:
+# bei 'DEBUG' wird nur jeder N-te Schritt protokolliert, siehe scripts.funcs.sim_logging
+LOG_LEVELS = {
+    'electromagnetic': 'INFO',
+    'gravity': 'INFO',
+    'strong_force': 'INFO',
+    'weak_force': 'INFO',
+}
+LOG_SAMPLE_EVERY = {
+    'electromagnetic': 100,
+    'gravity': 100,
+    'strong_force': 100,
+    'weak_force': 100,
+}
+
+# Speicherung: 'single' schreibt alle Simulationen über den Speicherprozess in simulation_data.db,
+# 'shards' lässt jede Simulation direkt in eine eigene Datei unter database/shards schreiben
+# (Abfrage über scripts.storage.shards.open_unified, Zusammenführen mit merge_shards).
+# Mit SHARD_PER_RUN erhält jeder Start eigene Shards; ein Fortsetzen über Checkpoints ist dann nicht möglich.
+STORAGE_MODE = 'single'
+SHARD_PER_RUN = False
+
+# Speicher-Backend der Datenzeilen je Simulation: 'sqlite' (Datentabellen) oder 'columnar' (Spaltendateien neben
+# der Datenbank, z. B. {'backend': 'columnar', 'compression': 'zlib'}), siehe scripts.storage.backends.
+# Läufe, Checkpoints und Auswertung (scripts.storage.reader) bleiben in beiden Fällen über die Datenbank erreichbar.
+STORAGE = {
+    'electromagnetic': 'sqlite',
+    'gravity': 'sqlite',
+    'strong_force': 'sqlite',
+    'weak_force': 'sqlite',
+}
+
+# Ausgaberichtlinie je Simulation: 'all' (jeden Zeitpunkt speichern), {'mode': 'every', 'k': 10} (jeden k-ten)
+# oder {'mode': 'changes', 'atol': ..., 'rtol': ...} (nur Änderungen; beim Lesen aufgefüllt), siehe
+# scripts.storage.output_policy. Die Zerfallsereignisse der schwachen Wechselwirkung werden immer vollständig gespeichert.
+OUTPUT = {
+    'electromagnetic': 'all',
+    'gravity': 'all',
+    'strong_force': 'all',
+}
+
+# Rechenkerne je Simulation: 'auto' (mit numba kompilierte Kerne, falls numba installiert ist, sonst NumPy),
+# 'numpy' oder 'numba', siehe scripts.simulations.kernel_backends. Die Kompilate werden auf der Festplatte zwischengespeichert.
+KERNEL_BACKEND = {
+    'gravity': 'auto',
+    'strong_force': 'auto',
+}
+
+# Nach dem Ende der Simulationen die neu hinzugekommenen Zeilen je Lauf und Zeitschritt in results zusammenfassen
+# (siehe scripts.orchestration.aggregation); bereits zusammengefasste Zeilen werden dabei nicht erneut gelesen.
+AGGREGATE = True
+
+# Messwerte der Rechenschleifen (Dauer je Phase mit Quantilen, Schritte/s, Zeilen/s, Commit-Latenzen) aller Prozesse
+# erfassen, am Ende ausgeben und nach METRICS_PATH schreiben (.json oder .csv), siehe scripts.funcs.metrics.
+# Ausgeschaltet kostet die Erfassung je Messpunkt weniger als eine Mikrosekunde.
+METRICS = False
+METRICS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs', 'metrics.json')
+
+# Profiler je Simulation (nur mit METRICS): 'cprofile' oder 'sampling'; die Profile landen unter logs/profiles
+PROFILE = {}
 
 #############
 # FUNCTIONS #
 #############
-def run_gravity_simulation():
-    init_simulation_state()
-    run_grav_simulation()
+def simulation_kwargs(name):
+    """
+    Konfiguration einer Simulation als Schlüsselwortargumente ihres Prozesses (die Logging-Konfiguration
+    wird von run_with_logging im Kindprozess angewendet).
+    """
+    kwargs = {'pacing': PACING[name], 'storage': STORAGE[name], 'log_levels': LOG_LEVELS, 'log_sample_every': LOG_SAMPLE_EVERY}
+    if name in OUTPUT:
+        kwargs['output'] = OUTPUT[name]
+    if name in KERNEL_BACKEND:
+        kwargs['kernel_backend'] = KERNEL_BACKEND[name]
+    return kwargs
+
+def process_target(name, target, args, metrics_queue=None):
+    """
+    Ziel und Argumente des Prozesses der Simulation name: target wird über run_with_logging und mit metrics_queue
+    zusätzlich über run_with_metrics (mit dem Profiler aus PROFILE) gestartet.
+    """
+    if metrics_queue is None:
+        return run_with_logging, (target, *args)
+    return run_with_metrics, (metrics_queue, name, PROFILE.get(name), run_with_logging, target, *args)
 
 #################
 # MAIN FUNCTION #
 #################
-@timestamp_dec
 def main():
-    # Prozesse erstellen
-    process1 = Process(target=run_elec_simulation)
-    process2 = Process(target=run_gravity_simulation)
-    process3 = Process(target=run_strong_force_simulation)
-
-    # Prozesse starten
-    process1.start()
-    process2.start()
-    process3.start()
-
-    # Warten, bis beide Prozesse fertig sind
-    process1.join()
-    process2.join()
-    process3.join()
+    # Logging des Hauptprozesses; die Simulationsprozesse wenden LOG_LEVELS und LOG_SAMPLE_EVERY selbst an
+    configure_logging(LOG_LEVELS, LOG_SAMPLE_EVERY)
+    configure_metrics(METRICS)
+    collector = MetricsCollector() if METRICS else None
+    metrics_queue = collector.queue if collector is not None else None
+
+    storage_process = None
+    if STORAGE_MODE == 'shards':
+        # Jede Simulation schreibt selbst in ihren eigenen Shard
+        run = time.strftime('%Y%m%d-%H%M%S') if SHARD_PER_RUN else None
+        databases = [create_shard(name, run) for name in PACING]
+        processes = []
+        for name, db_path in zip(PACING, databases):
+            target, args = process_target(name, SIMULATIONS[name], (), metrics_queue)
+            processes.append(Process(target=target, args=args, kwargs={**simulation_kwargs(name), 'db_path': db_path}))
+    elif STORAGE_MODE == 'single':
+        # Schema einmal vor dem Start der Prozesse aktualisieren, statt es jeder Simulation beim Start zu überlassen
+        migrate(DB_PATH)
+        # Einziger schreibender Prozess, der die Daten aller Simulationen über eine Warteschlange erhält
+        storage_process = StorageProcess(metrics=METRICS).start()
+        databases = [DB_PATH]
+        processes = []
+        for name in PACING:
+            target, args = process_target(name, run_with_storage, (storage_process.queue, SIMULATIONS[name]), metrics_queue)
+            processes.append(Process(target=target, args=args, kwargs=simulation_kwargs(name)))
+    else:
+        raise ValueError(f"Unbekannter Speichermodus: {STORAGE_MODE}")
+
+    started = time.perf_counter()
+    try:
+        # Gesamtlaufzeit der Simulationen als Timer 'main' des Hauptprozesses
+        with timer('main'):
+            # Prozesse starten
+            for process in processes:
+                process.start()
+            if collector is not None:
+                collector.start()
+
+            # Warten, bis alle Prozesse fertig sind
+            for process in processes:
+                process.join()
+    finally:
+        if storage_process is not None:
+            # Restliche Daten schreiben und Statistik ausgeben
+            report = storage_process.stop()
+            print(format_report(report))
+            if collector is not None:
+                collector.add(report['metrics'])
+        if collector is not None:
+            # Messwerte aller Prozesse einschließlich des Hauptprozesses zusammenführen, ausgeben und speichern
+            collector.add(process_report('main', time.perf_counter() - started))
+            metrics = collector.stop()
+            print(format_metrics(metrics))
+            print(f"Messwerte gespeichert: {export_metrics(metrics, METRICS_PATH)}")
+
+    if AGGREGATE:
+        for db_path in databases:
+            aggregate(db_path)
 
     print("Simulationen sind abgeschlossen!")
 
@@ -0,0 +1,60 @@
+import argparse
+import time
+import numpy as np
+from scripts.simulations.particle_system import pairwise_forces, relative_force_error
+from scripts.simulations.cell_list import NeighborList, cutoff_forces
+from scripts.simulations.strong_force_simulation import CUTOFF_RADIUS, STRONG_FORCE_CONSTANT
+
+def _timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def run_benchmark(particle_counts, density, cutoff, periodic, seed=0):
+    """
+    Vergleicht den Cutoff-Modus (Zellgitter und Verlet-Liste) mit der exakten Paarsumme.
+    Die Dichte bleibt konstant, der Würfel wächst mit der Teilchenzahl.
+    """
+    rng = np.random.default_rng(seed)
+    results = []
+    for count in particle_counts:
+        box_size = (count / density) ** (1 / 3)
+        positions = rng.uniform(0.0, box_size, size=(count, 3))
+        masses = rng.uniform(1.0, 10.0, size=count)
+        box = box_size if periodic else None
+
+        reference, t_direct = _timed(pairwise_forces, positions, masses, STRONG_FORCE_CONSTANT, cutoff=cutoff, box_size=box)
+        full, _ = _timed(pairwise_forces, positions, masses, STRONG_FORCE_CONSTANT, box_size=box)
+        cells, t_cells = _timed(cutoff_forces, positions, masses, STRONG_FORCE_CONSTANT, cutoff, box_size, periodic)
+
+        neighbor_list = NeighborList(cutoff, box_size, periodic=periodic)
+        _, t_build = _timed(neighbor_list.forces, positions, masses, STRONG_FORCE_CONSTANT)
+        verlet, t_reuse = _timed(neighbor_list.forces, positions, masses, STRONG_FORCE_CONSTANT)
+
+        results.append({
+            'particles': count,
+            'direct_s': t_direct,
+            'cell_list_s': t_cells,
+            'verlet_build_s': t_build,
+            'verlet_reuse_s': t_reuse,
+            'cell_list_error': relative_force_error(cells, reference)[1],
+            'verlet_error': relative_force_error(verlet, reference)[1],
+            'truncation_error': relative_force_error(cells, full)[0],
+        })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark: Cutoff-Modus gegen exakte Paarsumme")
+    parser.add_argument('--particles', type=int, nargs='+', default=[1000, 2000, 4000, 8000])
+    parser.add_argument('--density', type=float, default=1.0)
+    parser.add_argument('--cutoff', type=float, default=CUTOFF_RADIUS)
+    parser.add_argument('--periodic', action='store_true')
+    args = parser.parse_args()
+
+    print(f"{'N':>8} {'direkt [s]':>11} {'Zellen [s]':>11} {'Verlet [s]':>11} {'Reuse [s]':>10} {'Fehler Zellen':>14} {'Fehler Verlet':>14} {'Abschneidefehler':>17}")
+    for row in run_benchmark(args.particles, args.density, args.cutoff, args.periodic):
+        print(f"{row['particles']:>8} {row['direct_s']:>11.4f} {row['cell_list_s']:>11.4f} {row['verlet_build_s']:>11.4f} "
+              f"{row['verlet_reuse_s']:>10.4f} {row['cell_list_error']:>14.2e} {row['verlet_error']:>14.2e} {row['truncation_error']:>17.2e}")
+
+if __name__ == "__main__":
+    main()
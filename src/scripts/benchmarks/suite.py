@@ -0,0 +1,431 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import numpy as np
+from scripts.funcs.sim_logging import configure_logging
+from scripts.simulations.cell_list import cutoff_forces
+from scripts.simulations.coupled_simulation import CHARGE_RANGE, insert_coupled_data
+from scripts.simulations.electromagnetic_simulation import (charge_q, compute_electric_field, compute_magnetic_field, distance,
+                                                            example_sources, insert_electromagnetic_data)
+from scripts.simulations.ensemble import BatchedGravityEngine, initialize_ensemble, insert_ensemble_data
+from scripts.simulations.field_map import COULOMB_CONSTANT, electric_field, magnetic_field
+from scripts.simulations.force_kernels import DEFAULT_KERNELS, ForceModel
+from scripts.simulations.kernel_backends import available_kernel_backends, get_kernels
+from scripts.simulations.gravity_simulation import (M1, M2, compute_gravitational_force, init_simulation_state, initialize_bodies,
+                                                    insert_gravity_data, position_earth, position_moon, run_grav_simulation,
+                                                    update_positions_and_velocities, velocity_earth, velocity_moon)
+from scripts.funcs.cores import available_cores
+from scripts.simulations.nbody import G, GravityEngine
+from scripts.simulations.particle_system import ParticleSystem, pairwise_forces
+from scripts.simulations.shared_forces import SharedForcePool
+from scripts.simulations.strong_force_simulation import (CUTOFF_RADIUS, STRONG_FORCE_CONSTANT, compute_strong_force,
+                                                         insert_strong_force_data, run_strong_force_simulation,
+                                                         update_particle_positions)
+from scripts.simulations.weak_force_simulation import insert_weak_force_data
+from scripts.storage.backends import open_storage
+from scripts.storage.db_writer import close_writers
+from scripts.storage.schema import create_run
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BASE_DIR, '..', '..', 'database', 'benchmarks')
+
+GROUPS = ('micro', 'scaling', 'storage')
+REPEATS = 5  # Messungen je Benchmark; verglichen wird standardmäßig das Minimum (am wenigsten von Störungen betroffen)
+MIN_SECONDS = 0.05  # Mindestdauer einer Messung; kurze Funktionen werden dafür mehrfach aufgerufen
+THRESHOLD = 0.25  # Relative Verlangsamung gegenüber der Basislinie, ab der compare eine Regression meldet
+STORAGE_BACKENDS = ('sqlite', 'columnar')
+DENSITY = 1.0  # Teilchen je Volumeneinheit; der Würfel wächst mit der Teilchenzahl
+
+def measure(func, repeats=REPEATS, min_seconds=MIN_SECONDS):
+    """
+    Misst die Laufzeit eines Aufrufs von func wie timeit: die Anzahl der Aufrufe je Messung (loops) wird verdoppelt,
+    bis eine Messung mindestens min_seconds dauert; danach folgen repeats Messungen.
+    Gibt Minimum, Median, Mittelwert und Standardabweichung je Aufruf in Sekunden zurück.
+    """
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            break
+        loops *= 2
+
+    samples = [elapsed / loops]
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        samples.append((time.perf_counter() - start) / loops)
+    return {'loops': loops, 'repeats': repeats, 'min_s': min(samples), 'median_s': statistics.median(samples),
+            'mean_s': statistics.fmean(samples), 'std_s': statistics.stdev(samples) if len(samples) > 1 else 0.0}
+
+def _particles(count, seed=0):
+    return ParticleSystem.random(count, (count / DENSITY) ** (1 / 3), rng=np.random.default_rng(seed))
+
+# Mikro-Benchmarks: einzelne Aufrufe der Rechenkerne
+
+def strong_force_setup(solver):
+    def setup(count):
+        particles = _particles(count)
+        box_size = (count / DENSITY) ** (1 / 3)
+        return lambda: compute_strong_force(particles, solver=solver, box_size=box_size)
+    return setup
+
+def pair_loop_setup(count):
+    particles = _particles(count)
+    return lambda: pairwise_forces(particles.positions, particles.masses, STRONG_FORCE_CONSTANT)
+
+def cutoff_pair_loop_setup(count):
+    particles = _particles(count)
+    box_size = (count / DENSITY) ** (1 / 3)
+    return lambda: cutoff_forces(particles.positions, particles.masses, STRONG_FORCE_CONSTANT, CUTOFF_RADIUS, box_size)
+
+def shared_pool_setup(count):
+    # Mindestens zwei Prozesse, damit auch auf einem Kern der Weg über den gemeinsamen Speicher gemessen wird
+    pool = SharedForcePool(_particles(count), max(2, available_cores()), constant=STRONG_FORCE_CONSTANT)
+    def run():
+        return pool.forces()
+    run.cleanup = pool.close
+    return run
+
+def force_model_setup(count):
+    particles = _particles(count)
+    particles.charges = np.random.default_rng(1).uniform(*CHARGE_RANGE, count)
+    model = ForceModel(DEFAULT_KERNELS)
+    return lambda: model.forces(particles)
+
+def separate_kernels_setup(count):
+    particles = _particles(count)
+    particles.charges = np.random.default_rng(1).uniform(*CHARGE_RANGE, count)
+    def run():
+        # Gravitation, Coulombkraft und starke Wechselwirkung in je einem eigenen Durchlauf
+        pairwise_forces(particles.positions, particles.masses, G)
+        pairwise_forces(particles.positions, particles.charges, -COULOMB_CONSTANT)
+        pairwise_forces(particles.positions, particles.masses, STRONG_FORCE_CONSTANT)
+    return run
+
+def particle_update_setup(count):
+    particles = _particles(count)
+    forces = np.zeros((count, 3))
+    return lambda: update_particle_positions(particles, forces, 0.0)
+
+def two_body_update_setup(backend=None):
+    def setup(steps):
+        def run():
+            # Bisheriger skalarer Zweikörperschritt, steps-mal hintereinander
+            p1, v1, p2, v2 = position_earth, velocity_earth, position_moon, velocity_moon
+            for _ in range(steps):
+                gap = sum((b - a) ** 2 for a, b in zip(p1, p2)) ** 0.5
+                force = compute_gravitational_force(M1, M2, gap)
+                p1, v1, p2, v2 = update_positions_and_velocities(p1, v1, p2, v2, force, M1, M2, 60, backend)
+        update_positions_and_velocities(position_earth, velocity_earth, position_moon, velocity_moon, 1.0, M1, M2, 60,
+                                        backend)  # Kompilieren bzw. aus dem Cache laden, bevor gemessen wird
+        return run
+    return setup
+
+def gravity_engine_setup(integrator):
+    def setup(steps):
+        def run():
+            # Jeder Aufruf beginnt beim Anfangszustand, damit rk45 jedes Mal dieselben Schrittweiten wählt
+            engine = GravityEngine(initialize_bodies(), integrator)
+            for _ in range(steps):
+                engine.advance(60)
+        return run
+    return setup
+
+def kernel_pair_forces_setup(backend):
+    def setup(count):
+        particles = _particles(count)
+        pair_forces = get_kernels(backend)['pair_forces']
+        run = lambda: pair_forces(particles.positions, particles.masses, STRONG_FORCE_CONSTANT)
+        run()  # Kompilieren bzw. aus dem Cache laden, bevor gemessen wird
+        return run
+    return setup
+
+def kernel_update_setup(backend):
+    def setup(count):
+        particles = _particles(count)
+        forces = np.zeros((count, 3))
+        update = get_kernels(backend)['update_particles']
+        run = lambda: update(particles.positions, particles.velocities, forces, particles.masses, 0.0)
+        run()
+        return run
+    return setup
+
+def kernel_gravity_setup(backend):
+    def setup(steps):
+        GravityEngine(initialize_bodies(), 'leapfrog', kernel_backend=backend).advance(60)
+        def run():
+            engine = GravityEngine(initialize_bodies(), 'leapfrog', kernel_backend=backend)
+            for _ in range(steps):
+                engine.advance(60)
+        return run
+    return setup
+
+def ensemble_step_setup(systems):
+    engine = BatchedGravityEngine(*initialize_ensemble(systems, np.random.default_rng(0)))
+    return lambda: engine.advance(60)
+
+def em_scalar_setup(calls):
+    def run():
+        for _ in range(calls):
+            compute_electric_field(charge_q, distance)
+            compute_magnetic_field(1.0, distance)
+    return run
+
+def em_grid_setup(points):
+    charges, segments = example_sources()
+    grid = np.random.default_rng(0).uniform(-0.1, 0.1, size=(points, 3))
+    def run():
+        electric_field(grid, charges[0], charges[1])
+        magnetic_field(grid, *segments)
+    return run
+
+# Skalierung über die Zahl der Zeitschritte: ganze Läufe in eine temporäre Datenbank
+
+def simulation_steps_setup(simulation):
+    def setup(steps):
+        directory = tempfile.mkdtemp(prefix='bench-')
+        db_path = os.path.join(directory, 'bench.db')
+        dt = 60
+        if simulation == 'gravity':
+            init_simulation_state(db_path)
+        def run():
+            if simulation == 'gravity':
+                run_grav_simulation({'mode': 'fast'}, total_time=(steps - 1) * dt, dt=dt, resume=False,
+                                    checkpoint_interval=0, db_path=db_path)
+            else:
+                run_strong_force_simulation(pacing={'mode': 'fast'}, total_time=(steps - 1) * dt, dt=dt, resume=False,
+                                            checkpoint_interval=0, db_path=db_path, seed=0)
+        run.cleanup = lambda: shutil.rmtree(directory, ignore_errors=True)
+        return run
+    return setup
+
+# Speicher-Benchmarks: jeder insert_*-Pfad je Backend; gemessen bis die Zeilen geschrieben sind
+
+def _storage_run(table, backend, write):
+    def setup(rows):
+        directory = tempfile.mkdtemp(prefix='bench-')
+        db_path = os.path.join(directory, 'bench.db')
+        def run():
+            storage = open_storage(db_path, create_run(db_path, 'benchmark', {'table': table}, backend), backend)
+            write(storage, rows)
+            storage.close()
+            close_writers()
+        run.cleanup = lambda: shutil.rmtree(directory, ignore_errors=True)
+        return run
+    return setup
+
+def _write_gravity(storage, rows):
+    bodies = initialize_bodies()
+    for step in range(rows // len(bodies)):
+        insert_gravity_data(step * 60.0, bodies, storage)
+
+def _write_electromagnetic(storage, rows):
+    for step in range(rows):
+        insert_electromagnetic_data(step * 60.0, 1.0, 2.0, storage)
+
+def _write_strong_force(storage, rows, particles_per_step=1000):
+    particles = _particles(particles_per_step)
+    forces = np.ones((particles_per_step, 3))
+    for step in range(max(1, rows // particles_per_step)):
+        insert_strong_force_data(step * 60.0, particles, forces, storage)
+
+def _write_weak_force(storage, rows, block=10000):
+    rng = np.random.default_rng(0)
+    for lo in range(0, rows, block):
+        n = min(block, rows - lo)
+        insert_weak_force_data(np.sort(rng.uniform(lo, lo + 1, n)), np.arange(lo, lo + n), np.full(n, 1e-5),
+                               rng.uniform(0, 10, (n, 3)), storage)
+
+def _write_ensemble(storage, rows, systems=100):
+    engine = BatchedGravityEngine(*initialize_ensemble(systems, np.random.default_rng(0)))
+    index = np.arange(systems)
+    for step in range(max(1, rows // (2 * systems))):
+        insert_ensemble_data(step * 60.0, engine, index, storage)
+
+def _write_coupled(storage, rows, particles_per_step=1000):
+    particles = _particles(particles_per_step)
+    forces = np.ones((particles_per_step, 3))
+    for step in range(max(1, rows // particles_per_step)):
+        insert_coupled_data(step * 60.0, particles, forces, storage)
+
+STORAGE_WRITERS = {
+    'gravity_data': _write_gravity,
+    'electromagnetic_data': _write_electromagnetic,
+    'strong_force_data': _write_strong_force,
+    'weak_force_data': _write_weak_force,
+    'ensemble_data': _write_ensemble,
+    'coupled_data': _write_coupled,
+}
+
+# Alle Benchmarks: Name -> (Gruppe, setup(Größe) -> Funktion ohne Argumente, Größen, Einheit der Größe)
+BENCHMARKS = {
+    'strong_force.direct': ('micro', strong_force_setup('direct'), (1000,), 'particles'),
+    'strong_force.barnes_hut': ('micro', strong_force_setup('barnes_hut'), (1000,), 'particles'),
+    'strong_force.cutoff': ('micro', strong_force_setup('cutoff'), (1000,), 'particles'),
+    'strong_force.pair_loop': ('micro', pair_loop_setup, (1000,), 'particles'),
+    'strong_force.direct_shared': ('micro', shared_pool_setup, (1000,), 'particles'),
+    'strong_force.cutoff_pair_loop': ('micro', cutoff_pair_loop_setup, (1000,), 'particles'),
+    'strong_force.update_positions': ('micro', particle_update_setup, (1000,), 'particles'),
+    'coupled.force_model': ('micro', force_model_setup, (1000,), 'particles'),
+    'coupled.separate_kernels': ('micro', separate_kernels_setup, (1000,), 'particles'),
+    'gravity.update_positions_and_velocities': ('micro', two_body_update_setup(), (1000,), 'steps'),
+    'gravity.leapfrog': ('micro', gravity_engine_setup('leapfrog'), (1000,), 'steps'),
+    'gravity.yoshida4': ('micro', gravity_engine_setup('yoshida4'), (1000,), 'steps'),
+    'gravity.rk45': ('micro', gravity_engine_setup('rk45'), (1000,), 'steps'),
+    'electromagnetic.scalar_fields': ('micro', em_scalar_setup, (1000,), 'calls'),
+    'electromagnetic.field_map_block': ('micro', em_grid_setup, (4096,), 'points'),
+    'scaling.strong_force.direct': ('scaling', strong_force_setup('direct'), (250, 500, 1000, 2000), 'particles'),
+    'scaling.strong_force.barnes_hut': ('scaling', strong_force_setup('barnes_hut'), (250, 500, 1000, 2000), 'particles'),
+    'scaling.strong_force.cutoff': ('scaling', strong_force_setup('cutoff'), (250, 500, 1000, 2000), 'particles'),
+    'scaling.gravity_ensemble.step': ('scaling', ensemble_step_setup, (10, 100, 1000), 'systems'),
+    'scaling.gravity.steps': ('scaling', simulation_steps_setup('gravity'), (10, 100, 1000), 'steps'),
+    'scaling.strong_force.steps': ('scaling', simulation_steps_setup('strong_force'), (10, 100, 1000), 'steps'),
+}
+for _backend in available_kernel_backends():
+    # Rechenkerne je Kernel-Backend (numba nur, wenn installiert)
+    BENCHMARKS[f'kernels.{_backend}.pair_forces'] = ('micro', kernel_pair_forces_setup(_backend), (1000,), 'particles')
+    BENCHMARKS[f'kernels.{_backend}.update_particles'] = ('micro', kernel_update_setup(_backend), (1000,), 'particles')
+    BENCHMARKS[f'kernels.{_backend}.gravity_leapfrog'] = ('micro', kernel_gravity_setup(_backend), (1000,), 'steps')
+    BENCHMARKS[f'kernels.{_backend}.two_body_update'] = ('micro', two_body_update_setup(_backend), (1000,), 'steps')
+for _table, _write in STORAGE_WRITERS.items():
+    for _backend in STORAGE_BACKENDS:
+        BENCHMARKS[f'storage.{_table}.{_backend}'] = ('storage', _storage_run(_table, _backend, _write), (20000,), 'rows')
+
+def benchmark_key(name, size):
+    return f'{name}[{size}]'
+
+def environment():
+    """
+    Angaben zur Messumgebung, die mit den Ergebnissen gespeichert werden.
+    """
+    return {
+        'created_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'kernel_backends': available_kernel_backends(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cores': os.cpu_count(),
+    }
+
+def run_benchmarks(groups=GROUPS, pattern=None, repeats=REPEATS, min_seconds=MIN_SECONDS, progress=None):
+    """
+    Führt die Benchmarks der Gruppen groups aus (optional nur Namen, die pattern enthalten) und gibt
+    {'environment': ..., 'results': {'name[Größe]': {group, name, size, unit, loops, repeats, min_s, median_s, ...}}} zurück.
+    Bei Speicher-Benchmarks kommt der Durchsatz rows_per_s hinzu.
+    """
+    # Simulationsmeldungen würden die Messung verfälschen und die Ausgabe überfluten
+    configure_logging({'*': 'WARNING'})
+    results = {}
+    for name, (group, setup, sizes, unit) in BENCHMARKS.items():
+        if group not in groups or (pattern is not None and pattern not in name):
+            continue
+        for size in sizes:
+            func = setup(size)
+            try:
+                timing = measure(func, repeats, min_seconds)
+            finally:
+                getattr(func, 'cleanup', lambda: None)()
+            result = {'group': group, 'name': name, 'size': size, 'unit': unit, **timing}
+            if unit == 'rows':
+                result['rows_per_s'] = size / timing['median_s']
+            results[benchmark_key(name, size)] = result
+            if progress is not None:
+                progress(result)
+    return {'environment': environment(), 'results': results}
+
+def compare_results(baseline, current, threshold=THRESHOLD, metric='min_s'):
+    """
+    Vergleicht zwei Ergebnisdateien (als dict) je Benchmark über metric. Gibt eine Liste von
+    (Schlüssel, Basislinie, aktuell, Verhältnis, Bewertung) zurück; Bewertung ist 'regression', wenn die aktuelle
+    Laufzeit um mehr als threshold langsamer ist, 'improved' bei entsprechend schnellerer Laufzeit, sonst 'ok'.
+    Benchmarks, die nur in einer der beiden Dateien vorkommen, erhalten 'missing' bzw. 'new'.
+    """
+    rows = []
+    for key in sorted(set(baseline['results']) | set(current['results'])):
+        before, after = baseline['results'].get(key), current['results'].get(key)
+        if before is None or after is None:
+            rows.append((key, before and before[metric], after and after[metric], None, 'new' if before is None else 'missing'))
+            continue
+        ratio = after[metric] / before[metric] if before[metric] > 0 else float('inf')
+        verdict = 'regression' if ratio > 1 + threshold else 'improved' if ratio < 1 / (1 + threshold) else 'ok'
+        rows.append((key, before[metric], after[metric], ratio, verdict))
+    return rows
+
+def format_result(result):
+    line = f"{benchmark_key(result['name'], result['size']):<48} {result['median_s'] * 1e3:>11.3f} ms  ±{result['std_s'] * 1e3:>9.3f} ms"
+    if 'rows_per_s' in result:
+        line += f"  {result['rows_per_s']:>12,.0f} Zeilen/s"
+    return line
+
+def format_comparison(rows, threshold=THRESHOLD):
+    lines = [f"{'Benchmark':<48} {'Basis [ms]':>11} {'Aktuell [ms]':>13} {'Faktor':>7}  Bewertung"]
+    for key, before, after, ratio, verdict in rows:
+        before_text = f'{before * 1e3:>11.3f}' if before is not None else f"{'-':>11}"
+        after_text = f'{after * 1e3:>13.3f}' if after is not None else f"{'-':>13}"
+        ratio_text = f'{ratio:>7.2f}' if ratio is not None else f"{'-':>7}"
+        lines.append(f"{key:<48} {before_text} {after_text} {ratio_text}  {verdict}")
+    regressions = sum(row[4] == 'regression' for row in rows)
+    lines.append(f"{regressions} Regressionen (Schwelle {threshold:.0%}).")
+    return "\n".join(lines)
+
+def load_results(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def save_results(results, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark-Suite der Simulations- und Speicherpfade")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="Benchmarks ausführen und als JSON speichern")
+    run.add_argument('--group', nargs='+', choices=GROUPS, default=list(GROUPS))
+    run.add_argument('--filter', help="Nur Benchmarks, deren Name diese Zeichenkette enthält")
+    run.add_argument('--repeat', type=int, default=REPEATS)
+    run.add_argument('--min-time', type=float, default=MIN_SECONDS, help="Mindestdauer einer Messung in Sekunden")
+    run.add_argument('--output', help=f"Ergebnisdatei (Standard: {RESULTS_DIR}/benchmark-<Zeitstempel>.json)")
+    run.add_argument('--baseline', help="Ergebnisse anschließend mit dieser Basislinie vergleichen")
+    run.add_argument('--threshold', type=float, default=THRESHOLD)
+
+    compare = commands.add_parser('compare', help="Ergebnisdatei mit einer Basislinie vergleichen")
+    compare.add_argument('baseline')
+    compare.add_argument('current')
+    compare.add_argument('--threshold', type=float, default=THRESHOLD, help="Relative Verlangsamung, ab der eine Regression gemeldet wird")
+    compare.add_argument('--metric', choices=('min_s', 'median_s', 'mean_s'), default='min_s')
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        results = run_benchmarks(args.group, args.filter, args.repeat, args.min_time, lambda result: print(format_result(result)))
+        output = args.output or os.path.join(RESULTS_DIR, f"benchmark-{datetime.datetime.now():%Y%m%d-%H%M%S}.json")
+        save_results(results, output)
+        print(f"Ergebnisse gespeichert: {output}")
+        if args.baseline is None:
+            return 0
+        # Nur die ausgeführten Benchmarks vergleichen (z. B. bei --group oder --filter)
+        baseline = load_results(args.baseline)
+        baseline['results'] = {key: value for key, value in baseline['results'].items() if key in results['results']}
+        current, metric = results, 'min_s'
+    else:
+        baseline, current, metric = load_results(args.baseline), load_results(args.current), args.metric
+
+    rows = compare_results(baseline, current, args.threshold, metric)
+    print(format_comparison(rows, args.threshold))
+    return 1 if any(row[4] == 'regression' for row in rows) else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,9 @@
+import os
+
+def available_cores():
+    """
+    Anzahl der Kerne, auf denen dieser Prozess laufen darf (berücksichtigt CPU-Affinität, z. B. in Containern).
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
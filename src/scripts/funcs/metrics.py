@@ -0,0 +1,363 @@
+import argparse
+import bisect
+import collections
+import contextlib
+import cProfile
+import csv
+import datetime
+import functools
+import json
+import multiprocessing
+import os
+import signal
+import threading
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+METRICS_PATH = os.path.normpath(os.path.join(BASE_DIR, '..', '..', 'logs', 'metrics.json'))
+PROFILE_DIR = os.path.normpath(os.path.join(BASE_DIR, '..', '..', 'logs', 'profiles'))
+
+# Obergrenzen der Histogrammklassen der Timer in Sekunden: vier Klassen je Dekade von 10 µs bis 100 s.
+# In allen Prozessen gleich, damit sich Histogramme beim Zusammenführen einfach addieren lassen.
+BUCKETS = tuple(10.0 ** (exponent / 4) for exponent in range(-20, 9))
+PERCENTILES = (0.5, 0.9, 0.99)
+
+# Profiler je Simulation: 'cprofile' (deterministisch, .prof für pstats/snakeviz) oder 'sampling' (alle
+# SAMPLE_INTERVAL Sekunden Prozesszeit ein Stack, .folded für Flamegraphs; nur unter Unix)
+PROFILERS = ('cprofile', 'sampling')
+SAMPLE_INTERVAL = 0.005
+
+# Erfassung ist standardmäßig aus; dann kehren timer() und count() sofort zurück (unter einer Mikrosekunde)
+_enabled = False
+_timers = {}  # Name -> [Anzahl, Summe, Minimum, Maximum, Histogramm]
+_counters = collections.Counter()
+_NULL_TIMER = contextlib.nullcontext()
+
+class _Timer:
+    """
+    Misst die Dauer eines with-Blocks und erfasst sie unter name.
+    """
+
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        add_time(self.name, time.perf_counter() - self.start)
+
+def configure_metrics(enabled=True):
+    """
+    Schaltet die Erfassung in diesem Prozess ein oder aus. Vor dem Start der Simulationsprozesse aufgerufen,
+    gilt die Einstellung auch in den (per fork gestarteten) Kindprozessen.
+    """
+    global _enabled
+    _enabled = enabled
+
+def metrics_enabled():
+    return _enabled
+
+def reset_metrics():
+    """
+    Verwirft alle bisher erfassten Werte dieses Prozesses (z. B. die vom Elternprozess geerbten).
+    """
+    _timers.clear()
+    _counters.clear()
+
+def timer(name):
+    """
+    Kontextmanager, der die Dauer des Blocks unter name erfasst, z. B. with timer('step.forces'): ...
+    """
+    if not _enabled:
+        return _NULL_TIMER
+    return _Timer(name)
+
+def add_time(name, seconds):
+    """
+    Erfasst eine gemessene Dauer in Sekunden unter name.
+    """
+    if not _enabled:
+        return
+    entry = _timers.get(name)
+    if entry is None:
+        entry = _timers[name] = [0, 0.0, seconds, seconds, [0] * (len(BUCKETS) + 1)]
+    entry[0] += 1
+    entry[1] += seconds
+    entry[2] = min(entry[2], seconds)
+    entry[3] = max(entry[3], seconds)
+    entry[4][bisect.bisect_left(BUCKETS, seconds)] += 1
+
+def count(name, value=1):
+    """
+    Erhöht den Zähler name um value (z. B. geschriebene Zeilen).
+    """
+    if _enabled:
+        _counters[name] += value
+
+def timed(name=None):
+    """
+    Dekorator: erfasst die Dauer jedes Aufrufs unter name (Standard: Funktionsname) und gibt den Rückgabewert weiter.
+    """
+    def decorator(function):
+        label = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with timer(label):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def snapshot():
+    """
+    Gibt die bisher erfassten Timer und Zähler dieses Prozesses als JSON-taugliches dict zurück.
+    """
+    return {
+        'timers': {name: {'count': n, 'total': total, 'min': low, 'max': high, 'buckets': list(buckets)}
+                   for name, (n, total, low, high, buckets) in _timers.items()},
+        'counters': dict(_counters),
+    }
+
+def merge_snapshots(snapshots):
+    """
+    Führt mehrere Snapshots zusammen: Anzahlen, Summen, Histogramme und Zähler werden addiert.
+    """
+    timers, counters = {}, collections.Counter()
+    for data in snapshots:
+        for name, entry in data['timers'].items():
+            merged = timers.get(name)
+            if merged is None:
+                timers[name] = {**entry, 'buckets': list(entry['buckets'])}
+                continue
+            merged['count'] += entry['count']
+            merged['total'] += entry['total']
+            merged['min'] = min(merged['min'], entry['min'])
+            merged['max'] = max(merged['max'], entry['max'])
+            merged['buckets'] = [a + b for a, b in zip(merged['buckets'], entry['buckets'])]
+        counters.update(data['counters'])
+    return {'timers': timers, 'counters': dict(counters)}
+
+def percentile(entry, fraction):
+    """
+    Schätzt ein Quantil eines Timers aus seinem Histogramm (Obergrenze der Klasse, höchstens das Maximum).
+    """
+    if not entry['count']:
+        return None
+    rank = fraction * entry['count']
+    cumulative = 0
+    for index, bucket in enumerate(entry['buckets']):
+        cumulative += bucket
+        if cumulative >= rank:
+            return min(BUCKETS[index], entry['max']) if index < len(BUCKETS) else entry['max']
+    return entry['max']
+
+def process_report(name, elapsed, profile=None):
+    """
+    Bericht eines Prozesses: Name, PID, Laufzeit, Snapshot und ggf. Pfad der Profildatei.
+    """
+    return {'process': name, 'pid': os.getpid(), 'elapsed_seconds': elapsed, 'profile': profile, **snapshot()}
+
+def merge_reports(reports):
+    """
+    Fasst die Berichte aller Prozesse zusammen. total enthält die addierten Timer und Zähler; als Laufzeit gilt
+    die längste, sodass Raten in total den gemeinsamen Durchsatz aller Prozesse angeben.
+    """
+    total = merge_snapshots(reports)
+    total['elapsed_seconds'] = max((report['elapsed_seconds'] for report in reports), default=0.0)
+    return {'created_at': datetime.datetime.now().isoformat(timespec='seconds'), 'processes': list(reports),
+            'total': total}
+
+class SamplingProfiler:
+    """
+    Stichprobenprofiler: unterbricht den Prozess alle interval Sekunden verbrauchter CPU-Zeit (SIGPROF) und
+    zählt den aktuellen Aufrufstapel. stop schreibt die Stapel im Format 'a;b;c Anzahl' (für Flamegraph-Werkzeuge).
+    """
+
+    def __init__(self, path, interval=SAMPLE_INTERVAL):
+        if not hasattr(signal, 'setitimer'):
+            raise ValueError("Der Stichprobenprofiler benötigt signal.setitimer und ist nur unter Unix verfügbar.")
+        self.path = path
+        self.interval = interval
+        self.stacks = collections.Counter()
+
+    def _sample(self, signum, frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+            frame = frame.f_back
+        self.stacks[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self._previous = signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self):
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, self._previous)
+        with open(self.path, 'w', encoding='utf-8') as file:
+            for stack, samples in self.stacks.most_common():
+                file.write(f'{stack} {samples}\n')
+        return self.path
+
+class _CProfiler:
+    """
+    cProfile mit derselben Schnittstelle wie SamplingProfiler; stop schreibt die Statistik für pstats.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+        self.profile.dump_stats(self.path)
+        return self.path
+
+def make_profiler(profile, name, directory=PROFILE_DIR):
+    """
+    Erzeugt den Profiler profile ('cprofile' oder 'sampling', None: keiner) für den Prozess name.
+    """
+    if profile is None:
+        return None
+    if profile not in PROFILERS:
+        raise ValueError(f"Unbekannter Profiler: {profile} (erwartet: {', '.join(PROFILERS)}).")
+    os.makedirs(directory, exist_ok=True)
+    stem = os.path.join(directory, f'{name}-{os.getpid()}')
+    if profile == 'cprofile':
+        return _CProfiler(stem + '.prof')
+    return SamplingProfiler(stem + '.folded')
+
+def run_with_metrics(metrics_queue, name, profile, target, *args, **kwargs):
+    """
+    Einstiegspunkt für Simulationsprozesse mit Erfassung: führt target aus (optional unter dem Profiler profile)
+    und übergibt am Ende, auch bei einem Fehler, den Bericht des Prozesses an metrics_queue (siehe MetricsCollector).
+    """
+    reset_metrics()
+    configure_metrics(True)
+    profiler = make_profiler(profile, name)
+    start = time.perf_counter()
+    if profiler is not None:
+        profiler.start()
+    try:
+        return target(*args, **kwargs)
+    finally:
+        path = profiler.stop() if profiler is not None else None
+        metrics_queue.put(process_report(name, time.perf_counter() - start, path))
+
+class MetricsCollector:
+    """
+    Sammelt die Berichte der Simulationsprozesse (siehe run_with_metrics) in einem Thread des Hauptprozesses,
+    damit die Warteschlange auch während der Laufzeit geleert wird. Erst nach dem Start der Prozesse starten.
+    """
+
+    def __init__(self):
+        self.queue = multiprocessing.Queue()
+        self.reports = []
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._collect, name='metrics', daemon=True)
+        self._thread.start()
+        return self
+
+    def _collect(self):
+        while True:
+            report = self.queue.get()
+            if report is None:
+                break
+            self.reports.append(report)
+
+    def add(self, report):
+        """
+        Übernimmt einen Bericht, der nicht über die Warteschlange kommt (z. B. den des Speicherprozesses).
+        """
+        self.reports.append(report)
+
+    def stop(self):
+        """
+        Nach dem Ende aller Prozesse aufrufen: gibt die zusammengeführten Berichte zurück (siehe merge_reports).
+        """
+        if self._thread is not None:
+            self.queue.put(None)
+            self._thread.join()
+            self._thread = None
+        return merge_reports(self.reports)
+
+def _rows(metrics):
+    """
+    Tabellenzeilen je Prozess und total: Timer mit Anzahl, Summe, Mittelwert, Extremwerten und Quantilen,
+    Zähler mit Wert und Rate pro Sekunde Laufzeit.
+    """
+    sections = [(report['process'], report) for report in metrics['processes']] + [('total', metrics['total'])]
+    for process, data in sections:
+        elapsed = data['elapsed_seconds']
+        for name, entry in sorted(data['timers'].items()):
+            yield {'process': process, 'kind': 'timer', 'name': name, 'count': entry['count'], 'total_s': entry['total'],
+                   'mean_s': entry['total'] / entry['count'] if entry['count'] else None, 'min_s': entry['min'],
+                   'max_s': entry['max'], **{f'p{round(q * 100)}_s': percentile(entry, q) for q in PERCENTILES},
+                   'value': None, 'per_second': None}
+        for name, value in sorted(data['counters'].items()):
+            yield {'process': process, 'kind': 'counter', 'name': name, 'count': None, 'total_s': None, 'mean_s': None,
+                   'min_s': None, 'max_s': None, **{f'p{round(q * 100)}_s': None for q in PERCENTILES},
+                   'value': value, 'per_second': value / elapsed if elapsed > 0 else None}
+
+def export_metrics(metrics, path=METRICS_PATH):
+    """
+    Schreibt die zusammengeführten Berichte als JSON oder, bei der Endung .csv, als Tabelle (eine Zeile je Prozess
+    und Timer bzw. Zähler) und gibt den Pfad zurück.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if path.endswith('.csv'):
+        rows = list(_rows(metrics))
+        with open(path, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.DictWriter(file, fieldnames=list(rows[0]) if rows else ['process', 'kind', 'name'])
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(metrics, file, indent=2)
+    return path
+
+def load_metrics(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+def format_metrics(metrics):
+    """
+    Formatiert die zusammengeführten Berichte für die Ausgabe: je Prozess Summe und Anteil jedes Timers an der
+    Laufzeit sowie die Zähler mit ihrer Rate.
+    """
+    lines = ["Messwerte:"]
+    for report in metrics['processes']:
+        elapsed = report['elapsed_seconds']
+        lines.append(f"  {report['process']} ({elapsed:.2f} s):")
+        for name, entry in sorted(report['timers'].items(), key=lambda item: -item[1]['total']):
+            share = entry['total'] / elapsed * 100 if elapsed > 0 else 0.0
+            p99 = percentile(entry, 0.99)
+            lines.append(f"    {name:<24} {entry['total']:9.3f} s {share:5.1f} %  {entry['count']:>8} x  "
+                         f"Mittel {entry['total'] / entry['count'] * 1e3:8.3f} ms  p99 {p99 * 1e3:8.3f} ms")
+        for name, value in sorted(report['counters'].items()):
+            rate = value / elapsed if elapsed > 0 else 0.0
+            lines.append(f"    {name:<24} {value:>11} ({rate:.1f}/s)")
+        if report.get('profile'):
+            lines.append(f"    Profil: {report['profile']}")
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Messwerte eines Laufs ausgeben oder als CSV exportieren.")
+    parser.add_argument('path', nargs='?', default=METRICS_PATH, help="JSON-Datei der Messwerte (Standard: logs/metrics.json)")
+    parser.add_argument('--csv', help="Zusätzlich als CSV-Tabelle in diese Datei schreiben")
+    args = parser.parse_args()
+
+    metrics = load_metrics(args.path)
+    print(format_metrics(metrics))
+    if args.csv:
+        print(f"CSV gespeichert: {export_metrics(metrics, args.csv)}")
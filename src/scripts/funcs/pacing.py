@@ -0,0 +1,82 @@
+import time
+from scripts.funcs.metrics import count, timer
+
+# Betriebsarten der Taktsteuerung
+PACING_MODES = ('fast', 'realtime', 'rate')
+
+# Standard: 10 Schritte pro Sekunde wie das frühere time.sleep(0.1), aber ohne Drift durch die Rechenzeit
+DEFAULT_PACING = {'mode': 'rate', 'steps_per_second': 10.0}
+
+class Pacer:
+    """
+    Steuert die Geschwindigkeit einer Simulationsschleife.
+    'fast' rechnet ohne Pause, 'realtime' hält ein festes Verhältnis von Simulationszeit zu Echtzeit ein
+    (ratio simulierte Sekunden pro Sekunde) und 'rate' eine feste Anzahl Schritte pro Sekunde.
+    Geschlafen wird bis zu festen Zeitpunkten, sodass die Rechenzeit eines Schritts abgezogen wird
+    und sich keine Abweichung aufsummiert.
+    """
+
+    def __init__(self, mode='rate', steps_per_second=10.0, ratio=1.0, dt=None, clock=time.monotonic, sleep=time.sleep):
+        if mode == 'fast':
+            self.interval = 0.0
+        elif mode == 'rate':
+            if steps_per_second <= 0:
+                raise ValueError("steps_per_second muss positiv sein.")
+            self.interval = 1.0 / steps_per_second
+        elif mode == 'realtime':
+            if dt is None or ratio <= 0:
+                raise ValueError("Für 'realtime' werden dt und ein positives ratio benötigt.")
+            self.interval = dt / ratio
+        else:
+            raise ValueError(f"Unbekannter Taktmodus: {mode}")
+
+        self.mode = mode
+        self._clock = clock
+        self._sleep = sleep
+        self._started = clock()
+        self._deadline = self._started + self.interval
+        self.steps = 0
+        self.slept_seconds = 0.0
+        self.late_steps = 0
+
+    def wait(self):
+        """
+        Am Ende jedes Schritts aufrufen: wartet bis zum nächsten Taktzeitpunkt.
+        """
+        self.steps += 1
+        count('steps')
+        if self.interval == 0.0:
+            return
+
+        now = self._clock()
+        remaining = self._deadline - now
+        if remaining > 0:
+            with timer('step.pacing'):
+                self._sleep(remaining)
+            self.slept_seconds += remaining
+        else:
+            self.late_steps += 1
+            # Liegt die Simulation mehr als einen Takt zurück, wird nicht nachgeholt, sondern neu angesetzt
+            if -remaining > self.interval:
+                self._deadline = now
+        self._deadline += self.interval
+
+    def summary(self):
+        """
+        Gibt eine kurze Zusammenfassung für das Log zurück.
+        """
+        elapsed = self._clock() - self._started
+        rate = self.steps / elapsed if elapsed > 0 else 0.0
+        return (f"Takt '{self.mode}': {self.steps} Schritte in {elapsed:.2f} s ({rate:.1f} Schritte/s), "
+                f"davon {self.slept_seconds:.2f} s Pause, {self.late_steps} verspätete Schritte")
+
+def make_pacer(pacing, dt):
+    """
+    Erzeugt einen Pacer aus einer Konfiguration: None (Standard), ein Modusname oder ein dict
+    wie {'mode': 'realtime', 'ratio': 600} bzw. {'mode': 'rate', 'steps_per_second': 50}.
+    """
+    if pacing is None:
+        pacing = DEFAULT_PACING
+    if isinstance(pacing, str):
+        pacing = {'mode': pacing}
+    return Pacer(dt=dt, **pacing)
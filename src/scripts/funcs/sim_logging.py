@@ -0,0 +1,135 @@
+import logging
+import logging.handlers
+import multiprocessing.util
+import os
+import queue
+from scripts.funcs.metrics import timer
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+LOG_PATH = os.path.join(BASE_DIR, '..', '..', 'logs', 'simulations.log')
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+ROOT_LOGGER = 'simulations'  # Gemeinsamer Elternlogger aller Simulationen
+DEFAULT_LEVEL = logging.INFO
+DEFAULT_SAMPLE_EVERY = 100  # Gesampelte Meldungen nur jeden 100. Schritt ausgeben
+
+_sample_every = {}
+
+class _ProcessQueueHandler(logging.handlers.QueueHandler):
+    """
+    Übergibt Log-Einträge an einen Listener-Thread, der Datei und Terminal bedient,
+    sodass die Rechenschleife nicht auf I/O wartet. Nach einem fork startet der Handler
+    im Kindprozess automatisch einen eigenen Listener.
+    """
+
+    def __init__(self):
+        super().__init__(None)
+        self._start_listener()
+
+    def _start_listener(self):
+        os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
+        formatter = logging.Formatter(LOG_FORMAT)
+        file_handler = logging.FileHandler(LOG_PATH)
+        stream_handler = logging.StreamHandler()
+        file_handler.setFormatter(formatter)
+        stream_handler.setFormatter(formatter)
+
+        self.pid = os.getpid()
+        self.queue = queue.SimpleQueue()
+        self.listener = logging.handlers.QueueListener(self.queue, file_handler, stream_handler)
+        self.listener.start()
+        # Beim Prozessende leeren; multiprocessing-Kindprozesse führen keine atexit-Handler aus
+        multiprocessing.util.Finalize(None, self._stop_listener, exitpriority=0)
+
+    def _stop_listener(self):
+        if self.pid == os.getpid() and self.listener._thread is not None:
+            self.listener.stop()
+
+    def enqueue(self, record):
+        if self.pid != os.getpid():
+            self._start_listener()
+        self.queue.put_nowait(record)
+
+    def flush(self):
+        """
+        Wartet, bis alle bisherigen Einträge geschrieben wurden.
+        """
+        if self.pid == os.getpid() and self.listener._thread is not None:
+            self.listener.stop()
+            self.listener.start()
+
+    def close(self):
+        self._stop_listener()
+        super().close()
+
+_handler = None
+
+def _root():
+    global _handler
+    root = logging.getLogger(ROOT_LOGGER)
+    if _handler is None:
+        _handler = _ProcessQueueHandler()
+        root.addHandler(_handler)
+        root.setLevel(DEFAULT_LEVEL)
+        root.propagate = False
+    return root
+
+class SimulationLogger(logging.LoggerAdapter):
+    """
+    Logger einer Simulation. Meldungen aus der Rechenschleife können mit sampled()
+    auf jeden sample_every-ten Schritt begrenzt werden; Formatierung erfolgt erst bei Ausgabe.
+    """
+
+    def __init__(self, logger, name):
+        super().__init__(logger, {})
+        self.simulation = name
+
+    @property
+    def sample_every(self):
+        return _sample_every.get(self.simulation, DEFAULT_SAMPLE_EVERY)
+
+    def sampled(self, step, level, msg, *args):
+        if step % self.sample_every == 0 and self.isEnabledFor(level):
+            with timer('step.logging'):
+                self.logger.log(level, msg, *args)
+
+    def sampled_debug(self, step, msg, *args):
+        self.sampled(step, logging.DEBUG, msg, *args)
+
+def get_simulation_logger(name):
+    """
+    Gibt den Logger der Simulation name zurück (z. B. 'gravity').
+    """
+    _root()
+    return SimulationLogger(logging.getLogger(f'{ROOT_LOGGER}.{name}'), name)
+
+def configure_logging(levels=None, sample_every=None):
+    """
+    Setzt Log-Level und Sampling-Intervall je Simulation, z. B.
+    configure_logging({'gravity': 'DEBUG'}, {'gravity': 10}). Mit dem Schlüssel '*' wird der Standard gesetzt.
+    Die Konfiguration gilt für diesen Prozess; per spawn gestartete Kindprozesse (Standard unter Windows und macOS)
+    übernehmen sie nicht, dafür run_with_logging als Einstiegspunkt verwenden.
+    """
+    root = _root()
+    for name, level in (levels or {}).items():
+        logger = root if name == '*' else logging.getLogger(f'{ROOT_LOGGER}.{name}')
+        logger.setLevel(level.upper() if isinstance(level, str) else level)
+    for name, every in (sample_every or {}).items():
+        if every < 1:
+            raise ValueError("Das Sampling-Intervall muss mindestens 1 sein.")
+        _sample_every[name] = every
+
+def run_with_logging(target, *args, log_levels=None, log_sample_every=None, **kwargs):
+    """
+    Einstiegspunkt für Simulationsprozesse: wendet die Logging-Konfiguration (siehe configure_logging) im
+    Kindprozess an und führt dann target aus, unabhängig davon, ob der Prozess per fork oder spawn gestartet wurde.
+    """
+    configure_logging(log_levels, log_sample_every)
+    return target(*args, **kwargs)
+
+def flush_logging():
+    """
+    Wartet, bis alle ausstehenden Log-Einträge geschrieben wurden.
+    """
+    if _handler is not None:
+        _handler.flush()
@@ -1,10 +1,19 @@
+import functools
 import time
+from scripts.funcs.metrics import add_time
 
 def timestamp_dec(funktion):
+    """
+    Gibt die Laufzeit jedes Aufrufs von funktion aus, erfasst sie zusätzlich als Timer unter dem Funktionsnamen
+    (siehe scripts.funcs.metrics) und gibt den Rückgabewert unverändert zurück.
+    """
+    @functools.wraps(funktion)
     def wrapper(*args, **kwargs):
-        start_time = time.time()
-        result = funktion(*args, **kwargs)
-        end_time = time.time()
-        elapsed_time = end_time - start_time
-        print(f"Die Funktion '{funktion.__name__}' dauerte {elapsed_time:.4f} Sekunden.")
-    return wrapper
\ No newline at end of file
+        start_time = time.perf_counter()
+        try:
+            return funktion(*args, **kwargs)
+        finally:
+            elapsed_time = time.perf_counter() - start_time
+            add_time(funktion.__name__, elapsed_time)
+            print(f"Die Funktion '{funktion.__name__}' dauerte {elapsed_time:.4f} Sekunden.")
+    return wrapper
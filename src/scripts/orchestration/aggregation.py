@@ -0,0 +1,169 @@
+import argparse
+import json
+import sqlite3
+import numpy as np
+from scripts.funcs.sim_logging import get_simulation_logger
+from scripts.simulations.electromagnetic_simulation import charge_q
+from scripts.simulations.ensemble import batched_accelerations, batched_energy
+from scripts.simulations.field_map import epsilon_0, mu_0
+from scripts.simulations.gravity_simulation import initialize_bodies
+from scripts.storage.db_writer import close_writers, get_writer
+from scripts.storage.reader import CHUNK_ROWS, positions, read_trajectory
+from scripts.storage.schema import DB_PATH, INSERT_RESULTS, migrate
+
+logger = get_simulation_logger('aggregation')
+
+def gravity_summary(rows, counts, config):
+    """
+    Gravitation: mittlerer Betrag der Gravitationskraft je Körper und Gesamtenergie (kinetisch + potentiell).
+    Die Massen stehen in runs.config; ältere Läufe ohne Massen gelten als Erde-Mond-System.
+    """
+    masses = np.asarray(config.get('masses') or initialize_bodies().masses, dtype=np.float64)
+    if np.any(counts != len(masses)):
+        return None, None  # Körperzahl passt nicht zu den Massen des Laufs
+    shape = (len(counts), len(masses), 3)
+    position = positions(rows).reshape(shape)
+    velocity = np.stack([rows['velocity_x'], rows['velocity_y'], rows['velocity_z']], axis=1).reshape(shape)
+    masses = np.broadcast_to(masses, shape[:2])
+    forces = masses[..., np.newaxis] * batched_accelerations(position, masses)
+    return np.linalg.norm(forces, axis=2).mean(axis=1), batched_energy(position, velocity, masses)
+
+def electromagnetic_summary(rows, counts, config):
+    """
+    Elektromagnetismus: Kraft q * E auf die Ladung des Laufs und Energiedichte der Felder eps0 E^2 / 2 + B^2 / (2 mu0).
+    """
+    starts = np.cumsum(counts) - counts
+    electric = np.add.reduceat(rows['electric_field'], starts) / counts
+    magnetic = np.add.reduceat(rows['magnetic_field'], starts) / counts
+    return config.get('charge', charge_q) * electric, 0.5 * epsilon_0 * electric ** 2 + magnetic ** 2 / (2 * mu_0)
+
+def strong_force_summary(rows, counts, config):
+    """
+    Starke Wechselwirkung: mittlerer Kraftbetrag je Teilchen (Energie ohne Massen und Geschwindigkeiten nicht bestimmbar).
+    """
+    starts = np.cumsum(counts) - counts
+    return np.add.reduceat(rows['force'], starts) / counts, None
+
+def weak_force_summary(rows, counts, config):
+    """
+    Schwache Wechselwirkung: nur die Anzahl der Zerfälle je Zeitschritt (samples); keine Kraft oder Energie.
+    """
+    return None, None
+
+# Quelltabellen: Name -> (Simulation der Läufe, Kennzahlen je Zeitschritt als (calculated_force, unified_theory),
+# Zeilen nach Zeitschritten der Länge dt bündeln statt nach gleichem Zeitpunkt)
+SOURCES = {
+    'gravity_data': ('gravity', gravity_summary, False),
+    'electromagnetic_data': ('electromagnetic', electromagnetic_summary, False),
+    'strong_force_data': ('strong_force', strong_force_summary, False),
+    'weak_force_data': ('weak_force', weak_force_summary, True),
+}
+
+def _step_times(table, rows, config):
+    """
+    Zeitschritt jeder Zeile: ihr Zeitpunkt bzw. bei Ereignistabellen (weak_force_data) der Beginn des Intervalls [t, t + dt).
+    """
+    if SOURCES[table][2]:
+        dt = config.get('dt', 60)
+        return np.floor(rows['time'] / dt) * dt
+    return rows['time']
+
+def _summarize(table, run_id, rows, steps, config):
+    """
+    Gibt die Ergebniszeilen (run_id, source, time, calculated_force, unified_theory, samples) der vollständigen
+    Zeitschritte in rows zurück.
+    """
+    times, counts = np.unique(steps, return_counts=True)
+    force, theory = SOURCES[table][1](rows, counts, config)
+    force = [None] * len(times) if force is None else np.asarray(force, dtype=np.float64).tolist()
+    theory = [None] * len(times) if theory is None else np.asarray(theory, dtype=np.float64).tolist()
+    return list(zip([run_id] * len(times), [table] * len(times), times.tolist(), force, theory, counts.tolist()))
+
+def aggregate_run(db_path, run_id, table, config, finished, mark=None, chunk_size=CHUNK_ROWS):
+    """
+    Fasst die Zeilen eines Laufs ab dem Zeitpunkt mark (None: von Beginn an) je Zeitschritt in results zusammen
+    und gibt (Anzahl neuer Ergebnisse, neue Marke) zurück. Der letzte Zeitschritt eines noch nicht beendeten Laufs
+    kann unvollständig sein und wird erst im nächsten Durchlauf zusammengefasst; die Marke zeigt dann auf seinen Beginn.
+    """
+    writer = get_writer(db_path)
+    written = 0
+    pending = None  # Zeilen des letzten, möglicherweise noch unvollständigen Zeitschritts
+    last_time = None
+    for chunk in read_trajectory(table, db_path, run_id=run_id, start=mark, chunk_size=chunk_size):
+        if pending is not None:
+            chunk = np.concatenate([pending, chunk])
+        steps = _step_times(table, chunk, config)
+        end = int(np.searchsorted(steps, steps[-1]))
+        pending = chunk[end:]
+        if end:
+            rows = _summarize(table, run_id, chunk[:end], steps[:end], config)
+            writer.insert(INSERT_RESULTS, rows)
+            written += len(rows)
+            last_time = float(chunk['time'][end - 1])
+
+    if pending is not None and len(pending):
+        if finished:
+            rows = _summarize(table, run_id, pending, _step_times(table, pending, config), config)
+            writer.insert(INSERT_RESULTS, rows)
+            written += len(rows)
+            last_time = float(pending['time'][-1])
+        else:
+            # Erneut ab dem Beginn des unvollständigen Zeitschritts lesen
+            return written, float(pending['time'][0])
+    if last_time is None:
+        return written, mark
+    return written, float(np.nextafter(last_time, np.inf))
+
+def aggregate(db_path=DB_PATH, tables=tuple(SOURCES), chunk_size=CHUNK_ROWS):
+    """
+    Fasst alle seit dem letzten Durchlauf hinzugekommenen Zeilen der Datentabellen tables je Lauf und Zeitschritt
+    in results zusammen (source = Quelltabelle, samples = Anzahl der Zeilen bzw. Zerfälle) und gibt die Anzahl
+    neuer Ergebnisse je Tabelle zurück. Die Marke je Lauf und Tabelle (aggregation_marks) wird mit den Ergebnissen
+    geschrieben, sodass ein erneuter Durchlauf nur die danach hinzugekommenen Zeilen liest; ein Lauf, der nach einem
+    Checkpoint fortgesetzt wird, setzt seine Marke zurück (siehe scripts.storage.checkpoint.discard_aggregates_after).
+    Läufe beider Speicher-Backends und aller Ausgaberichtlinien werden über scripts.storage.reader gelesen.
+    Sollte nicht gleichzeitig mit dem Fortsetzen einer Simulation laufen, deren Marke dabei zurückgesetzt wird.
+    """
+    unknown = [table for table in tables if table not in SOURCES]
+    if unknown:
+        raise ValueError(f"Unbekannte Quelltabellen: {', '.join(unknown)} (erwartet: {', '.join(SOURCES)}).")
+    migrate(db_path)
+
+    simulations = {SOURCES[table][0]: table for table in tables}
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        marks = {(run_id, table): time for run_id, table, time in conn.execute("SELECT run_id, table_name, time FROM aggregation_marks")}
+        runs = conn.execute(
+            f"SELECT id, simulation, config, finished_at IS NOT NULL FROM runs "
+            f"WHERE simulation IN ({', '.join('?' * len(simulations))}) ORDER BY id", tuple(simulations)
+        ).fetchall()
+    finally:
+        conn.close()
+
+    counts = dict.fromkeys(tables, 0)
+    writer = get_writer(db_path)
+    try:
+        for run_id, simulation, config, finished in runs:
+            table = simulations[simulation]
+            mark = marks.get((run_id, table))
+            written, new_mark = aggregate_run(db_path, run_id, table, json.loads(config), finished, mark, chunk_size)
+            if new_mark is not None and new_mark != mark:
+                writer.execute("INSERT OR REPLACE INTO aggregation_marks (run_id, table_name, time) VALUES (?, ?, ?)",
+                               (run_id, table, new_mark))
+            # Ergebnisse und Marke eines Laufs gemeinsam schreiben
+            writer.flush()
+            counts[table] += written
+            if written:
+                logger.info('Lauf %d (%s): %d Zeitschritte zusammengefasst.', run_id, table, written)
+    finally:
+        close_writers()
+    return counts
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Neue Zeilen der Datentabellen je Zeitschritt in results zusammenfassen.")
+    parser.add_argument('db_path', nargs='?', default=DB_PATH, help="Datenbank (Standard: database/simulation_data.db)")
+    parser.add_argument('--tables', nargs='+', default=list(SOURCES), choices=list(SOURCES), help="Quelltabellen")
+    args = parser.parse_args()
+
+    for table, count in aggregate(args.db_path, args.tables).items():
+        print(f"{table}: {count} neue Ergebnisse")
@@ -0,0 +1,233 @@
+import argparse
+import collections
+import inspect
+import json
+import multiprocessing
+import multiprocessing.connection
+import re
+import time
+import traceback
+from scripts.funcs.cores import available_cores
+from scripts.funcs.sim_logging import configure_logging, get_simulation_logger
+from scripts.simulations.coupled_simulation import run_coupled_simulation
+from scripts.simulations.electromagnetic_simulation import run_elec_simulation
+from scripts.simulations.ensemble import run_ensemble_simulation
+from scripts.simulations.gravity_simulation import DB_PATH as GRAVITY_DB_PATH, init_simulation_state, run_grav_simulation
+from scripts.simulations.particle_system import ParticleSystem
+from scripts.simulations.strong_force_simulation import run_strong_force_simulation
+from scripts.simulations.weak_force_simulation import run_weak_force_simulation
+from scripts.storage.shards import SHARD_DIR, create_shard
+
+logger = get_simulation_logger('orchestrator')
+
+POLL_SECONDS = 1.0  # Längste Wartezeit auf das Ende eines Prozesses, bevor die Zeitlimits erneut geprüft werden
+JOB_NAME = re.compile(r'^[A-Za-z0-9_.-]+$')  # Auftragsnamen werden Teil des Shard-Dateinamens
+
+# Voreinstellungen eines Auftrags, soweit weder defaults noch der Auftrag selbst etwas angeben
+JOB_DEFAULTS = {
+    'params': {},
+    'pacing': {'mode': 'fast'},
+    'storage': None,
+    'output': None,
+    'retries': 0,
+    'timeout': None,
+}
+
+def run_gravity_simulation(pacing=None, db_path=GRAVITY_DB_PATH, storage=None, output=None, bodies=None, **params):
+    """
+    Startet die Gravitationssimulation; bodies kann auch als dict mit positions, velocities und masses
+    (z. B. aus einer Konfigurationsdatei) übergeben werden.
+    """
+    if isinstance(bodies, dict):
+        bodies = ParticleSystem(bodies['positions'], bodies['velocities'], bodies['masses'])
+    init_simulation_state(db_path)
+    run_grav_simulation(pacing, db_path=db_path, storage=storage, output=output, bodies=bodies, **params)
+
+SIMULATIONS = {
+    'coupled': run_coupled_simulation,
+    'electromagnetic': run_elec_simulation,
+    'gravity': run_gravity_simulation,
+    'gravity_ensemble': run_ensemble_simulation,
+    'strong_force': run_strong_force_simulation,
+    'weak_force': run_weak_force_simulation,
+}
+
+def _target(simulation):
+    if simulation == 'gravity':
+        return run_grav_simulation  # Die Parameter von run_gravity_simulation reicht der Wrapper weiter
+    return SIMULATIONS[simulation]
+
+def job_kwargs(job):
+    """
+    Schlüsselwortargumente der run_*-Funktion eines Auftrags.
+    """
+    kwargs = dict(job['params'])
+    kwargs.update(pacing=job['pacing'], db_path=job['db_path'], storage=job['storage'])
+    if job['output'] is not None:
+        kwargs['output'] = job['output']
+    return kwargs
+
+def load_jobs(path, shard_dir=SHARD_DIR):
+    """
+    Liest eine Auftragsdatei (JSON) und gibt (Aufträge, Einstellungen) zurück. Aufbau:
+    {"workers": 4, "log_levels": {...}, "defaults": {...}, "jobs": [{"name": ..., "simulation": ..., "params": {...}}]}.
+    Jeder Auftrag nennt eine Simulation aus SIMULATIONS und optional params (Argumente der run_*-Funktion),
+    pacing, storage, output, retries (Wiederholungen nach einem Fehler), timeout (Sekunden je Versuch) und db_path;
+    fehlende Angaben kommen aus defaults bzw. JOB_DEFAULTS. Ohne db_path schreibt jeder Auftrag in einen eigenen
+    Shard unter shard_dir, sodass sich Checkpoints und Schreibsperren der Aufträge nicht in die Quere kommen und ein
+    wiederholter Versuch am letzten Checkpoint fortsetzt.
+    """
+    with open(path, encoding='utf-8') as f:
+        config = json.load(f)
+
+    defaults = {**JOB_DEFAULTS, **config.get('defaults', {})}
+    jobs = []
+    for index, entry in enumerate(config.get('jobs', [])):
+        job = {**defaults, **entry, 'params': {**defaults['params'], **entry.get('params', {})}}
+        simulation = job.get('simulation')
+        if simulation not in SIMULATIONS:
+            raise ValueError(f"Auftrag {index}: unbekannte Simulation {simulation} (erwartet: {', '.join(SIMULATIONS)}).")
+        job.setdefault('name', f'{simulation}-{index}')
+        if not JOB_NAME.match(job['name']):
+            raise ValueError(f"Ungültiger Auftragsname: {job['name']} (erlaubt: Buchstaben, Ziffern, _ . -).")
+        if any(other['name'] == job['name'] for other in jobs):
+            raise ValueError(f"Doppelter Auftragsname: {job['name']}")
+        if job['retries'] < 0:
+            raise ValueError(f"Auftrag {job['name']}: retries darf nicht negativ sein.")
+        job.setdefault('db_path', None)
+
+        # Parameter vorab prüfen, damit ein Tippfehler nicht erst im laufenden Auftrag auffällt
+        parameters = inspect.signature(_target(simulation)).parameters
+        unknown = [name for name in job_kwargs(job) if name not in parameters]
+        if unknown:
+            raise ValueError(f"Auftrag {job['name']}: unbekannte Parameter für {simulation}: {', '.join(unknown)}")
+        jobs.append(job)
+
+    for job in jobs:
+        if job['db_path'] is None:
+            job['db_path'] = create_shard(job['simulation'], job['name'], shard_dir)
+    return jobs, {key: value for key, value in config.items() if key not in ('defaults', 'jobs')}
+
+def _run_job(job, connection, log_levels=None, log_sample_every=None):
+    """
+    Einstiegspunkt des Prozesses eines Versuchs: wendet die Logging-Konfiguration an (auch bei spawn),
+    meldet einen Fehler über connection und endet dann mit Code 1.
+    """
+    try:
+        configure_logging(log_levels, log_sample_every)
+        SIMULATIONS[job['simulation']](**job_kwargs(job))
+    except BaseException:
+        connection.send(traceback.format_exc())
+        connection.close()
+        raise SystemExit(1)
+    connection.close()
+
+def run_jobs(jobs, workers=None, log_levels=None, log_sample_every=None):
+    """
+    Führt die Aufträge auf höchstens workers gleichzeitigen Prozessen aus (Standard: available_cores()).
+    log_levels und log_sample_every werden in jedem Prozess angewendet (siehe configure_logging).
+    Jeder Versuch läuft in einem eigenen Prozess; Ausnahmen, Abstürze und überschrittene Zeitlimits gelten als
+    Fehler und werden bis zu retries-mal wiederholt. Gibt je Auftrag einen Bericht (dict) in der Reihenfolge
+    der Aufträge zurück: status ('ok' oder 'failed'), attempts, wall_seconds (je Versuch und gesamt) und error.
+    """
+    workers = max(1, workers or available_cores())
+    reports = {job['name']: {'name': job['name'], 'simulation': job['simulation'], 'db_path': job['db_path'],
+                             'status': 'pending', 'attempts': 0, 'wall_seconds': 0.0, 'attempt_seconds': [], 'error': None}
+               for job in jobs}
+    pending = collections.deque(jobs)
+    running = {}  # Sentinel des Prozesses -> (Auftrag, Prozess, Verbindung, Startzeit)
+    logger.info('%d Aufträge auf %d Prozessen (%d Kerne verfügbar).', len(jobs), workers, available_cores())
+
+    try:
+        while pending or running:
+            while pending and len(running) < workers:
+                job = pending.popleft()
+                receiver, sender = multiprocessing.Pipe(duplex=False)
+                process = multiprocessing.Process(target=_run_job, args=(job, sender, log_levels, log_sample_every),
+                                                  name=f"job-{job['name']}")
+                process.start()
+                sender.close()
+                reports[job['name']]['attempts'] += 1
+                running[process.sentinel] = (job, process, receiver, time.monotonic())
+                logger.info('Auftrag %s gestartet (Versuch %d).', job['name'], reports[job['name']]['attempts'])
+
+            # Bis zum Ende eines Prozesses warten, höchstens bis zum nächsten Zeitlimit
+            deadlines = [started + job['timeout'] for job, _, _, started in running.values() if job['timeout'] is not None]
+            timeout = min([POLL_SECONDS] + [deadline - time.monotonic() for deadline in deadlines])
+            ready = multiprocessing.connection.wait(list(running), timeout=max(timeout, 0.0))
+            now = time.monotonic()
+            for sentinel, (job, process, receiver, started) in list(running.items()):
+                error = None
+                if sentinel in ready:
+                    process.join()
+                    if process.exitcode != 0:
+                        error = receiver.recv() if receiver.poll() else f"Prozess mit Code {process.exitcode} beendet."
+                elif job['timeout'] is not None and now - started >= job['timeout']:
+                    process.terminate()
+                    process.join()
+                    error = f"Zeitlimit von {job['timeout']} s überschritten."
+                else:
+                    continue
+
+                del running[sentinel]
+                receiver.close()
+                report = reports[job['name']]
+                report['attempt_seconds'].append(now - started)
+                report['wall_seconds'] += now - started
+                report['error'] = error
+                if error is None:
+                    report['status'] = 'ok'
+                    logger.info('Auftrag %s abgeschlossen nach %.2f s.', job['name'], now - started)
+                elif report['attempts'] <= job['retries']:
+                    logger.warning('Auftrag %s fehlgeschlagen (Versuch %d), wird wiederholt:\n%s',
+                                   job['name'], report['attempts'], error)
+                    pending.append(job)
+                else:
+                    report['status'] = 'failed'
+                    logger.error('Auftrag %s endgültig fehlgeschlagen nach %d Versuchen:\n%s',
+                                 job['name'], report['attempts'], error)
+    finally:
+        # Bei Abbruch (z. B. Strg+C) keine verwaisten Simulationsprozesse zurücklassen
+        for job, process, receiver, started in running.values():
+            process.terminate()
+            process.join()
+            receiver.close()
+    return [reports[job['name']] for job in jobs]
+
+def format_job_report(reports):
+    """
+    Formatiert die Berichte von run_jobs als Tabelle mit der Wandzeit je Auftrag.
+    """
+    width = max([len(report['name']) for report in reports] + [7])
+    lines = [f"{'Auftrag':<{width}}  {'Simulation':<15}  {'Status':<6}  {'Versuche':>8}  {'Wandzeit':>10}"]
+    for report in reports:
+        lines.append(f"{report['name']:<{width}}  {report['simulation']:<15}  {report['status']:<6}  "
+                     f"{report['attempts']:>8}  {report['wall_seconds']:>9.2f}s")
+    failed = sum(report['status'] != 'ok' for report in reports)
+    total = sum(report['wall_seconds'] for report in reports)
+    lines.append(f"{len(reports) - failed} von {len(reports)} Aufträgen erfolgreich, Wandzeit gesamt {total:.2f} s.")
+    return "\n".join(lines)
+
+def run_config(path, workers=None, shard_dir=SHARD_DIR):
+    """
+    Liest eine Auftragsdatei (siehe load_jobs) und führt sie aus; workers überschreibt die Angabe der Datei.
+    """
+    jobs, settings = load_jobs(path, shard_dir)
+    log_levels, log_sample_every = settings.get('log_levels'), settings.get('log_sample_every')
+    configure_logging(log_levels, log_sample_every)
+    return run_jobs(jobs, workers or settings.get('workers'), log_levels, log_sample_every)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulationsaufträge aus einer Konfigurationsdatei ausführen.")
+    parser.add_argument('config', help="Auftragsdatei (JSON)")
+    parser.add_argument('--workers', type=int, help="Gleichzeitige Prozesse (Standard: verfügbare Kerne)")
+    parser.add_argument('--shard-dir', default=SHARD_DIR, help="Verzeichnis der Shards der Aufträge")
+    parser.add_argument('--report', help="Berichte zusätzlich als JSON in diese Datei schreiben")
+    args = parser.parse_args()
+
+    reports = run_config(args.config, args.workers, args.shard_dir)
+    print(format_job_report(reports))
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, indent=2)
+    raise SystemExit(0 if all(report['status'] == 'ok' for report in reports) else 1)
@@ -0,0 +1,263 @@
+import argparse
+import inspect
+import itertools
+import json
+import logging
+import math
+import multiprocessing
+import traceback
+import numpy as np
+from scripts.funcs.cores import available_cores
+from scripts.funcs.sim_logging import get_simulation_logger
+from scripts.simulations.electromagnetic_simulation import charge_q, compute_electric_field, compute_magnetic_field, distance
+from scripts.simulations.gravity_simulation import G, INTEGRATOR, M1, M2, R0, initialize_bodies, velocity_moon
+from scripts.simulations.nbody import GravityEngine
+from scripts.simulations.strong_force_simulation import (BOX_SIZE, CUTOFF_RADIUS, PARTICLE_COUNT, STRONG_FORCE_CONSTANT,
+                                                         compute_strong_force, initialize_particles, update_particle_positions)
+from scripts.simulations.cell_list import wrap_positions
+from scripts.simulations.weak_force_simulation import DECAY_CHAIN, PARTICLE_COUNT as DECAY_PARTICLE_COUNT, sample_decays
+
+logger = get_simulation_logger('sweep')
+
+# Verteilungen für Zufallsdesigns: Name -> Ziehen eines Werts aus den Argumenten
+DISTRIBUTIONS = {
+    'uniform': lambda rng, lo, hi: float(rng.uniform(lo, hi)),
+    'loguniform': lambda rng, lo, hi: float(math.exp(rng.uniform(math.log(lo), math.log(hi)))),
+    'normal': lambda rng, mean, std: float(rng.normal(mean, std)),
+    'integers': lambda rng, lo, hi: int(rng.integers(lo, hi, endpoint=True)),
+    'choice': lambda rng, *values: values[int(rng.integers(len(values)))],
+}
+
+class RunningStats:
+    """
+    Laufende Kennzahlen einer Messgröße (Anzahl, Mittelwert, Standardabweichung, Minimum, Maximum) nach Welford:
+    jeder Wert wird sofort eingerechnet, sodass keine Einzelergebnisse aufbewahrt werden müssen.
+    merge vereinigt die Kennzahlen zweier Teilmengen (z. B. aus verschiedenen Prozessen).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, value):
+        value = float(value)
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other):
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def to_dict(self):
+        return {'count': self.count, 'mean': self.mean, 'std': self.std,
+                'min': self.min if self.count else None, 'max': self.max if self.count else None}
+
+def gravity_summary(rng, total_time=3600 * 24, dt=60, integrator=INTEGRATOR, max_step=None, rtol=1e-10, constant=G,
+                    masses=(M1, M2), separation=R0, moon_velocity=velocity_moon, velocity_jitter=0.0, kernel_backend=None):
+    """
+    Erde-Mond-System ohne Speicherung; moon_velocity ist ein Vektor oder die Bahngeschwindigkeit in y-Richtung.
+    velocity_jitter stört die Mondgeschwindigkeit relativ (normalverteilt), um Ensembles zu bilden.
+    Kennzahlen: Abstand am Ende, minimaler und maximaler Abstand sowie maximale Energie- und Drehimpulsdrift.
+    """
+    velocity = np.array((0.0, moon_velocity, 0.0) if np.isscalar(moon_velocity) else moon_velocity, dtype=np.float64)
+    if velocity_jitter:
+        velocity *= 1.0 + velocity_jitter * rng.standard_normal(3)
+    bodies = initialize_bodies(masses, separation, velocity)
+    engine = GravityEngine(bodies, integrator, constant, max_step, rtol, kernel_backend)
+
+    closest, farthest = math.inf, 0.0
+    current_time = 0
+    while current_time <= total_time:
+        engine.advance(dt)
+        gap = float(np.linalg.norm(bodies.positions[1] - bodies.positions[0]))
+        closest, farthest = min(closest, gap), max(farthest, gap)
+        current_time += dt
+    engine.diagnostics()
+    return {'final_separation': gap, 'min_separation': closest, 'max_separation': farthest,
+            'energy_drift': engine.max_energy_drift, 'angular_momentum_drift': engine.max_angular_momentum_drift}
+
+def strong_force_summary(rng, particle_count=PARTICLE_COUNT, total_time=3600 * 24, dt=60, solver='direct',
+                         force_constant=STRONG_FORCE_CONSTANT, box_size=BOX_SIZE, cutoff=CUTOFF_RADIUS, boundary='open',
+                         chunk_size=None, kernel_backend=None):
+    """
+    Teilchensystem der starken Wechselwirkung ohne Speicherung.
+    Kennzahlen: zeitlich gemittelte mittlere Kraft, kinetische Energie am Ende und mittlere quadratische Verschiebung.
+    """
+    particles = initialize_particles(particle_count, rng, box_size)
+    start = particles.positions.copy()
+    force_sum, steps = 0.0, 0
+    current_time = 0
+    while current_time <= total_time:
+        forces = compute_strong_force(particles, chunk_size, solver, cutoff=cutoff, boundary=boundary,
+                                      constant=force_constant, box_size=box_size, kernel_backend=kernel_backend)
+        update_particle_positions(particles, forces, dt, kernel_backend)
+        if boundary == 'periodic':
+            wrap_positions(particles.positions, box_size)
+        force_sum += float(np.linalg.norm(forces, axis=1).mean())
+        steps += 1
+        current_time += dt
+    kinetic = 0.5 * float(np.sum(particles.masses * np.einsum('ij,ij->i', particles.velocities, particles.velocities)))
+    displacement = float(np.sqrt(np.mean(np.sum((particles.positions - start) ** 2, axis=1))))
+    return {'mean_force': force_sum / steps, 'kinetic_energy': kinetic, 'rms_displacement': displacement}
+
+def weak_force_summary(rng, particle_count=DECAY_PARTICLE_COUNT, decay_rates=DECAY_CHAIN, total_time=3600 * 24):
+    """
+    Zerfallskette ohne Speicherung. Kennzahlen: Anzahl der Zerfälle, mittlere Zerfallszeit und Anteil der Teilchen
+    je Stufe am Ende (stage_0 ist die Mutterstufe, die letzte Stufe ist stabil).
+    """
+    times, _, stages = sample_decays(particle_count, decay_rates, total_time, rng)
+    # counts[s]: Teilchen, die Stufe s verlassen haben; in Stufe s befinden sich counts[s - 1] - counts[s]
+    counts = np.append(np.bincount(stages, minlength=len(decay_rates)), 0)
+    summary = {'decays': len(times), 'mean_decay_time': float(times.mean()) if len(times) else 0.0}
+    for stage in range(len(decay_rates) + 1):
+        entered = particle_count if stage == 0 else counts[stage - 1]
+        summary[f'stage_{stage}_fraction'] = (entered - counts[stage]) / particle_count
+    return summary
+
+def electromagnetic_summary(rng, charge=charge_q, distance=distance, current=1.0):
+    """
+    Felder der Punktladung bzw. des Drahts (deterministisch, rng wird nicht verwendet).
+    """
+    return {'electric_field': compute_electric_field(charge, distance), 'magnetic_field': compute_magnetic_field(current, distance)}
+
+# Modelle für Parameterstudien: Simulation -> Funktion(rng, **params), die Kennzahlen als dict zurückgibt
+MODELS = {
+    'electromagnetic': electromagnetic_summary,
+    'gravity': gravity_summary,
+    'strong_force': strong_force_summary,
+    'weak_force': weak_force_summary,
+}
+
+def _sample(rng, spec):
+    (name, args), = spec.items()
+    if name not in DISTRIBUTIONS:
+        raise ValueError(f"Unbekannte Verteilung: {name} (erwartet: {', '.join(DISTRIBUTIONS)}).")
+    return DISTRIBUTIONS[name](rng, *args)
+
+def expand_sweep(spec):
+    """
+    Entfaltet eine Parameterstudie in Parameterpunkte und Aufträge. spec enthält simulation, seed, params (fest),
+    grid (Wertelisten, deren kartesisches Produkt gebildet wird), random ({'samples': n, 'params': {name: {Verteilung:
+    [Argumente]}}}, siehe DISTRIBUTIONS; wird mit jedem Gitterpunkt kombiniert) und replicates (Wiederholungen je Punkt).
+    Jeder Auftrag erhält einen eigenen, unabhängigen Zufallsstrom aus SeedSequence(seed).spawn; Ergebnisse hängen
+    daher nur von seed ab, nicht von der Anzahl der Prozesse oder der Reihenfolge der Ausführung.
+    Gibt (Punkte, Aufträge) zurück; ein Auftrag ist (Punktindex, Wiederholung, Parameter, SeedSequence).
+    """
+    simulation = spec.get('simulation')
+    if simulation not in MODELS:
+        raise ValueError(f"Unbekannte Simulation: {simulation} (erwartet: {', '.join(MODELS)}).")
+    replicates = int(spec.get('replicates', 1))
+    if replicates < 1:
+        raise ValueError("replicates muss mindestens 1 sein.")
+
+    root = np.random.SeedSequence(spec.get('seed'))
+    grid = spec.get('grid', {})
+    points = [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+    if 'random' in spec:
+        # Eigener Strom für das Design, damit die Parameter unabhängig von den Aufträgen gezogen werden
+        design = np.random.default_rng(root.spawn(1)[0])
+        samples = [{name: _sample(design, distribution) for name, distribution in spec['random']['params'].items()}
+                   for _ in range(int(spec['random']['samples']))]
+        points = [{**point, **sample} for point in points for sample in samples]
+    points = [{**spec.get('params', {}), **point} for point in points]
+
+    # Parameter vorab prüfen, damit ein Tippfehler nicht erst in den Prozessen auffällt
+    parameters = inspect.signature(MODELS[simulation]).parameters
+    unknown = sorted({name for point in points for name in point if name not in parameters or name == 'rng'})
+    if unknown:
+        raise ValueError(f"Unbekannte Parameter für {simulation}: {', '.join(unknown)}")
+
+    seeds = root.spawn(len(points) * replicates)
+    jobs = [(index, replicate, point, seeds[index * replicates + replicate])
+            for index, point in enumerate(points) for replicate in range(replicates)]
+    return points, jobs
+
+def _run_sweep_job(task):
+    simulation, (index, replicate, params, seed) = task
+    try:
+        return index, MODELS[simulation](np.random.default_rng(seed), **params), None
+    except Exception:
+        return index, None, traceback.format_exc()
+
+def run_sweep(spec, workers=None, chunksize=1):
+    """
+    Führt eine Parameterstudie (siehe expand_sweep) auf einem Prozesspool mit workers Prozessen aus
+    (Standard: spec['workers'] bzw. available_cores()). Die Kennzahlen jedes Auftrags werden sofort in
+    RunningStats je Parameterpunkt eingerechnet und danach verworfen; es werden keine Verläufe gespeichert.
+    Gibt je Punkt {'params', 'runs', 'failed', 'stats': {Kennzahl: {count, mean, std, min, max}}} zurück.
+    """
+    simulation = spec.get('simulation')
+    points, jobs = expand_sweep(spec)
+    workers = max(1, workers or spec.get('workers') or available_cores())
+    stats = [{} for _ in points]
+    runs = [0] * len(points)
+    failed = [0] * len(points)
+    logger.info('Parameterstudie %s: %d Punkte, %d Aufträge auf %d Prozessen.', simulation, len(points), len(jobs), workers)
+
+    def collect(results):
+        for done, (index, summary, error) in enumerate(results, 1):
+            if error is not None:
+                failed[index] += 1
+                logger.warning('Auftrag für Punkt %d fehlgeschlagen:\n%s', index, error)
+            else:
+                runs[index] += 1
+                for name, value in summary.items():
+                    stats[index].setdefault(name, RunningStats()).update(value)
+            logger.sampled(done, logging.INFO, '%d von %d Aufträgen abgeschlossen.', done, len(jobs))
+
+    tasks = [(simulation, job) for job in jobs]
+    if workers == 1:
+        collect(map(_run_sweep_job, tasks))
+    else:
+        # imap liefert in Auftragsreihenfolge: die Kennzahlen sind damit bitgenau reproduzierbar
+        with multiprocessing.Pool(workers) as pool:
+            collect(pool.imap(_run_sweep_job, tasks, chunksize))
+
+    return [{'params': point, 'runs': runs[index], 'failed': failed[index],
+             'stats': {name: value.to_dict() for name, value in stats[index].items()}}
+            for index, point in enumerate(points)]
+
+def format_sweep(results):
+    """
+    Formatiert die Ergebnisse von run_sweep als Text: je Punkt die Parameter und Mittelwert ± Standardabweichung.
+    """
+    lines = []
+    for result in results:
+        params = ', '.join(f'{name}={value}' for name, value in result['params'].items())
+        lines.append(f"[{params}] Läufe: {result['runs']}, fehlgeschlagen: {result['failed']}")
+        for name, stat in result['stats'].items():
+            lines.append(f"  {name}: {stat['mean']:.6g} ± {stat['std']:.3g} (min {stat['min']:.6g}, max {stat['max']:.6g})")
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parameterstudie bzw. Ensemble aus einer Konfigurationsdatei ausführen.")
+    parser.add_argument('config', help="Studie (JSON, siehe expand_sweep)")
+    parser.add_argument('--workers', type=int, help="Prozesse (Standard: verfügbare Kerne)")
+    parser.add_argument('--output', help="Ergebnisse zusätzlich als JSON in diese Datei schreiben")
+    args = parser.parse_args()
+
+    with open(args.config, encoding='utf-8') as f:
+        sweep = json.load(f)
+    results = run_sweep(sweep, args.workers)
+    print(format_sweep(results))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,166 @@
+import numpy as np
+from scripts.simulations.particle_system import expand_ranges
+
+# Standardwerte des Barnes-Hut-Lösers
+DEFAULT_THETA = 0.5  # Öffnungswinkel: 0 entspricht der exakten Paarsumme, größere Werte sind schneller und ungenauer
+LEAF_SIZE = 8  # Maximale Teilchenzahl in einem Blattknoten
+MAX_DEPTH = 16  # Maximale Baumtiefe (3 * MAX_DEPTH Bits pro Morton-Code, höchstens 21)
+PARTICLE_CHUNK = 4096  # Anzahl der Teilchen, deren Baumdurchlauf gleichzeitig ausgewertet wird
+
+def _spread_bits(values):
+    """
+    Verteilt die unteren 21 Bits jedes Werts auf jede dritte Bitposition (für Morton-Codes).
+    """
+    v = values.astype(np.uint64)
+    v = (v | (v << np.uint64(32))) & np.uint64(0x1f00000000ffff)
+    v = (v | (v << np.uint64(16))) & np.uint64(0x1f0000ff0000ff)
+    v = (v | (v << np.uint64(8))) & np.uint64(0x100f00f00f00f00f)
+    v = (v | (v << np.uint64(4))) & np.uint64(0x10c30c30c30c30c3)
+    v = (v | (v << np.uint64(2))) & np.uint64(0x1249249249249249)
+    return v
+
+class OctreeLevel:
+    """
+    Alle Knoten einer Baumebene. Jeder Knoten umfasst einen zusammenhängenden Bereich
+    [start, end) der nach Morton-Code sortierten Teilchen.
+    """
+
+    def __init__(self, start, end, mass, center_of_mass, size, leaf):
+        self.start = start
+        self.end = end
+        self.mass = mass
+        self.center_of_mass = center_of_mass
+        self.size = size
+        self.leaf = leaf
+        self.child_lo = None
+        self.child_hi = None
+
+class Octree:
+    """
+    Octree über eine Teilchenmenge, der in jedem Zeitschritt neu aufgebaut wird.
+    Massen und Schwerpunkte der Knoten werden für die Monopol-Näherung vorberechnet.
+    """
+
+    def __init__(self, positions, masses, leaf_size=LEAF_SIZE, max_depth=MAX_DEPTH):
+        if not 1 <= max_depth <= 21:
+            raise ValueError("max_depth muss zwischen 1 und 21 liegen.")
+
+        count = positions.shape[0]
+        origin = positions.min(axis=0)
+        root_size = float((positions.max(axis=0) - origin).max())
+        if root_size == 0:
+            root_size = 1.0
+
+        # Teilchen quantisieren und nach Morton-Code sortieren, damit jeder Knoten ein zusammenhängender Bereich ist
+        cells = 1 << max_depth
+        grid = np.clip(((positions - origin) / root_size * cells).astype(np.int64), 0, cells - 1)
+        codes = _spread_bits(grid[:, 0]) | (_spread_bits(grid[:, 1]) << np.uint64(1)) | (_spread_bits(grid[:, 2]) << np.uint64(2))
+
+        self.order = np.argsort(codes, kind='stable')
+        self.positions = positions[self.order]
+        self.masses = masses[self.order]
+        codes = codes[self.order]
+        weighted_positions = self.masses[:, np.newaxis] * self.positions
+
+        self.levels = []
+        for depth in range(max_depth + 1):
+            keys = codes >> np.uint64(3 * (max_depth - depth))
+            start = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+            end = np.append(start[1:], count)
+
+            mass = np.add.reduceat(self.masses, start)
+            weighted = np.add.reduceat(weighted_positions, start, axis=0)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                center_of_mass = np.where(mass[:, np.newaxis] > 0, weighted / mass[:, np.newaxis], self.positions[start])
+
+            leaf = (end - start) <= leaf_size
+            if depth == max_depth:
+                leaf[:] = True
+
+            level = OctreeLevel(start, end, mass, center_of_mass, root_size / (1 << depth), leaf)
+            if self.levels:
+                parent = self.levels[-1]
+                parent.child_lo = np.searchsorted(start, parent.start)
+                parent.child_hi = np.searchsorted(start, parent.end)
+            self.levels.append(level)
+
+            if leaf.all():
+                break
+
+    def forces(self, constant, theta=DEFAULT_THETA, chunk_size=None):
+        """
+        Berechnet die anziehenden Kräfte F = k * m_i * m_j / r^2 mit der Barnes-Hut-Näherung.
+        Ein Knoten wird als Punktmasse behandelt, wenn Kantenlänge / Abstand < theta gilt
+        und das Teilchen selbst nicht im Knoten liegt. Blätter werden exakt summiert.
+        """
+        count = self.positions.shape[0]
+        if chunk_size is None:
+            chunk_size = PARTICLE_CHUNK
+
+        sorted_forces = np.zeros((count, 3))
+        theta_sq = theta * theta
+
+        for block_start in range(0, count, chunk_size):
+            block_stop = min(block_start + chunk_size, count)
+            block_len = block_stop - block_start
+            block_forces = np.zeros((block_len, 3))
+
+            # Aktive (Teilchen, Knoten)-Paare, beginnend mit der Wurzel
+            particle_idx = np.arange(block_start, block_stop)
+            node_idx = np.zeros(block_len, dtype=np.int64)
+
+            for level in self.levels:
+                if particle_idx.size == 0:
+                    break
+
+                diff = level.center_of_mass[node_idx] - self.positions[particle_idx]
+                dist_sq = np.einsum('ij,ij->i', diff, diff)
+                inside = (particle_idx >= level.start[node_idx]) & (particle_idx < level.end[node_idx])
+                far = ~inside & (level.size * level.size < theta_sq * dist_sq)
+
+                # Monopol-Beitrag ausreichend entfernter Knoten
+                if far.any():
+                    p = particle_idx[far]
+                    weights = constant * self.masses[p] * level.mass[node_idx[far]] / (dist_sq[far] * np.sqrt(dist_sq[far]))
+                    self._accumulate(block_forces, p - block_start, weights, diff[far], block_len)
+
+                # Nahe Blätter werden Teilchen für Teilchen summiert
+                near_leaf = ~far & level.leaf[node_idx]
+                if near_leaf.any():
+                    owner, other = expand_ranges(level.start[node_idx[near_leaf]], level.end[node_idx[near_leaf]])
+                    p = particle_idx[near_leaf][owner]
+                    pair_diff = self.positions[other] - self.positions[p]
+                    pair_dist_sq = np.einsum('ij,ij->i', pair_diff, pair_diff)
+                    with np.errstate(divide='ignore', invalid='ignore'):
+                        weights = np.where(pair_dist_sq > 0, constant * self.masses[p] * self.masses[other] / (pair_dist_sq * np.sqrt(pair_dist_sq)), 0.0)
+                    self._accumulate(block_forces, p - block_start, weights, pair_diff, block_len)
+
+                # Alle übrigen Knoten werden geöffnet und ihre Kinder auf der nächsten Ebene geprüft
+                opened = ~far & ~level.leaf[node_idx]
+                if not opened.any():
+                    break
+                owner, node_idx = expand_ranges(level.child_lo[node_idx[opened]], level.child_hi[node_idx[opened]])
+                particle_idx = particle_idx[opened][owner]
+
+            sorted_forces[block_start:block_stop] = block_forces
+
+        forces = np.empty_like(sorted_forces)
+        forces[self.order] = sorted_forces
+        return forces
+
+    @staticmethod
+    def _accumulate(block_forces, local_idx, weights, diff, block_len):
+        """
+        Addiert weights * diff komponentenweise auf die Kräfte der Teilchen local_idx.
+        """
+        for k in range(3):
+            block_forces[:, k] += np.bincount(local_idx, weights=weights * diff[:, k], minlength=block_len)
+
+def barnes_hut_forces(positions, masses, constant, theta=DEFAULT_THETA, leaf_size=LEAF_SIZE, chunk_size=None):
+    """
+    Baut den Octree für die aktuellen Positionen auf und berechnet die genäherten Kräfte.
+    """
+    if positions.shape[0] < 2:
+        return np.zeros((positions.shape[0], 3))
+    tree = Octree(positions, masses, leaf_size)
+    return tree.forces(constant, theta, chunk_size)
@@ -0,0 +1,179 @@
+import itertools
+import numpy as np
+from scripts.simulations.particle_system import expand_ranges, minimum_image
+
+# Standardwerte für den Cutoff-Modus
+PARTICLE_CHUNK = 8192  # Anzahl der Teilchen, deren Nachbarzellen gleichzeitig durchsucht werden
+DEFAULT_SKIN = 0.1  # Verlet-Puffer als Anteil des Cutoff-Radius
+
+BOUNDARIES = ('open', 'periodic')
+
+class CellGrid:
+    """
+    Gleichmäßiges Zellgitter über den Würfel [0, box_size)^3 mit Zellen der Kantenlänge >= radius.
+    Die Teilchen werden nach Zellen sortiert, sodass jede Zelle ein zusammenhängender Bereich ist.
+    """
+
+    def __init__(self, positions, box_size, radius, periodic=False):
+        self.cells_per_axis = max(1, int(box_size // radius))
+        self.cell_size = box_size / self.cells_per_axis
+        self.periodic = periodic
+        m = self.cells_per_axis
+
+        coords = np.floor(positions / self.cell_size).astype(np.int64)
+        if periodic:
+            coords %= m
+        else:
+            # Teilchen außerhalb des Würfels landen in den Randzellen; Nachbarschaften bleiben dabei erhalten
+            np.clip(coords, 0, m - 1, out=coords)
+        self.coords = coords
+
+        cell_ids = self._cell_ids(coords)
+        self.order = np.argsort(cell_ids, kind='stable')
+        counts = np.bincount(cell_ids, minlength=m ** 3)
+        self.cell_end = np.cumsum(counts)
+        self.cell_start = self.cell_end - counts
+
+    def _cell_ids(self, coords):
+        m = self.cells_per_axis
+        return (coords[:, 0] * m + coords[:, 1]) * m + coords[:, 2]
+
+    def neighbor_offsets(self):
+        """
+        Gibt die Zellversätze der Nachbarschaft zurück. Bei periodischen Gittern mit weniger als
+        drei Zellen pro Achse werden doppelte Nachbarzellen entfernt.
+        """
+        if self.periodic and self.cells_per_axis < 3:
+            axis = list(range(self.cells_per_axis))
+        else:
+            axis = [-1, 0, 1]
+        return list(itertools.product(axis, repeat=3))
+
+    def candidate_pairs(self, positions, radius, box_size, chunk_size=None):
+        """
+        Liefert blockweise alle Paare (i, j) mit i < j und Abstand < radius
+        zusammen mit den Verbindungsvektoren r_j - r_i und den Abstandsquadraten.
+        """
+        count = positions.shape[0]
+        if chunk_size is None:
+            chunk_size = PARTICLE_CHUNK
+        m = self.cells_per_axis
+        offsets = self.neighbor_offsets()
+        radius_sq = radius * radius
+
+        for start in range(0, count, chunk_size):
+            block = np.arange(start, min(start + chunk_size, count))
+            for offset in offsets:
+                neighbor = self.coords[block] + np.array(offset)
+                if self.periodic:
+                    neighbor %= m
+                    valid = block
+                else:
+                    inside = np.all((neighbor >= 0) & (neighbor < m), axis=1)
+                    neighbor = neighbor[inside]
+                    valid = block[inside]
+
+                cell_ids = self._cell_ids(neighbor)
+                owner, slot = expand_ranges(self.cell_start[cell_ids], self.cell_end[cell_ids])
+                i = valid[owner]
+                j = self.order[slot]
+
+                # Jedes ungeordnete Paar genau einmal auswerten (drittes Newtonsches Gesetz)
+                keep = j > i
+                i, j = i[keep], j[keep]
+
+                diff = positions[j] - positions[i]
+                if self.periodic:
+                    diff = minimum_image(diff, box_size)
+                dist_sq = np.einsum('ij,ij->i', diff, diff)
+                within = dist_sq < radius_sq
+                yield i[within], j[within], diff[within], dist_sq[within]
+
+def _check_cutoff(cutoff, box_size, periodic):
+    if cutoff <= 0:
+        raise ValueError("Der Cutoff-Radius muss positiv sein.")
+    if periodic and cutoff > box_size / 2:
+        raise ValueError("Bei periodischen Randbedingungen darf der Cutoff höchstens box_size / 2 betragen.")
+
+def _pair_forces(forces, i, j, diff, dist_sq, masses, constant):
+    """
+    Addiert die Paarkräfte F = k * m_i * m_j / r^2 auf beide Partner (actio = reactio).
+    """
+    count = forces.shape[0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weights = np.where(dist_sq > 0, constant * masses[i] * masses[j] / (dist_sq * np.sqrt(dist_sq)), 0.0)
+    for k in range(3):
+        component = weights * diff[:, k]
+        forces[:, k] += np.bincount(i, weights=component, minlength=count)
+        forces[:, k] -= np.bincount(j, weights=component, minlength=count)
+
+def cutoff_forces(positions, masses, constant, cutoff, box_size, periodic=False, chunk_size=None):
+    """
+    Berechnet die Kräfte aller Paare mit Abstand < cutoff über ein Zellgitter in O(N).
+    """
+    _check_cutoff(cutoff, box_size, periodic)
+    forces = np.zeros((positions.shape[0], 3))
+    grid = CellGrid(positions, box_size, cutoff, periodic)
+    for i, j, diff, dist_sq in grid.candidate_pairs(positions, cutoff, box_size, chunk_size):
+        _pair_forces(forces, i, j, diff, dist_sq, masses, constant)
+    return forces
+
+class NeighborList:
+    """
+    Verlet-Nachbarliste mit Pufferzone (skin), die über mehrere Zeitschritte wiederverwendet wird.
+    Sie wird erst neu aufgebaut, wenn sich ein Teilchen seit dem letzten Aufbau um mehr als skin / 2 bewegt hat.
+    """
+
+    def __init__(self, cutoff, box_size, skin=None, periodic=False):
+        if skin is None:
+            skin = DEFAULT_SKIN * cutoff
+        _check_cutoff(cutoff + skin, box_size, periodic)
+        self.cutoff = cutoff
+        self.box_size = box_size
+        self.skin = skin
+        self.periodic = periodic
+        self.pairs_i = None
+        self.pairs_j = None
+        self.reference_positions = None
+        self.rebuilds = 0
+
+    def needs_rebuild(self, positions):
+        if self.reference_positions is None or self.reference_positions.shape != positions.shape:
+            return True
+        displacement = positions - self.reference_positions
+        if self.periodic:
+            displacement = minimum_image(displacement, self.box_size)
+        max_sq = np.einsum('ij,ij->i', displacement, displacement).max(initial=0.0)
+        return max_sq > (self.skin / 2) ** 2
+
+    def build(self, positions):
+        radius = self.cutoff + self.skin
+        grid = CellGrid(positions, self.box_size, radius, self.periodic)
+        blocks = list(grid.candidate_pairs(positions, radius, self.box_size))
+        self.pairs_i = np.concatenate([b[0] for b in blocks]) if blocks else np.empty(0, dtype=np.int64)
+        self.pairs_j = np.concatenate([b[1] for b in blocks]) if blocks else np.empty(0, dtype=np.int64)
+        self.reference_positions = positions.copy()
+        self.rebuilds += 1
+
+    def forces(self, positions, masses, constant):
+        """
+        Berechnet die Cutoff-Kräfte über die gespeicherten Paare und baut die Liste bei Bedarf neu auf.
+        """
+        if self.needs_rebuild(positions):
+            self.build(positions)
+
+        diff = positions[self.pairs_j] - positions[self.pairs_i]
+        if self.periodic:
+            diff = minimum_image(diff, self.box_size)
+        dist_sq = np.einsum('ij,ij->i', diff, diff)
+        within = dist_sq < self.cutoff * self.cutoff
+
+        forces = np.zeros((positions.shape[0], 3))
+        _pair_forces(forces, self.pairs_i[within], self.pairs_j[within], diff[within], dist_sq[within], masses, constant)
+        return forces
+
+def wrap_positions(positions, box_size):
+    """
+    Bildet die Positionen bei periodischen Randbedingungen zurück in den Würfel [0, box_size)^3 ab.
+    """
+    np.mod(positions, box_size, out=positions)
@@ -0,0 +1,139 @@
+import os
+import numpy as np
+from scripts.storage.db_writer import get_writer, close_writers
+from scripts.storage.backends import open_storage, storage_name
+from scripts.funcs.metrics import timer
+from scripts.funcs.pacing import make_pacer
+from scripts.funcs.sim_logging import get_simulation_logger
+from scripts.storage.checkpoint import CHECKPOINT_INTERVAL, Checkpointer
+from scripts.storage.schema import INSERT_RESULTS, create_run, finish_run
+from scripts.simulations.force_kernels import DEFAULT_KERNELS, ForceModel, kernel_config
+from scripts.simulations.kernel_backends import kernel_backend_name
+from scripts.simulations.particle_system import ParticleSystem
+from scripts.simulations.strong_force_simulation import update_particle_positions
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(BASE_DIR, '..', '..', 'database', 'simulation_data.db')
+
+# Logging-Konfiguration (Level und Sampling je Simulation über scripts.funcs.sim_logging.configure_logging)
+logger = get_simulation_logger('coupled')
+
+# Konstanten
+PARTICLE_COUNT = 50  # Anzahl der Teilchen in der Simulation
+BOX_SIZE = 10.0  # Größe des Simulationsbereichs (willkürlicher Würfel in Einheiten)
+MASS_RANGE = (1.0, 10.0)  # Bereich der zufälligen Massen
+CHARGE_RANGE = (-1e-5, 1e-5)  # Bereich der zufälligen Ladungen in C
+
+def initialize_particles(count=PARTICLE_COUNT, rng=None, box_size=BOX_SIZE, mass_range=MASS_RANGE, charge_range=CHARGE_RANGE):
+    """
+    Initialisiert ruhende Teilchen mit zufälligen Positionen, Massen und Ladungen.
+    """
+    return ParticleSystem.random(count, box_size, mass_range, rng, charge_range)
+
+def insert_coupled_data(time, particles, forces, storage):
+    """
+    Speichert Zustand und Betrag der Gesamtkraft je Teilchen über das Speicher-Backend des Laufs;
+    gibt zurück, ob die Ausgaberichtlinie den Zeitpunkt gespeichert hat.
+    """
+    return storage.append('coupled_data', {
+        'time': time,
+        'particle_id': particles.ids,
+        'position_x': particles.positions[:, 0],
+        'position_y': particles.positions[:, 1],
+        'position_z': particles.positions[:, 2],
+        'velocity_x': particles.velocities[:, 0],
+        'velocity_y': particles.velocities[:, 1],
+        'velocity_z': particles.velocities[:, 2],
+        'force': np.linalg.norm(forces, axis=1),
+    })
+
+def insert_results(db_path, run_id, time, forces, energy):
+    """
+    Speichert die mittlere Gesamtkraft (calculated_force) und die Gesamtenergie aller Kräfte (unified_theory)
+    eines Ausgabeschritts in der Tabelle results.
+    """
+    force = float(np.linalg.norm(forces, axis=1).mean()) if len(forces) else 0.0
+    get_writer(db_path).insert(INSERT_RESULTS, [(run_id, 'coupled_data', time, force, energy, len(forces))])
+
+def kinetic_energy(particles):
+    """
+    Kinetische Energie aller Teilchen.
+    """
+    return 0.5 * float(np.sum(particles.masses * np.einsum('ij,ij->i', particles.velocities, particles.velocities)))
+
+def run_coupled_simulation(particle_count=PARTICLE_COUNT, kernels=DEFAULT_KERNELS, chunk_size=None, pacing=None,
+                           resume=True, checkpoint_interval=CHECKPOINT_INTERVAL, db_path=DB_PATH, storage=None,
+                           output=None, total_time=3600 * 24, dt=60, seed=None, box_size=BOX_SIZE,
+                           charge_range=CHARGE_RANGE, kernel_backend=None):
+    """
+    Bewegt ein gemeinsames Teilchensystem mit Massen und Ladungen unter allen Kräften aus kernels zugleich
+    (Namen oder dicts, siehe scripts.simulations.force_kernels.FORCE_KERNELS). Je gespeichertem Zeitpunkt stehen
+    die Teilchen in coupled_data, mittlere Kraft und Gesamtenergie in results.
+    Übrige Argumente siehe Readme, Abschnitt Nutzung.
+    """
+    model = ForceModel(kernels, chunk_size)
+    kernel_backend = kernel_backend_name(kernel_backend)
+    names = ', '.join(kernel['kernel'] for kernel in model.kernels)
+    logger.info('Simulation startet. Gesamtdauer: %s Stunden, Zeitschritt: %s Sekunden, Teilchen: %d, Kräfte: %s.',
+                total_time / 3600, dt, particle_count, names)
+
+    checkpointer = Checkpointer(db_path, 'coupled', checkpoint_interval)
+    checkpoint = checkpointer.load() if resume else None
+    if checkpoint is not None:
+        particles = ParticleSystem.from_arrays(checkpoint.arrays)
+        step, current_time = checkpoint.step, checkpoint.time
+        logger.info('Simulation fortgesetzt bei Zeit %ss (Schritt %d, Teilchen: %d).', current_time, step, len(particles))
+    else:
+        particles = initialize_particles(particle_count, np.random.default_rng(seed), box_size, charge_range=charge_range)
+        step, current_time = 0, 0
+
+    run_id = checkpoint.run_id if checkpoint is not None else None
+    if run_id is None:
+        config = {'particle_count': particle_count, 'kernels': [kernel_config(kernel) for kernel in model.kernels],
+                  'total_time': total_time, 'dt': dt, 'seed': seed, 'box_size': box_size, 'charge_range': charge_range,
+                  'kernel_backend': kernel_backend}
+        run_id = create_run(db_path, 'coupled', config, storage_name(storage), output)
+    storage = open_storage(db_path, run_id, storage)
+    checkpointer.run_id, checkpointer.storage = run_id, storage
+    if checkpoint is not None:
+        # Nach dem Checkpoint geschriebene Zeilen und Ergebnisse verwerfen und die Ausgaberichtlinie fortsetzen
+        storage.resume('coupled_data', checkpoint)
+
+    def state():
+        return particles.arrays(), {}
+
+    pacer = make_pacer(pacing, dt)
+    try:
+        while current_time <= total_time:
+            # Alle Kräfte in einem Durchlauf berechnen und die Teilchen bewegen
+            with timer('step.forces'):
+                forces, potential = model.forces(particles)
+            with timer('step.integration'):
+                update_particle_positions(particles, forces, dt, kernel_backend)
+
+            with timer('step.storage'):
+                # results nur für Zeitpunkte, die auch in coupled_data stehen
+                if insert_coupled_data(current_time, particles, forces, storage):
+                    insert_results(db_path, run_id, current_time, forces, potential + kinetic_energy(particles))
+
+            step += 1
+            logger.sampled_debug(step, 'Daten für Zeitschritt %s gespeichert (potentielle Energie: %.3e).', current_time, potential)
+
+            # Zeit inkrementieren
+            current_time += dt
+            checkpointer.maybe_save(step, current_time, state)
+            pacer.wait()  # Simulationsgeschwindigkeit steuern
+
+        # Endzustand sichern, damit ein erneuter Start nicht von vorne beginnt
+        checkpointer.save(step, current_time, *state())
+        finish_run(db_path, run_id)
+    finally:
+        # Gepufferte Daten auch bei Abbruch schreiben
+        storage.close()
+        close_writers()
+
+    logger.info(pacer.summary())
+    logger.info("Gekoppelte Simulation abgeschlossen.")
+
+if __name__ == "__main__":
+    run_coupled_simulation()
@@ -1,26 +1,24 @@
-import sqlite3
-import time
-import math
+import argparse
 import logging
+import math
 import os
+import time
+import numpy as np
+from scripts.storage.db_writer import close_writers
+from scripts.storage.backends import open_storage, storage_name
+from scripts.funcs.metrics import timer
+from scripts.funcs.pacing import make_pacer
+from scripts.funcs.sim_logging import get_simulation_logger
+from scripts.storage.checkpoint import CHECKPOINT_INTERVAL, Checkpointer
+from scripts.storage.schema import create_run, finish_run
+from scripts.simulations.field_map import POINT_CHUNK, FieldGrid, compute_field_map, epsilon_0, mu_0
 
-# Logging-Konfiguration
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH = os.path.join(BASE_DIR, '..', '..', 'database', 'simulation_data.db')
-LOG_PATH = os.path.join(BASE_DIR, '..', '..', 'logs', 'simulations.log')
+FIELD_MAP_DIR = os.path.join(BASE_DIR, '..', '..', 'database', 'field_maps')
 
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(LOG_PATH),
-        logging.StreamHandler()
-    ]
-)
-
-# Konstanten (Beispielwerte)
-mu_0 = 4 * math.pi * 1e-7  # Magnetische Feldkonstante (H/m)
-epsilon_0 = 8.854e-12  # Elektrische Feldkonstante (F/m)
+# Logging-Konfiguration (Level und Sampling je Simulation über scripts.funcs.sim_logging.configure_logging)
+logger = get_simulation_logger('electromagnetic')
 
 # Beispiel-Parameter für elektromagnetische Felder
 charge_q = 1e-6  # Beispielhafte Ladung in Coulomb
@@ -31,12 +29,16 @@ electric_field_strength = 1000  # Beispiel für die elektrische Feldstärke in N
 position_charge = (0, 0, 0)  # Position der Ladung im Ursprung
 velocity_charge = (0, 0, 0)  # Geschwindigkeit der Ladung
 
+# Feldkarte: Gitter um die Ladung (Grenzen in Metern, Punkte je Achse)
+FIELD_MAP_LOWER = (-0.1, -0.1, -0.1)
+FIELD_MAP_UPPER = (0.1, 0.1, 0.1)
+FIELD_MAP_SHAPE = (64, 64, 64)
+
 def compute_electric_field(charge, distance):
     """
     Berechnet das elektrische Feld einer Punktladung.
     """
     E = (1 / (4 * math.pi * epsilon_0)) * (charge / distance**2)
-    logging.debug(f'Berechnetes elektrisches Feld: {E:.2e} N/C')
     return E
 
 def compute_magnetic_field(current, distance):
@@ -44,51 +46,120 @@ def compute_magnetic_field(current, distance):
     Berechnet das Magnetfeld um einen Draht mit Strom.
     """
     B = (mu_0 / (2 * math.pi)) * (current / distance)
-    logging.debug(f'Berechnetes Magnetfeld: {B:.2e} T')
     return B
 
-def insert_electromagnetic_data(time, electric_field, magnetic_field):
+def insert_electromagnetic_data(time, electric_field, magnetic_field, storage):
     """
-    Speichert die elektromagnetischen Felder in der Datenbank.
+    Speichert die elektromagnetischen Felder über das Speicher-Backend des Laufs.
     """
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    cursor.execute("""
-    INSERT INTO electromagnetic_data (time, electric_field, magnetic_field)
-    VALUES (?, ?, ?)
-    """, (time, electric_field, magnetic_field))
-
-    conn.commit()
-    conn.close()
-    logging.info(f'Daten für Zeit {time} gespeichert.')
+    storage.append('electromagnetic_data', {'time': time, 'electric_field': electric_field, 'magnetic_field': magnetic_field})
 
-def run_elec_simulation():
+def run_elec_simulation(pacing=None, resume=True, checkpoint_interval=CHECKPOINT_INTERVAL, db_path=DB_PATH, storage=None,
+                        output=None, total_time=3600 * 24, dt=60, charge=charge_q, distance=distance, current=1.0):
     """
     Führt die elektromagnetische Simulation durch und speichert die Ergebnisse.
+    charge (C), distance (m) und current (A) bestimmen die Felder der Punktladung bzw. des Drahts.
+    Übrige Argumente siehe Readme, Abschnitt Nutzung.
     """
-    total_time = 3600 * 24  # Simulation für 24 Stunden
-    dt = 60  # Zeitschritt in Sekunden
-
-    logging.info(f'Simulation startet. Gesamtdauer: {total_time / 3600} Stunden, Zeitschritt: {dt} Sekunden.')
+    logger.info('Simulation startet. Gesamtdauer: %s Stunden, Zeitschritt: %s Sekunden.', total_time / 3600, dt)
 
     current_time = 0
-    while current_time <= total_time:
-        # Berechne das elektrische Feld
-        electric_field = compute_electric_field(charge_q, distance)
+    step = 0
+    checkpointer = Checkpointer(db_path, 'electromagnetic', checkpoint_interval)
+    checkpoint = checkpointer.load() if resume else None
+    if checkpoint is not None:
+        step, current_time = checkpoint.step, checkpoint.time
+        logger.info('Simulation fortgesetzt bei Zeit %ss (Schritt %d).', current_time, step)
+
+    run_id = checkpoint.run_id if checkpoint is not None else None
+    if run_id is None:
+        config = {'total_time': total_time, 'dt': dt, 'charge': charge, 'distance': distance, 'current': current}
+        run_id = create_run(db_path, 'electromagnetic', config, storage_name(storage), output)
+    storage = open_storage(db_path, run_id, storage)
+    checkpointer.run_id, checkpointer.storage = run_id, storage
+    if checkpoint is not None:
+        # Nach dem Checkpoint geschriebene Zeilen verwerfen und die Ausgaberichtlinie fortsetzen
+        storage.resume('electromagnetic_data', checkpoint)
+
+    pacer = make_pacer(pacing, dt)
+    try:
+        while current_time <= total_time:
+            with timer('step.fields'):
+                # Berechne das elektrische Feld
+                electric_field = compute_electric_field(charge, distance)
+
+                # Berechne das Magnetfeld
+                magnetic_field = compute_magnetic_field(current, distance)
+
+            # Speichere die Ergebnisse in der Datenbank
+            with timer('step.storage'):
+                insert_electromagnetic_data(current_time, electric_field, magnetic_field, storage)
+
+            step += 1
+            logger.sampled_debug(step, 'Zeit %ss: elektrisches Feld %.2e N/C, Magnetfeld %.2e T gespeichert.',
+                                 current_time, electric_field, magnetic_field)
+
+            # Zeit inkrementieren
+            current_time += dt
+            checkpointer.maybe_save(step, current_time, lambda: ({}, {}))
+            pacer.wait()  # Simulationsgeschwindigkeit steuern
+
+        # Endzustand sichern, damit ein erneuter Start nicht von vorne beginnt
+        checkpointer.save(step, current_time, {}, {})
+        finish_run(db_path, run_id)
+    finally:
+        # Gepufferte Daten auch bei Abbruch schreiben
+        storage.close()
+        close_writers()
+
+    logger.info(pacer.summary())
+    logger.info("Elektromagnetische Simulation abgeschlossen.")
+
+def example_sources():
+    """
+    Quellen der Beispielkonfiguration: die Ladung charge_q im Ursprung und ein 2 m langer Draht
+    parallel zur z-Achse im Abstand distance, durch den 1 A fließt.
+    """
+    charges = ([position_charge], [charge_q])
+    segments = ([(0, -distance, -1)], [(0, -distance, 1)], [1.0])
+    return charges, segments
+
+def run_field_map(name='field_map', lower=FIELD_MAP_LOWER, upper=FIELD_MAP_UPPER, shape=FIELD_MAP_SHAPE,
+                  charges=None, segments=None, chunk_size=POINT_CHUNK, dtype=np.float64):
+    """
+    Feldkarten-Modus: berechnet E- und B-Vektoren mehrerer Punktladungen und Stromsegmente auf einem 3D-Gitter
+    und schreibt sie als speicherabgebildete Arrays nach FIELD_MAP_DIR/name (siehe scripts.simulations.field_map).
+    Ohne charges und segments werden die Quellen aus example_sources() verwendet.
+    """
+    if charges is None and segments is None:
+        charges, segments = example_sources()
+
+    grid = FieldGrid(lower, upper, shape)
+    out_dir = os.path.join(FIELD_MAP_DIR, name)
+    logger.info('Feldkarte startet. Gitter: %s (%d Punkte), Blockgröße: %d, Ziel: %s.', grid.shape, grid.size, chunk_size, out_dir)
 
-        # Berechne das Magnetfeld
-        current = 1  # Beispielhafter Stromwert (1 Ampere)
-        magnetic_field = compute_magnetic_field(current, distance)
+    start = time.monotonic()
+    chunks = 0
 
-        # Speichere die Ergebnisse in der Datenbank
-        insert_electromagnetic_data(current_time, electric_field, magnetic_field)
+    def progress(done, total):
+        nonlocal chunks
+        chunks += 1
+        logger.sampled(chunks, logging.INFO, 'Feldkarte: %d von %d Punkten berechnet.', done, total)
 
-        # Zeit inkrementieren
-        current_time += dt
-        time.sleep(0.1)  # Simulationsgeschwindigkeit steuern
+    e_map, b_map = compute_field_map(grid, out_dir, charges, segments, chunk_size, dtype, progress)
 
-    logging.info("Elektromagnetische Simulation abgeschlossen.")
+    elapsed = time.monotonic() - start
+    logger.info('Feldkarte abgeschlossen: %d Punkte in %.2f s (%.0f Punkte/s).',
+                grid.size, elapsed, grid.size / elapsed if elapsed > 0 else 0.0)
+    return e_map, b_map
 
 if __name__ == "__main__":
-    run_elec_simulation()
+    parser = argparse.ArgumentParser(description="Elektromagnetische Simulation bzw. Feldkarte.")
+    parser.add_argument('--field-map', action='store_true', help="Feldkarte auf einem 3D-Gitter berechnen")
+    parser.add_argument('--shape', type=int, nargs=3, default=FIELD_MAP_SHAPE, help="Gitterpunkte je Achse")
+    args = parser.parse_args()
+
+    if args.field_map:
+        run_field_map(shape=args.shape)
+    else:
+        run_elec_simulation()
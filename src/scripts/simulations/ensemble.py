@@ -0,0 +1,352 @@
+import math
+import numpy as np
+from scripts.storage.db_writer import get_writer, close_writers
+from scripts.storage.backends import open_storage, storage_name
+from scripts.funcs.metrics import timer
+from scripts.funcs.pacing import make_pacer
+from scripts.funcs.sim_logging import get_simulation_logger
+from scripts.simulations.gravity_simulation import DB_PATH, G, INTEGRATOR, M1, M2, R0, initialize_bodies, velocity_moon
+from scripts.simulations.nbody import _YOSHIDA_C, _YOSHIDA_D
+from scripts.simulations.particle_system import PAIR_BUDGET
+from scripts.storage.checkpoint import CHECKPOINT_INTERVAL, Checkpointer
+from scripts.storage.schema import create_run, finish_run
+
+logger = get_simulation_logger('gravity_ensemble')
+
+# Integratoren mit fester Schrittweite, die alle Systeme eines Bündels im Gleichschritt integrieren
+# ('rk45' wählt die Schrittweite je System und passt daher nicht in einen gemeinsamen Schritt)
+BATCH_INTEGRATORS = ('euler', 'leapfrog', 'yoshida4')
+
+# Status je System; nur 'running' wird weiterintegriert
+STATUSES = ('running', 'finished', 'diverged', 'collided', 'escaped')
+RUNNING, FINISHED, DIVERGED, COLLIDED, ESCAPED = range(len(STATUSES))
+
+ENSEMBLE_SIZE = 1000  # Anzahl der Erde-Mond-Systeme eines Bündels
+VELOCITY_JITTER = 0.01  # Standardabweichung der Störung der Mondgeschwindigkeit relativ zu ihrem Betrag
+MAX_ENERGY_DRIFT = 1e-3  # Relative Energiedrift, ab der ein System als divergiert gilt
+COLLISION_DISTANCE = 6.371e6 + 1.737e6  # Summe der Radien von Erde und Mond in m
+ESCAPE_DISTANCE = 10 * R0  # Abstand vom Schwerpunkt, ab dem ein Körper als entwichen gilt
+
+def batched_accelerations(positions, masses, constant=G, pair_budget=PAIR_BUDGET):
+    """
+    Beschleunigungen aller Körper von B unabhängigen Systemen in einem Durchlauf.
+    positions hat die Form (B, N, 3), masses die Form (B, N); Körper verschiedener Systeme wirken nicht aufeinander.
+    Die Systeme werden in Blöcken mit höchstens pair_budget Paaren ausgewertet, damit der Speicherbedarf begrenzt bleibt.
+    """
+    count, bodies = masses.shape
+    block = max(1, pair_budget // max(bodies * bodies, 1))
+    accelerations = np.empty(positions.shape)
+    for start in range(0, count, block):
+        x, m = positions[start:start + block], masses[start:start + block]
+        # Verbindungsvektoren r_j - r_i je System, Form (b, N, N, 3)
+        diff = x[:, np.newaxis, :, :] - x[:, :, np.newaxis, :]
+        dist_sq = np.einsum('bijk,bijk->bij', diff, diff)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weights = m[:, np.newaxis, :] / (dist_sq * np.sqrt(dist_sq))
+        weights[dist_sq == 0] = 0.0
+        accelerations[start:start + block] = constant * np.einsum('bij,bijk->bik', weights, diff)
+    return accelerations
+
+def batched_energy(positions, velocities, masses, constant=G):
+    """
+    Gesamtenergie (kinetisch + potentiell) je System als Array der Form (B,).
+    """
+    kinetic = 0.5 * np.einsum('bi,bik,bik->b', masses, velocities, velocities)
+    i, j = np.triu_indices(masses.shape[1], 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        distances = np.linalg.norm(positions[:, j] - positions[:, i], axis=2)
+        potential = -constant * np.sum(masses[:, i] * masses[:, j] / distances, axis=1)
+    return kinetic + potential
+
+def batched_angular_momentum(positions, velocities, masses):
+    """
+    Gesamtdrehimpuls L = sum(m * r x v) je System als Array der Form (B, 3).
+    """
+    return np.einsum('bi,bik->bk', masses, np.cross(positions, velocities))
+
+class BatchedGravityEngine:
+    """
+    Integriert B unabhängige N-Körper-Systeme mit gemeinsamer Schrittweite: Zustände liegen als (B, N, 3)-Arrays vor,
+    und jeder Schritt berechnet die Beschleunigungen aller noch laufenden Systeme in einem vektorisierten Durchlauf.
+    Beendete, divergierte, kollidierte oder entwichene Systeme werden maskiert und nicht weiter integriert.
+    """
+
+    def __init__(self, positions, velocities, masses, integrator='leapfrog', constant=G, max_step=None):
+        if integrator not in BATCH_INTEGRATORS:
+            raise ValueError(f"Integrator {integrator} wird gebündelt nicht unterstützt (erwartet: {', '.join(BATCH_INTEGRATORS)}).")
+        self.positions = np.array(positions, dtype=np.float64)
+        self.velocities = np.array(velocities, dtype=np.float64)
+        self.masses = np.array(masses, dtype=np.float64)
+        if self.positions.ndim != 3 or self.positions.shape[2] != 3 or self.velocities.shape != self.positions.shape \
+                or self.masses.shape != self.positions.shape[:2]:
+            raise ValueError("positions und velocities benötigen die Form (B, N, 3), masses die Form (B, N).")
+        self.integrator = integrator
+        self.constant = constant
+        self.max_step = max_step
+
+        count = len(self.positions)
+        self.status = np.full(count, RUNNING, dtype=np.int64)
+        self.end_time = np.full(count, np.nan)
+        self.steps = np.zeros(count, dtype=np.int64)  # Interne Integrationsschritte je System
+        self._acceleration = None  # Beschleunigung am Schrittende (leapfrog), für alle Systeme
+
+        self.initial_energy = batched_energy(self.positions, self.velocities, self.masses, constant)
+        self.initial_angular_momentum = batched_angular_momentum(self.positions, self.velocities, self.masses)
+        self.max_energy_drift = np.zeros(count)
+        self.max_angular_momentum_drift = np.zeros(count)
+
+    def __len__(self):
+        return len(self.positions)
+
+    @property
+    def active(self):
+        """
+        Indizes der noch laufenden Systeme.
+        """
+        return np.flatnonzero(self.status == RUNNING)
+
+    def accelerations(self, positions, masses):
+        return batched_accelerations(positions, masses, self.constant)
+
+    def advance(self, dt):
+        """
+        Integriert alle laufenden Systeme um dt weiter (in Schritten von höchstens max_step) und gibt ihre Indizes zurück.
+        """
+        index = self.active
+        if len(index) == 0:
+            return index
+        substeps = 1 if self.max_step is None else max(1, math.ceil(dt / self.max_step))
+        h = dt / substeps
+
+        # Nur die laufenden Systeme herauskopieren, damit maskierte Systeme keine Rechenzeit kosten
+        x, v, m = self.positions[index], self.velocities[index], self.masses[index]
+        if self.integrator == 'leapfrog':
+            if self._acceleration is None:
+                self._acceleration = self.accelerations(self.positions, self.masses)
+            a = self._acceleration[index]
+            for _ in range(substeps):
+                # Kick-Drift-Kick; die Beschleunigung am Schrittende wird für den nächsten Schritt wiederverwendet
+                v += 0.5 * h * a
+                x += h * v
+                a = self.accelerations(x, m)
+                v += 0.5 * h * a
+            self._acceleration[index] = a
+        elif self.integrator == 'yoshida4':
+            for _ in range(substeps):
+                for c, d in zip(_YOSHIDA_C, _YOSHIDA_D):
+                    x += c * h * v
+                    v += d * h * self.accelerations(x, m)
+                x += _YOSHIDA_C[-1] * h * v
+        else:
+            for _ in range(substeps):
+                v += self.accelerations(x, m) * h
+                x += v * h
+
+        self.positions[index], self.velocities[index] = x, v
+        self.steps[index] += substeps
+        return index
+
+    def check(self, time, max_energy_drift=MAX_ENERGY_DRIFT, collision_distance=COLLISION_DISTANCE,
+              escape_distance=ESCAPE_DISTANCE):
+        """
+        Aktualisiert die Drift der laufenden Systeme und maskiert Systeme mit nicht endlichen Werten oder einer
+        Energiedrift über max_energy_drift ('diverged'), mit zwei Körpern näher als collision_distance ('collided')
+        oder einem Körper weiter als escape_distance vom Schwerpunkt ('escaped'). Gibt die neu maskierten Indizes zurück.
+        """
+        index = self.active
+        if len(index) == 0:
+            return index
+        x, v, m = self.positions[index], self.velocities[index], self.masses[index]
+
+        with np.errstate(invalid='ignore'):
+            energy = batched_energy(x, v, m, self.constant)
+            reference = np.abs(self.initial_energy[index])
+            energy_drift = np.where(reference > 0, np.abs(energy - self.initial_energy[index]) / np.where(reference > 0, reference, 1.0), 0.0)
+            reference = np.linalg.norm(self.initial_angular_momentum[index], axis=1)
+            difference = np.linalg.norm(batched_angular_momentum(x, v, m) - self.initial_angular_momentum[index], axis=1)
+            angular_momentum_drift = np.where(reference > 0, difference / np.where(reference > 0, reference, 1.0), difference)
+        self.max_energy_drift[index] = np.fmax(self.max_energy_drift[index], energy_drift)
+        self.max_angular_momentum_drift[index] = np.fmax(self.max_angular_momentum_drift[index], angular_momentum_drift)
+
+        i, j = np.triu_indices(x.shape[1], 1)
+        closest = np.linalg.norm(x[:, j] - x[:, i], axis=2).min(axis=1) if len(i) else np.full(len(index), np.inf)
+        center = np.einsum('bi,bik->bk', m, x) / m.sum(axis=1)[:, np.newaxis]
+        farthest = np.linalg.norm(x - center[:, np.newaxis, :], axis=2).max(axis=1)
+
+        finite = np.isfinite(x).all(axis=(1, 2)) & np.isfinite(v).all(axis=(1, 2))
+        status = np.full(len(index), RUNNING)
+        # Spätere Zuweisungen haben Vorrang: eine nahe Begegnung erzeugt Drift, soll aber als Kollision gelten
+        with np.errstate(invalid='ignore'):
+            status[~(energy_drift <= max_energy_drift)] = DIVERGED
+            status[farthest > escape_distance] = ESCAPED
+            status[closest < collision_distance] = COLLIDED
+        status[~finite] = DIVERGED
+
+        stopped = index[status != RUNNING]
+        self.status[index] = status
+        self.end_time[stopped] = time
+        return stopped
+
+    def finish(self, time):
+        """
+        Markiert alle noch laufenden Systeme als regulär beendet.
+        """
+        index = self.active
+        self.status[index] = FINISHED
+        self.end_time[index] = time
+
+    def results(self):
+        """
+        Ergebnis je System als Liste von (system, status, end_time, steps, energy_drift, angular_momentum_drift).
+        """
+        return [(system, STATUSES[status], float(end_time), int(steps), float(energy_drift), float(angular_momentum_drift))
+                for system, (status, end_time, steps, energy_drift, angular_momentum_drift)
+                in enumerate(zip(self.status, self.end_time, self.steps, self.max_energy_drift, self.max_angular_momentum_drift))]
+
+    def arrays(self):
+        """
+        Zustand aller Systeme als dict von Arrays (z. B. für Checkpoints).
+        """
+        arrays = {'positions': self.positions, 'velocities': self.velocities, 'masses': self.masses,
+                  'status': self.status, 'end_time': self.end_time, 'steps': self.steps,
+                  'initial_energy': self.initial_energy, 'initial_angular_momentum': self.initial_angular_momentum,
+                  'max_energy_drift': self.max_energy_drift, 'max_angular_momentum_drift': self.max_angular_momentum_drift}
+        if self._acceleration is not None:
+            arrays['acceleration'] = self._acceleration
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, integrator='leapfrog', constant=G, max_step=None):
+        engine = cls(arrays['positions'], arrays['velocities'], arrays['masses'], integrator, constant, max_step)
+        for name in ('status', 'end_time', 'steps', 'initial_energy', 'initial_angular_momentum',
+                     'max_energy_drift', 'max_angular_momentum_drift'):
+            setattr(engine, name, np.array(arrays[name]))
+        if 'acceleration' in arrays and integrator == 'leapfrog':
+            engine._acceleration = np.array(arrays['acceleration'])
+        return engine
+
+def initialize_ensemble(count=ENSEMBLE_SIZE, rng=None, velocity_jitter=VELOCITY_JITTER, masses=(M1, M2),
+                        separation=R0, moon_velocity=velocity_moon):
+    """
+    Erzeugt count Erde-Mond-Systeme als (positions, velocities, masses) mit den Formen (B, 2, 3) bzw. (B, 2).
+    Die Mondgeschwindigkeit jedes Systems wird normalverteilt um velocity_jitter * |moon_velocity| gestört.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    bodies = initialize_bodies(masses, separation, moon_velocity)
+    positions = np.repeat(bodies.positions[np.newaxis], count, axis=0)
+    velocities = np.repeat(bodies.velocities[np.newaxis], count, axis=0)
+    velocities[:, 1] += velocity_jitter * np.linalg.norm(bodies.velocities[1]) * rng.standard_normal((count, 3))
+    return positions, velocities, np.repeat(bodies.masses[np.newaxis], count, axis=0)
+
+def insert_ensemble_data(time, engine, index, storage):
+    """
+    Speichert den Zustand der Systeme index mit einem einzigen append über das Speicher-Backend des Laufs.
+    """
+    bodies = engine.positions.shape[1]
+    positions = engine.positions[index].reshape(-1, 3)
+    velocities = engine.velocities[index].reshape(-1, 3)
+    system = np.repeat(index, bodies)
+    body = np.tile(np.arange(bodies), len(index))
+    storage.append('ensemble_data', {
+        'time': time,
+        'particle_id': system * bodies + body,
+        'system': system,
+        'body': body,
+        'position_x': positions[:, 0],
+        'position_y': positions[:, 1],
+        'position_z': positions[:, 2],
+        'velocity_x': velocities[:, 0],
+        'velocity_y': velocities[:, 1],
+        'velocity_z': velocities[:, 2],
+    })
+
+def insert_system_results(db_path, run_id, engine):
+    """
+    Schreibt das Ergebnis aller Systeme gebündelt in die Tabelle ensemble_systems.
+    """
+    get_writer(db_path).insert("""
+    INSERT OR REPLACE INTO ensemble_systems (run_id, system, status, end_time, steps, energy_drift, angular_momentum_drift)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, [(run_id,) + row for row in engine.results()])
+
+def run_ensemble_simulation(count=ENSEMBLE_SIZE, systems=None, seed=None, velocity_jitter=VELOCITY_JITTER, pacing=None,
+                            integrator=INTEGRATOR, total_time=3600 * 24, dt=60, max_step=None,
+                            max_energy_drift=MAX_ENERGY_DRIFT, collision_distance=COLLISION_DISTANCE,
+                            escape_distance=ESCAPE_DISTANCE, resume=True, checkpoint_interval=CHECKPOINT_INTERVAL,
+                            db_path=DB_PATH, storage=None, output=None):
+    """
+    Integriert ein Bündel unabhängiger Gravitationssysteme gemeinsam; ohne systems werden count Erde-Mond-Systeme
+    mit gestörter Mondgeschwindigkeit erzeugt (systems sonst als dict mit positions, velocities und masses).
+    Divergierende, kollidierende oder entweichende Systeme werden maskiert (siehe BatchedGravityEngine.check).
+    Übrige Argumente siehe Readme, Abschnitt Nutzung.
+    """
+    logger.info('Simulation startet. Gesamtdauer: %s Stunden, Zeitschritt: %s Sekunden, Integrator: %s.', total_time / 3600, dt, integrator)
+
+    checkpointer = Checkpointer(db_path, 'gravity_ensemble', checkpoint_interval)
+    checkpoint = checkpointer.load() if resume else None
+    if checkpoint is not None:
+        engine = BatchedGravityEngine.from_arrays(checkpoint.arrays, integrator, G, max_step)
+        output_steps, current_time = checkpoint.step, checkpoint.time
+        logger.info('Simulation fortgesetzt bei Zeit %ss (Schritt %d, laufende Systeme: %d).', current_time, output_steps, len(engine.active))
+    else:
+        if systems is None:
+            systems = initialize_ensemble(count, np.random.default_rng(seed), velocity_jitter)
+        elif isinstance(systems, dict):
+            systems = (systems['positions'], systems['velocities'], systems['masses'])
+        engine = BatchedGravityEngine(*systems, integrator, G, max_step)
+        output_steps, current_time = 0, 0
+
+    run_id = checkpoint.run_id if checkpoint is not None else None
+    if run_id is None:
+        config = {'systems': len(engine), 'bodies': engine.positions.shape[1], 'seed': seed, 'velocity_jitter': velocity_jitter,
+                  'integrator': integrator, 'total_time': total_time, 'dt': dt, 'max_step': max_step,
+                  'max_energy_drift': max_energy_drift, 'collision_distance': collision_distance, 'escape_distance': escape_distance}
+        run_id = create_run(db_path, 'gravity_ensemble', config, storage_name(storage), output)
+    storage = open_storage(db_path, run_id, storage)
+    checkpointer.run_id, checkpointer.storage = run_id, storage
+    if checkpoint is not None:
+        # Nach dem Checkpoint geschriebene Zeilen verwerfen und die Ausgaberichtlinie fortsetzen
+        storage.resume('ensemble_data', checkpoint)
+
+    def state():
+        return engine.arrays(), {}
+
+    pacer = make_pacer(pacing, dt)
+    try:
+        while current_time <= total_time and len(engine.active):
+            # Alle laufenden Systeme in einem vektorisierten Durchlauf weiterintegrieren
+            with timer('step.integration'):
+                index = engine.advance(dt)
+            with timer('step.storage'):
+                insert_ensemble_data(current_time, engine, index, storage)
+
+            # Divergierte, kollidierte und entwichene Systeme maskieren
+            stopped = engine.check(current_time, max_energy_drift, collision_distance, escape_distance)
+            if len(stopped):
+                logger.debug('%d Systeme bei Zeit %s maskiert.', len(stopped), current_time)
+
+            output_steps += 1
+            logger.sampled_debug(output_steps, 'Daten für Zeit %s gespeichert (laufende Systeme: %d).', current_time, len(index) - len(stopped))
+
+            current_time += dt
+            checkpointer.maybe_save(output_steps, current_time, state)
+            pacer.wait()  # Simulationsgeschwindigkeit steuern
+
+        engine.finish(current_time - dt)
+        insert_system_results(db_path, run_id, engine)
+        # Endzustand sichern, damit ein erneuter Start nicht von vorne beginnt
+        checkpointer.save(output_steps, current_time, *state())
+        finish_run(db_path, run_id)
+    finally:
+        # Gepufferte Daten auch bei Abbruch schreiben
+        storage.close()
+        close_writers()
+
+    counts = np.bincount(engine.status, minlength=len(STATUSES))
+    logger.info('Systeme: %s', ', '.join(f'{name}: {counts[status]}' for status, name in enumerate(STATUSES) if status != RUNNING))
+    logger.info(pacer.summary())
+    logger.info("Gebündelte Gravitationssimulation abgeschlossen.")
+
+if __name__ == "__main__":
+    run_ensemble_simulation()
@@ -0,0 +1,136 @@
+import json
+import math
+import os
+import numpy as np
+from scripts.simulations.particle_system import PAIR_BUDGET
+
+mu_0 = 4 * math.pi * 1e-7  # Magnetische Feldkonstante (H/m)
+epsilon_0 = 8.854e-12  # Elektrische Feldkonstante (F/m)
+COULOMB_CONSTANT = 1 / (4 * math.pi * epsilon_0)
+BIOT_SAVART_CONSTANT = mu_0 / (4 * math.pi)
+
+POINT_CHUNK = 1 << 16  # Gitterpunkte pro Block; bestimmt den Arbeitsspeicher unabhängig von der Gittergröße
+
+class FieldGrid:
+    """
+    Regelmäßiges 3D-Gitter zwischen lower und upper (jeweils inklusive) mit shape = (nx, ny, nz) Punkten.
+    Die Punkte sind in C-Reihenfolge nummeriert und werden nur blockweise erzeugt.
+    """
+
+    def __init__(self, lower, upper, shape):
+        self.lower = np.asarray(lower, dtype=np.float64).reshape(3)
+        self.upper = np.asarray(upper, dtype=np.float64).reshape(3)
+        self.shape = tuple(int(n) for n in shape)
+        if len(self.shape) != 3 or min(self.shape) < 1:
+            raise ValueError("shape muss drei positive Punktanzahlen enthalten.")
+        self.axes = [np.linspace(lo, hi, n) for lo, hi, n in zip(self.lower, self.upper, self.shape)]
+
+    @property
+    def size(self):
+        return self.shape[0] * self.shape[1] * self.shape[2]
+
+    def points(self, start, stop):
+        """
+        Gibt die Koordinaten der Gitterpunkte mit den flachen Indizes [start, stop) als (M, 3)-Array zurück.
+        """
+        i, j, k = np.unravel_index(np.arange(start, stop), self.shape)
+        return np.stack([self.axes[0][i], self.axes[1][j], self.axes[2][k]], axis=1)
+
+    def to_dict(self):
+        return {'lower': self.lower.tolist(), 'upper': self.upper.tolist(), 'shape': list(self.shape)}
+
+def _source_block(points, count):
+    return max(1, min(count, PAIR_BUDGET // max(len(points), 1)))
+
+def electric_field(points, positions, charges, constant=COULOMB_CONSTANT):
+    """
+    Überlagert die elektrischen Felder E = k * q * r / |r|^3 aller Punktladungen an den Punkten points.
+    Punkte, die genau auf einer Ladung liegen, erhalten von dieser Ladung keinen Beitrag.
+    """
+    positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+    charges = np.asarray(charges, dtype=np.float64).reshape(-1)
+    field = np.zeros((len(points), 3))
+    block = _source_block(points, len(charges))
+
+    for lo in range(0, len(charges), block):
+        hi = lo + block
+        dx = points[:, 0, np.newaxis] - positions[lo:hi, 0]
+        dy = points[:, 1, np.newaxis] - positions[lo:hi, 1]
+        dz = points[:, 2, np.newaxis] - positions[lo:hi, 2]
+        dist_sq = dx * dx + dy * dy + dz * dz
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weights = np.where(dist_sq > 0, charges[lo:hi] / (dist_sq * np.sqrt(dist_sq)), 0.0)
+        field[:, 0] += np.sum(weights * dx, axis=1)
+        field[:, 1] += np.sum(weights * dy, axis=1)
+        field[:, 2] += np.sum(weights * dz, axis=1)
+
+    return constant * field
+
+def magnetic_field(points, starts, ends, currents, constant=BIOT_SAVART_CONSTANT):
+    """
+    Überlagert die Magnetfelder gerader Stromsegmente (Strom von starts nach ends) nach Biot-Savart.
+    Verwendet die geschlossene Lösung für endliche Segmente:
+    B = k * I * (r1 x r2) * (|r1| + |r2|) / (|r1| |r2| (|r1| |r2| + r1 . r2)) mit r1 = p - start, r2 = p - end.
+    Punkte auf der Verlängerung eines Segments erhalten von diesem keinen Beitrag.
+    """
+    starts = np.asarray(starts, dtype=np.float64).reshape(-1, 3)
+    ends = np.asarray(ends, dtype=np.float64).reshape(-1, 3)
+    currents = np.asarray(currents, dtype=np.float64).reshape(-1)
+    field = np.zeros((len(points), 3))
+    block = _source_block(points, len(currents))
+
+    for lo in range(0, len(currents), block):
+        hi = lo + block
+        r1 = [points[:, axis, np.newaxis] - starts[lo:hi, axis] for axis in range(3)]
+        r2 = [points[:, axis, np.newaxis] - ends[lo:hi, axis] for axis in range(3)]
+        len1 = np.sqrt(r1[0] * r1[0] + r1[1] * r1[1] + r1[2] * r1[2])
+        len2 = np.sqrt(r2[0] * r2[0] + r2[1] * r2[1] + r2[2] * r2[2])
+        dot = r1[0] * r2[0] + r1[1] * r2[1] + r1[2] * r2[2]
+        denominator = len1 * len2 * (len1 * len2 + dot)
+        # Auf der Segmentachse verschwindet das Kreuzprodukt; der Nenner ist dort (numerisch) null
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weights = np.where(denominator > 0, currents[lo:hi] * (len1 + len2) / denominator, 0.0)
+        field[:, 0] += np.sum(weights * (r1[1] * r2[2] - r1[2] * r2[1]), axis=1)
+        field[:, 1] += np.sum(weights * (r1[2] * r2[0] - r1[0] * r2[2]), axis=1)
+        field[:, 2] += np.sum(weights * (r1[0] * r2[1] - r1[1] * r2[0]), axis=1)
+
+    return constant * field
+
+def compute_field_map(grid, out_dir, charges=None, segments=None, chunk_size=POINT_CHUNK, dtype=np.float64, progress=None):
+    """
+    Berechnet E- und B-Vektoren auf allen Punkten von grid und schreibt sie blockweise in die
+    speicherabgebildeten Dateien E.npy und B.npy (Form grid.shape + (3,)) in out_dir.
+    charges = (positions, charges), segments = (starts, ends, currents). Der Arbeitsspeicher hängt nur
+    von chunk_size ab, sodass auch Gitter mit Hunderten Millionen Punkten möglich sind.
+    progress(done, total) wird nach jedem Block aufgerufen.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    e_map = np.lib.format.open_memmap(os.path.join(out_dir, 'E.npy'), mode='w+', dtype=dtype, shape=grid.shape + (3,))
+    b_map = np.lib.format.open_memmap(os.path.join(out_dir, 'B.npy'), mode='w+', dtype=dtype, shape=grid.shape + (3,))
+    e_flat = e_map.reshape(-1, 3)
+    b_flat = b_map.reshape(-1, 3)
+
+    for start in range(0, grid.size, chunk_size):
+        stop = min(start + chunk_size, grid.size)
+        points = grid.points(start, stop)
+        e_flat[start:stop] = electric_field(points, *charges) if charges is not None else 0.0
+        b_flat[start:stop] = magnetic_field(points, *segments) if segments is not None else 0.0
+        if progress is not None:
+            progress(stop, grid.size)
+
+    e_map.flush()
+    b_map.flush()
+    with open(os.path.join(out_dir, 'grid.json'), 'w') as f:
+        json.dump(grid.to_dict(), f)
+    return e_map, b_map
+
+def load_field_map(out_dir, mode='r'):
+    """
+    Öffnet eine gespeicherte Feldkarte ohne sie in den Arbeitsspeicher zu laden.
+    Gibt (grid, E, B) zurück; E und B sind memmaps der Form grid.shape + (3,).
+    """
+    with open(os.path.join(out_dir, 'grid.json')) as f:
+        grid = FieldGrid(**json.load(f))
+    e_map = np.load(os.path.join(out_dir, 'E.npy'), mmap_mode=mode)
+    b_map = np.load(os.path.join(out_dir, 'B.npy'), mmap_mode=mode)
+    return grid, e_map, b_map
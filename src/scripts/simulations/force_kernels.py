@@ -0,0 +1,136 @@
+import numpy as np
+from scripts.simulations.field_map import COULOMB_CONSTANT
+from scripts.simulations.nbody import G
+from scripts.simulations.particle_system import default_chunk_size
+from scripts.simulations.strong_force_simulation import STRONG_FORCE_CONSTANT
+
+# Paarkräfte der Form F_ij = constant * a_i * b_j * (r_j - r_i) / |r_j - r_i|^3 mit den Teilcheneigenschaften a und b
+# (masses oder charges). Ein positiver Wert zieht an, ein negativer stößt ab; cutoff begrenzt die Reichweite.
+# Feldkräfte wirken je Teilchen (Lorentzkraft F = q (E + v x B) in äußeren Feldern).
+PAIR_ATTRIBUTES = ('masses', 'charges')
+
+def gravity_kernel(constant=G):
+    """
+    Gravitation F = G * m_i * m_j / r^2 (anziehend).
+    """
+    return {'kernel': 'gravity', 'kind': 'pair', 'constant': float(constant), 'attribute': 'masses', 'cutoff': None}
+
+def coulomb_kernel(constant=COULOMB_CONSTANT):
+    """
+    Coulombkraft F = k * q_i * q_j / r^2 (gleichnamige Ladungen stoßen sich ab).
+    """
+    return {'kernel': 'coulomb', 'kind': 'pair', 'constant': -float(constant), 'attribute': 'charges', 'cutoff': None}
+
+def strong_kernel(constant=STRONG_FORCE_CONSTANT, cutoff=None):
+    """
+    Starke Wechselwirkung wie in compute_strong_force: F = k * m_i * m_j / r^2, mit cutoff nur für r < cutoff.
+    """
+    return {'kernel': 'strong', 'kind': 'pair', 'constant': float(constant), 'attribute': 'masses',
+            'cutoff': None if cutoff is None else float(cutoff)}
+
+def lorentz_kernel(electric=(0.0, 0.0, 0.0), magnetic=(0.0, 0.0, 0.0)):
+    """
+    Lorentzkraft F = q * (E + v x B) in homogenen äußeren Feldern E (V/m) und B (T).
+    """
+    return {'kernel': 'lorentz', 'kind': 'field', 'electric': np.asarray(electric, dtype=np.float64).reshape(3),
+            'magnetic': np.asarray(magnetic, dtype=np.float64).reshape(3)}
+
+# Verfügbare Kraftkerne: Name -> Funktion, die den Kern aus Schlüsselwortargumenten erzeugt
+FORCE_KERNELS = {
+    'gravity': gravity_kernel,
+    'coulomb': coulomb_kernel,
+    'strong': strong_kernel,
+    'lorentz': lorentz_kernel,
+}
+DEFAULT_KERNELS = ('gravity', 'coulomb', 'strong')
+
+def make_kernel(spec):
+    """
+    Erzeugt einen Kraftkern aus einem Namen (z. B. 'coulomb') oder einem dict wie {'kernel': 'strong', 'cutoff': 2.0}.
+    """
+    if isinstance(spec, str):
+        spec = {'kernel': spec}
+    if 'kind' in spec:
+        return spec  # Bereits erzeugter Kern
+    options = dict(spec)
+    name = options.pop('kernel', None)
+    if name not in FORCE_KERNELS:
+        raise ValueError(f"Unbekannter Kraftkern: {name} (erwartet: {', '.join(FORCE_KERNELS)}).")
+    return FORCE_KERNELS[name](**options)
+
+def kernel_config(kernel):
+    """
+    JSON-taugliche Beschreibung eines Kraftkerns (z. B. für runs.config).
+    """
+    return {key: value.tolist() if isinstance(value, np.ndarray) else value for key, value in kernel.items()}
+
+class ForceModel:
+    """
+    Zusammengesetztes Kraftgesetz aus beliebig vielen Kraftkernen auf einem gemeinsamen Teilchensystem.
+    Paarkerne mit derselben Teilcheneigenschaft und Reichweite werden zu einer Kopplungskonstante zusammengefasst
+    (z. B. Gravitation und starke Wechselwirkung ohne cutoff). forces berechnet dann alle Paarkräfte und die potentielle
+    Energie in einem einzigen blockweisen Durchlauf über die Teilchenpaare: Verbindungsvektoren und Abstände werden
+    je Block nur einmal gebildet und für alle Kerne verwendet.
+    """
+
+    def __init__(self, kernels=DEFAULT_KERNELS, chunk_size=None):
+        self.kernels = [make_kernel(spec) for spec in kernels]
+        if not self.kernels:
+            raise ValueError("Mindestens ein Kraftkern wird benötigt.")
+        self.chunk_size = chunk_size
+
+        couplings = {}
+        for kernel in self.kernels:
+            if kernel['kind'] == 'pair':
+                if kernel['attribute'] not in PAIR_ATTRIBUTES:
+                    raise ValueError(f"Unbekannte Teilcheneigenschaft: {kernel['attribute']}")
+                key = (kernel['attribute'], kernel['cutoff'])
+                couplings[key] = couplings.get(key, 0.0) + kernel['constant']
+        self.couplings = [(attribute, cutoff, constant) for (attribute, cutoff), constant in couplings.items() if constant != 0.0]
+        self.fields = [kernel for kernel in self.kernels if kernel['kind'] == 'field']
+
+    def forces(self, particles):
+        """
+        Gibt die Gesamtkraft aller Kerne je Teilchen als (N, 3)-Array und die potentielle Energie des Systems zurück.
+        Paare mit Abstand 0 tragen nichts bei; die Lorentzkraft verwendet die aktuellen Geschwindigkeiten.
+        """
+        positions = particles.positions
+        count = len(particles)
+        forces = np.zeros((count, 3))
+        potential = 0.0
+
+        if self.couplings and count > 1:
+            chunk_size = self.chunk_size or default_chunk_size(count)
+            components = [np.ascontiguousarray(positions[:, k]) for k in range(3)]
+            for start in range(0, count, chunk_size):
+                stop = min(start + chunk_size, count)
+
+                # Verbindungsvektoren r_j - r_i und Abstände einmal je Block, für alle Kerne gemeinsam
+                diff = [c[np.newaxis, :] - c[start:stop, np.newaxis] for c in components]
+                dist_sq = diff[0] * diff[0]
+                dist_sq += diff[1] * diff[1]
+                dist_sq += diff[2] * diff[2]
+                with np.errstate(divide='ignore'):
+                    inverse = 1.0 / np.sqrt(dist_sq)
+                inverse[dist_sq == 0] = 0.0
+
+                # Summe der Kopplungen aller Kerne constant * a_i * b_j (mit cutoff nur innerhalb der Reichweite)
+                coupling = np.zeros_like(dist_sq)
+                for attribute, cutoff, constant in self.couplings:
+                    values = getattr(particles, attribute)
+                    term = np.multiply.outer(constant * values[start:stop], values)
+                    if cutoff is not None:
+                        term[dist_sq >= cutoff * cutoff] = 0.0
+                    coupling += term
+
+                # Jedes Paar kommt in den Blöcken zweimal vor (i, j und j, i)
+                potential -= 0.5 * float(np.einsum('ij,ij->', coupling, inverse))
+                coupling *= inverse * inverse * inverse
+                for k in range(3):
+                    forces[start:stop, k] = np.einsum('ij,ij->i', coupling, diff[k])
+
+        for kernel in self.fields:
+            charges = particles.charges[:, np.newaxis]
+            forces += charges * (kernel['electric'] + np.cross(particles.velocities, kernel['magnetic']))
+            potential -= float(np.sum(particles.charges * (positions @ kernel['electric'])))
+        return forces, potential
@@ -1,22 +1,22 @@
 import sqlite3
-import time
 import math
-import logging
 import os
+from scripts.storage.db_writer import get_writer, close_writers
+from scripts.storage.backends import open_storage, storage_name
+from scripts.funcs.metrics import timer
+from scripts.funcs.pacing import make_pacer
+from scripts.funcs.sim_logging import get_simulation_logger
+from scripts.simulations.particle_system import ParticleSystem
+from scripts.simulations.kernel_backends import get_kernels, kernel_backend_name
+from scripts.simulations.nbody import GravityEngine
+from scripts.storage.checkpoint import CHECKPOINT_INTERVAL, Checkpointer
+from scripts.storage.schema import create_run, finish_run, migrate
 
-# Logging-Konfiguration
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH = os.path.join(BASE_DIR, '..', '..', 'database', 'simulation_data.db')
-LOG_PATH = os.path.join(BASE_DIR, '..', '..', 'logs', 'simulations.log')
 
-logging.basicConfig(
-    level=logging.DEBUG,  # Setzt das Log-Level auf DEBUG, um alle Log-Nachrichten zu erfassen
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(LOG_PATH),  # Loggen in eine Datei
-        logging.StreamHandler()  # Loggen im Terminal
-    ]
-)
+# Logging-Konfiguration (Level und Sampling je Simulation über scripts.funcs.sim_logging.configure_logging)
+logger = get_simulation_logger('gravity')
 
 # Konstanten
 G = 6.67430e-11  # Gravitationskonstante in m^3 kg^-1 s^-2
@@ -30,20 +30,19 @@ position_moon = (R0, 0, 0)  # Mond am Anfang entlang der X-Achse
 velocity_earth = (0, 0, 0)  # Erde ist unbewegt
 velocity_moon = (0, 1022, 0)  # Mond bewegt sich mit einer Geschwindigkeit von 1022 m/s
 
-def init_simulation_state():
+# Integration
+INTEGRATOR = 'leapfrog'  # Integrator des N-Körper-Systems (siehe scripts.simulations.nbody.INTEGRATORS)
+DIAGNOSTICS_INTERVAL = 60  # Energie- und Drehimpulsdrift alle 60 Ausgabeschritte prüfen
+
+def init_simulation_state(db_path=DB_PATH):
     """
     Erstellt die Tabelle für den letzten gespeicherten Zeitpunkt, falls noch nicht vorhanden.
     """
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    # Tabelle für den letzten gespeicherten Zeitpunkt (siehe scripts.storage.schema)
+    migrate(db_path)
 
-    # Tabelle für den letzten gespeicherten Zeitpunkt
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS simulation_state (
-        id INTEGER PRIMARY KEY,
-        last_time INTEGER NOT NULL
-    )
-    """)
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
 
     # Falls noch kein Zeitpunkt gespeichert ist, setzen wir den Startwert auf 0
     cursor.execute("""
@@ -53,11 +52,11 @@ def init_simulation_state():
     conn.commit()
     conn.close()
 
-def get_last_simulation_time():
+def get_last_simulation_time(db_path=DB_PATH):
     """
     Lädt den letzten gespeicherten Zeitpunkt aus der Datenbank.
     """
-    conn = sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
 
     cursor.execute("SELECT last_time FROM simulation_state WHERE id = 1")
@@ -68,28 +67,28 @@ def get_last_simulation_time():
     else:
         return 0  # Falls noch kein Zeitpunkt gespeichert wurde, starten wir bei 0
 
-def update_simulation_time(current_time):
+def update_simulation_time(current_time, db_path=DB_PATH):
     """
-    Aktualisiert den gespeicherten Zeitpunkt in der Datenbank.
+    Aktualisiert den gespeicherten Zeitpunkt in der Datenbank (je Checkpoint, siehe run_grav_simulation).
+    Die Aktualisierung wird zusammen mit den Simulationsdaten gebündelt geschrieben.
     """
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    get_writer(db_path).execute("UPDATE simulation_state SET last_time = ? WHERE id = 1", (current_time,))
 
-    cursor.execute("UPDATE simulation_state SET last_time = ? WHERE id = 1", (current_time,))
-    conn.commit()
-    conn.close()
+# Zweikörper-Funktionen des ursprünglichen Integrators. run_grav_simulation rechnet mit GravityEngine;
+# die Funktionen bleiben für scripts.benchmarks.suite und die Kernel-Backends (two_body_update) erhalten.
 
 def compute_gravitational_force(mass1, mass2, distance):
     """
-    Berechnet die Gravitationskraft zwischen zwei Massen.
+    Berechnet die Gravitationskraft zwischen zwei Massen (Altbestand, siehe oben).
     """
     force = G * mass1 * mass2 / distance ** 2
-    logging.debug(f'Berechnete Gravitationskraft: {force:.2e} N')
+    logger.debug('Berechnete Gravitationskraft: %.2e N', force)
     return force
 
-def update_positions_and_velocities(position1, velocity1, position2, velocity2, force, mass1, mass2, dt):
+def two_body_step(position1, velocity1, position2, velocity2, force, mass1, mass2, dt):
     """
-    Aktualisiert die Positionen und Geschwindigkeiten der beiden Objekte.
+    Rechenkern von update_positions_and_velocities ohne Protokollierung (auch als numba-Kern verwendbar,
+    siehe scripts.simulations.kernel_backends).
     """
     # Berechne die Richtung der Kraft
     dx = position2[0] - position1[0]
@@ -113,75 +112,132 @@ def update_positions_and_velocities(position1, velocity1, position2, velocity2,
     new_position1 = (position1[0] + new_velocity1[0] * dt, position1[1] + new_velocity1[1] * dt, position1[2] + new_velocity1[2] * dt)
     new_position2 = (position2[0] + new_velocity2[0] * dt, position2[1] + new_velocity2[1] * dt, position2[2] + new_velocity2[2] * dt)
 
-    logging.debug(f'Aktualisierte Positionen: Erde: {new_position1}, Mond: {new_position2}')
-    logging.debug(f'Aktualisierte Geschwindigkeiten: Erde: {new_velocity1}, Mond: {new_velocity2}')
-    
     return new_position1, new_velocity1, new_position2, new_velocity2
 
-def insert_gravity_data(time, position_earth, position_moon, velocity_earth, velocity_moon):
+def update_positions_and_velocities(position1, velocity1, position2, velocity2, force, mass1, mass2, dt, kernel_backend=None):
     """
-    Speichert die aktuellen Daten in der Datenbank.
+    Aktualisiert die Positionen und Geschwindigkeiten der beiden Objekte mit dem Zweikörperschritt des
+    Kernel-Backends kernel_backend (siehe scripts.simulations.kernel_backends). Altbestand, siehe oben.
     """
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    cursor.execute(""" 
-    INSERT INTO gravity_data (time, position_x, position_y, position_z, velocity_x, velocity_y, velocity_z)
-    VALUES (?, ?, ?, ?, ?, ?, ?) 
-    """, (
-        time,
-        position_earth[0], position_earth[1], position_earth[2],
-        velocity_earth[0], velocity_earth[1], velocity_earth[2]
-    ))
-
-    cursor.execute(""" 
-    INSERT INTO gravity_data (time, position_x, position_y, position_z, velocity_x, velocity_y, velocity_z)
-    VALUES (?, ?, ?, ?, ?, ?, ?) 
-    """, (
-        time,
-        position_moon[0], position_moon[1], position_moon[2],
-        velocity_moon[0], velocity_moon[1], velocity_moon[2]
-    ))
+    step = get_kernels(kernel_backend)['two_body_update']
+    new_position1, new_velocity1, new_position2, new_velocity2 = step(position1, velocity1, position2, velocity2,
+                                                                      force, mass1, mass2, dt)
 
-    conn.commit()
-    conn.close()
-    logging.info(f'Daten für Zeit {time} gespeichert.')
+    logger.debug('Aktualisierte Positionen: Erde: %s, Mond: %s', new_position1, new_position2)
+    logger.debug('Aktualisierte Geschwindigkeiten: Erde: %s, Mond: %s', new_velocity1, new_velocity2)
+    
+    return new_position1, new_velocity1, new_position2, new_velocity2
 
-def run_grav_simulation():
+def initialize_bodies(masses=(M1, M2), separation=R0, moon_velocity=velocity_moon):
     """
-    Führt die Simulation durch und speichert die Ergebnisse.
+    Erstellt das N-Körper-System aus den Anfangswerten von Erde (Index 0) und Mond (Index 1).
+    Ohne Argumente gelten die Konstanten des Moduls; separation legt den Mond auf die X-Achse.
     """
-    global position_earth, velocity_earth, position_moon, velocity_moon
-
-    # Simulationszeitraum und Schrittweite
-    total_time = 3600 * 24  # Simuliere für 24 Stunden (1 Tag)
-    dt = 60  # Zeitschritt in Sekunden
-
-    logging.info(f'Simulation startet. Gesamtdauer: {total_time / 3600} Stunden, Zeitschritt: {dt} Sekunden.')
-
-    # Hole den letzten gespeicherten Zeitpunkt
-    current_time = get_last_simulation_time()
-    logging.info(f'Simulation fortgesetzt bei Zeit {current_time}s.')
+    return ParticleSystem(
+        [position_earth, (separation, 0, 0)],
+        [velocity_earth, moon_velocity],
+        masses
+    )
 
+def insert_gravity_data(time, bodies, storage):
+    """
+    Speichert die aktuellen Daten über das Speicher-Backend des Laufs.
+    Pro Zeitpunkt wird je Körper eine Zeile in der Reihenfolge des Systems geschrieben (Erde, Mond, ...).
+    """
+    storage.append('gravity_data', {
+        'time': time,
+        'position_x': bodies.positions[:, 0],
+        'position_y': bodies.positions[:, 1],
+        'position_z': bodies.positions[:, 2],
+        'velocity_x': bodies.velocities[:, 0],
+        'velocity_y': bodies.velocities[:, 1],
+        'velocity_z': bodies.velocities[:, 2],
+    })
+
+def run_grav_simulation(pacing=None, integrator=INTEGRATOR, total_time=3600 * 24, dt=60, max_step=None, rtol=1e-10, bodies=None,
+                        resume=True, checkpoint_interval=CHECKPOINT_INTERVAL, db_path=DB_PATH, storage=None,
+                        output=None, kernel_backend=None):
+    """
+    Führt die Simulation durch und speichert die Ergebnisse; ohne bodies wird das Erde-Mond-System simuliert.
+    Symplektische Integratoren unterteilen dt in Schritte von höchstens max_step, 'rk45' regelt über rtol.
+    Übrige Argumente siehe Readme, Abschnitt Nutzung.
+    """
+    kernel_backend = kernel_backend_name(kernel_backend)
+    logger.info('Simulation startet. Gesamtdauer: %s Stunden, Zeitschritt: %s Sekunden, Integrator: %s, Kerne: %s.',
+                total_time / 3600, dt, integrator, kernel_backend)
+
+    checkpointer = Checkpointer(db_path, 'gravity', checkpoint_interval)
+    checkpoint = checkpointer.load() if resume else None
+    if checkpoint is not None:
+        # Vollständigen Zustand übernehmen
+        bodies = ParticleSystem.from_arrays(checkpoint.arrays)
+        engine = GravityEngine(bodies, integrator, G, max_step, rtol, kernel_backend)
+        engine.restore(checkpoint.meta['engine'])
+        output_steps, current_time = checkpoint.step, checkpoint.time
+        logger.info('Simulation fortgesetzt bei Zeit %ss (Schritt %d).', current_time, output_steps)
+    else:
+        if resume and get_last_simulation_time(db_path) > 0:
+            logger.warning('Kein Checkpoint vorhanden, die Simulation beginnt mit den Anfangswerten bei Zeit 0s.')
+        if bodies is None:
+            bodies = initialize_bodies()
+        engine = GravityEngine(bodies, integrator, G, max_step, rtol, kernel_backend)
+        output_steps, current_time = 0, 0
+
+    run_id = checkpoint.run_id if checkpoint is not None else None
+    if run_id is None:
+        run_id = create_run(db_path, 'gravity', {'integrator': integrator, 'total_time': total_time, 'dt': dt, 'max_step': max_step, 'rtol': rtol,
+                                                 'masses': bodies.masses.tolist(), 'kernel_backend': kernel_backend},
+                            storage_name(storage), output)
+    storage = open_storage(db_path, run_id, storage)
+    checkpointer.run_id, checkpointer.storage = run_id, storage
+    if checkpoint is not None:
+        # Nach dem Checkpoint geschriebene Zeilen verwerfen und die Ausgaberichtlinie fortsetzen
+        storage.resume('gravity_data', checkpoint)
+
+    def state():
+        return bodies.arrays(), {'engine': engine.state()}
+
+    pacer = make_pacer(pacing, dt)
     # Simulation starten
-    while current_time <= total_time:
-        # Berechne die Gravitationskraft
-        distance = math.sqrt((position_moon[0] - position_earth[0]) ** 2 + (position_moon[1] - position_earth[1]) ** 2 + (position_moon[2] - position_earth[2]) ** 2)
-        force = compute_gravitational_force(M1, M2, distance)
-
-        # Update Positionen und Geschwindigkeiten
-        position_earth, velocity_earth, position_moon, velocity_moon = update_positions_and_velocities(position_earth, velocity_earth, position_moon, velocity_moon, force, M1, M2, dt)
-
-        # Daten in die Datenbank speichern
-        insert_gravity_data(current_time, position_earth, position_moon, velocity_earth, velocity_moon)
-
-        # Zeit inkrementieren
-        current_time += dt
-        update_simulation_time(current_time)  # Speichere den aktuellen Zeitpunkt in der DB
-
-        time.sleep(0.1)  # Pause für 0.1 Sekunden (Simulationsgeschwindigkeit steuern)
-
-    logging.info("Gravitationssimulation abgeschlossen.")
+    try:
+        while current_time <= total_time:
+            # Positionen und Geschwindigkeiten aller Körper um einen Ausgabeschritt weiterintegrieren
+            with timer('step.integration'):
+                engine.advance(dt)
+
+            # Daten in die Datenbank speichern
+            with timer('step.storage'):
+                insert_gravity_data(current_time, bodies, storage)
+
+            output_steps += 1
+            logger.sampled_debug(output_steps, 'Daten für Zeit %s gespeichert.', current_time)
+
+            # Erhaltungsgrößen überwachen
+            if output_steps % DIAGNOSTICS_INTERVAL == 0:
+                energy_drift, angular_momentum_drift = engine.diagnostics()
+                logger.debug('Energiedrift: %.3e, Drehimpulsdrift: %.3e', energy_drift, angular_momentum_drift)
+
+            # Zeit inkrementieren
+            current_time += dt
+            if checkpointer.maybe_save(output_steps, current_time, state):
+                update_simulation_time(current_time, db_path)  # Zeitpunkt des Checkpoints in der DB festhalten
+
+            pacer.wait()  # Simulationsgeschwindigkeit steuern
+
+        # Endzustand sichern, damit ein erneuter Start nicht von vorne beginnt
+        checkpointer.save(output_steps, current_time, *state())
+        update_simulation_time(current_time, db_path)
+        finish_run(db_path, run_id)
+    finally:
+        # Gepufferte Daten auch bei Abbruch schreiben
+        storage.close()
+        close_writers()
+
+    engine.diagnostics()
+    logger.info('Integrationsschritte: %d (verworfen: %d), max. Energiedrift: %.3e, max. Drehimpulsdrift: %.3e',
+                engine.steps, engine.rejected_steps, engine.max_energy_drift, engine.max_angular_momentum_drift)
+    logger.info(pacer.summary())
+    logger.info("Gravitationssimulation abgeschlossen.")
 
 if __name__ == "__main__":
     init_simulation_state()  # Nur beim ersten Start oder nach Zurücksetzen der Datenbank ausführen
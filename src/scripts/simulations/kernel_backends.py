@@ -0,0 +1,133 @@
+import numpy as np
+from scripts.funcs.sim_logging import get_simulation_logger
+from scripts.simulations.particle_system import pairwise_forces
+
+try:
+    import numba
+except ImportError:
+    numba = None  # Ohne numba stehen nur die NumPy-Kerne zur Verfügung
+
+logger = get_simulation_logger('kernels')
+
+# 'auto' verwendet die JIT-kompilierten Kerne, wenn numba installiert ist, sonst die NumPy-Kerne
+DEFAULT_KERNEL_BACKEND = 'auto'
+
+# Bereits erzeugte Kernsätze je Backend (die Kompilierung bzw. das Laden aus dem Cache erfolgt nur einmal je Prozess)
+_LOADED = {}
+_WARNED = {}
+
+_prange = numba.prange if numba is not None else range
+
+def _pair_loop(positions, masses, constant, cutoff_sq, box_size):
+    """
+    Paarsumme wie pairwise_forces als Schleife über alle Paare (Vorlage der numba-Kerne, ohne Zwischenarrays).
+    """
+    count = positions.shape[0]
+    forces = np.zeros((count, 3))
+    for i in _prange(count):
+        fx, fy, fz = 0.0, 0.0, 0.0
+        for j in range(count):
+            dx = positions[j, 0] - positions[i, 0]
+            dy = positions[j, 1] - positions[i, 1]
+            dz = positions[j, 2] - positions[i, 2]
+            if box_size > 0.0:
+                dx -= box_size * np.rint(dx / box_size)
+                dy -= box_size * np.rint(dy / box_size)
+                dz -= box_size * np.rint(dz / box_size)
+            dist_sq = dx * dx + dy * dy + dz * dz
+            if dist_sq == 0.0 or dist_sq >= cutoff_sq:
+                continue
+            weight = masses[j] / (dist_sq * np.sqrt(dist_sq))
+            fx += weight * dx
+            fy += weight * dy
+            fz += weight * dz
+        scale = constant * masses[i]
+        forces[i, 0] = scale * fx
+        forces[i, 1] = scale * fy
+        forces[i, 2] = scale * fz
+    return forces
+
+def _update_loop(positions, velocities, forces, masses, dt):
+    """
+    Semi-impliziter Euler-Schritt wie update_particle_positions als Schleife (Vorlage des numba-Kerns).
+    """
+    for i in range(positions.shape[0]):
+        for k in range(3):
+            velocities[i, k] += forces[i, k] / masses[i] * dt
+            positions[i, k] += velocities[i, k] * dt
+
+def numpy_kernels():
+    """
+    Rechenkerne auf Basis von NumPy (Referenz, ohne zusätzliche Abhängigkeiten):
+    pair_forces(positions, masses, constant, chunk_size, cutoff, box_size) -> (N, 3)-Kräfte wie pairwise_forces,
+    update_particles(positions, velocities, forces, masses, dt) aktualisiert Geschwindigkeiten und Positionen in place,
+    two_body_update(...) ist der skalare Zweikörperschritt gravity_simulation.two_body_step
+    (verwendet von gravity_simulation.update_positions_and_velocities).
+    """
+    from scripts.simulations.gravity_simulation import two_body_step
+
+    def update_particles(positions, velocities, forces, masses, dt):
+        acceleration = forces / masses[:, np.newaxis]
+        velocities += acceleration * dt
+        positions += velocities * dt
+
+    return {'backend': 'numpy', 'pair_forces': pairwise_forces, 'update_particles': update_particles,
+            'two_body_update': two_body_step}
+
+def numba_kernels():
+    """
+    Dieselben Rechenkerne mit numba kompiliert. Die Paarsumme benötigt keine Zwischenarrays (chunk_size wird nicht
+    verwendet) und verteilt die Teilchen auf die Threads von numba (NUMBA_NUM_THREADS). Die Kompilate werden mit
+    cache=True auf der Festplatte abgelegt (__pycache__ bzw. NUMBA_CACHE_DIR), sodass spätere Läufe sie nur laden.
+    Die Kräfte stimmen bis auf Rundungsunterschiede mit den NumPy-Kernen überein, die Integration exakt.
+    """
+    from scripts.simulations.gravity_simulation import two_body_step
+
+    pair_loop = numba.njit(parallel=True, cache=True)(_pair_loop)
+
+    def pair_forces(positions, masses, constant, chunk_size=None, cutoff=None, box_size=None):
+        return pair_loop(np.ascontiguousarray(positions, dtype=np.float64), np.ascontiguousarray(masses, dtype=np.float64),
+                         float(constant), np.inf if cutoff is None else float(cutoff) ** 2,
+                         0.0 if box_size is None else float(box_size))
+
+    return {'backend': 'numba', 'pair_forces': pair_forces, 'update_particles': numba.njit(cache=True)(_update_loop),
+            'two_body_update': numba.njit(cache=True)(two_body_step)}
+
+# Verfügbare Kernel-Backends: Name -> Funktion, die den Kernsatz erzeugt
+KERNEL_BACKENDS = {
+    'numpy': numpy_kernels,
+    'numba': numba_kernels,
+}
+
+def available_kernel_backends():
+    """
+    Namen der in dieser Umgebung nutzbaren Kernel-Backends.
+    """
+    return [name for name in KERNEL_BACKENDS if name != 'numba' or numba is not None]
+
+def kernel_backend_name(backend=None):
+    """
+    Löst backend (None, 'auto', 'numpy' oder 'numba') zum tatsächlich verwendeten Backend auf.
+    Ist numba nicht installiert, wird auf 'numpy' zurückgegriffen.
+    """
+    name = DEFAULT_KERNEL_BACKEND if backend is None else backend
+    if name == 'auto':
+        return 'numba' if numba is not None else 'numpy'
+    if name not in KERNEL_BACKENDS:
+        raise ValueError(f"Unbekanntes Kernel-Backend: {name} (erwartet: auto, {', '.join(KERNEL_BACKENDS)}).")
+    if name == 'numba' and numba is None:
+        if not _WARNED:
+            logger.warning("numba ist nicht installiert, es werden die NumPy-Kerne verwendet.")
+            _WARNED['numba'] = True
+        return 'numpy'
+    return name
+
+def get_kernels(backend=None):
+    """
+    Gibt den Kernsatz (dict mit 'backend', 'pair_forces', 'update_particles', 'two_body_update') des Backends zurück,
+    siehe kernel_backend_name.
+    """
+    name = kernel_backend_name(backend)
+    if name not in _LOADED:
+        _LOADED[name] = KERNEL_BACKENDS[name]()
+    return _LOADED[name]
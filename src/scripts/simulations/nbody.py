@@ -0,0 +1,212 @@
+import math
+import numpy as np
+from scripts.simulations.kernel_backends import get_kernels
+
+G = 6.67430e-11  # Gravitationskonstante in m^3 kg^-1 s^-2
+
+# Verfügbare Integratoren: 'euler' (semi-implizit, 1. Ordnung), 'leapfrog' (Velocity-Verlet, symplektisch, 2. Ordnung),
+# 'yoshida4' (symplektisch, 4. Ordnung) und 'rk45' (Dormand-Prince mit adaptiver Schrittweite und Fehlerkontrolle)
+INTEGRATORS = ('euler', 'leapfrog', 'yoshida4', 'rk45')
+
+# Koeffizienten des Yoshida-Verfahrens 4. Ordnung
+_W1 = 1.0 / (2.0 - 2.0 ** (1.0 / 3.0))
+_W0 = -(2.0 ** (1.0 / 3.0)) * _W1
+_YOSHIDA_C = (_W1 / 2, (_W0 + _W1) / 2, (_W0 + _W1) / 2, _W1 / 2)
+_YOSHIDA_D = (_W1, _W0, _W1)
+
+# Butcher-Tableau nach Dormand und Prince (RK5(4)7M)
+_DP_A = (
+    (),
+    (1 / 5,),
+    (3 / 40, 9 / 40),
+    (44 / 45, -56 / 15, 32 / 9),
+    (19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729),
+    (9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656),
+    (35 / 384, 0.0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84),
+)
+_DP_B5 = (35 / 384, 0.0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84, 0.0)
+_DP_B4 = (5179 / 57600, 0.0, 7571 / 16695, 393 / 640, -92097 / 339200, 187 / 2100, 1 / 40)
+
+def gravitational_accelerations(positions, masses, constant=G, kernel_backend=None):
+    """
+    Berechnet die Beschleunigungen aller Körper durch die Gravitation der übrigen Körper.
+    kernel_backend wählt die Rechenkerne (siehe scripts.simulations.kernel_backends).
+    """
+    return get_kernels(kernel_backend)['pair_forces'](positions, masses, constant) / masses[:, np.newaxis]
+
+def total_energy(positions, velocities, masses, constant=G):
+    """
+    Berechnet die Gesamtenergie (kinetisch + potentiell) des Systems.
+    """
+    kinetic = 0.5 * np.sum(masses * np.einsum('ij,ij->i', velocities, velocities))
+    potential = 0.0
+    for i in range(len(masses) - 1):
+        distances = np.linalg.norm(positions[i + 1:] - positions[i], axis=1)
+        potential -= constant * masses[i] * np.sum(masses[i + 1:] / distances)
+    return kinetic + potential
+
+def total_angular_momentum(positions, velocities, masses):
+    """
+    Berechnet den Gesamtdrehimpuls L = sum(m * r x v) bezogen auf den Ursprung.
+    """
+    return np.sum(masses[:, np.newaxis] * np.cross(positions, velocities), axis=0)
+
+class GravityEngine:
+    """
+    N-Körper-Gravitationsintegrator auf einem ParticleSystem.
+    advance(dt) integriert genau um dt weiter; symplektische Verfahren unterteilen dabei in Schritte
+    von höchstens max_step, 'rk45' wählt die Schrittweite selbst anhand der Toleranz rtol.
+    Energie- und Drehimpulsdrift werden relativ zum Anfangszustand verfolgt. kernel_backend wählt die Rechenkerne
+    der Beschleunigungen (siehe scripts.simulations.kernel_backends).
+    """
+
+    def __init__(self, bodies, integrator='leapfrog', constant=G, max_step=None, rtol=1e-10, kernel_backend=None):
+        if integrator not in INTEGRATORS:
+            raise ValueError(f"Unbekannter Integrator: {integrator}")
+        self.bodies = bodies
+        self.integrator = integrator
+        self.constant = constant
+        self.max_step = max_step
+        self.rtol = rtol
+        self.kernels = get_kernels(kernel_backend)
+        self.steps = 0  # Anzahl der internen Integrationsschritte
+        self.rejected_steps = 0
+        self._acceleration = None
+        self._step_size = None
+
+        self.initial_energy = self.energy()
+        self.initial_angular_momentum = self.angular_momentum()
+        self.max_energy_drift = 0.0
+        self.max_angular_momentum_drift = 0.0
+
+    def accelerations(self, positions):
+        masses = self.bodies.masses
+        return self.kernels['pair_forces'](positions, masses, self.constant) / masses[:, np.newaxis]
+
+    def advance(self, dt):
+        """
+        Integriert das System um die Zeitspanne dt weiter.
+        """
+        if self.integrator == 'rk45':
+            self._advance_adaptive(dt)
+            return
+
+        substeps = 1 if self.max_step is None else max(1, math.ceil(dt / self.max_step))
+        h = dt / substeps
+        step = getattr(self, f'_step_{self.integrator}')
+        for _ in range(substeps):
+            step(h)
+            self.steps += 1
+
+    def _step_euler(self, h):
+        b = self.bodies
+        b.velocities += self.accelerations(b.positions) * h
+        b.positions += b.velocities * h
+
+    def _step_leapfrog(self, h):
+        # Kick-Drift-Kick; die Beschleunigung am Schrittende wird für den nächsten Schritt wiederverwendet
+        b = self.bodies
+        if self._acceleration is None:
+            self._acceleration = self.accelerations(b.positions)
+        b.velocities += 0.5 * h * self._acceleration
+        b.positions += h * b.velocities
+        self._acceleration = self.accelerations(b.positions)
+        b.velocities += 0.5 * h * self._acceleration
+
+    def _step_yoshida4(self, h):
+        b = self.bodies
+        for c, d in zip(_YOSHIDA_C, _YOSHIDA_D):
+            b.positions += c * h * b.velocities
+            b.velocities += d * h * self.accelerations(b.positions)
+        b.positions += _YOSHIDA_C[-1] * h * b.velocities
+
+    def _dormand_prince(self, positions, velocities, h):
+        """
+        Ein Dormand-Prince-Schritt; gibt die Lösung 5. Ordnung und die Fehlerschätzung zurück.
+        """
+        k_x, k_v = [], []
+        for a_row in _DP_A:
+            x = positions + h * sum((a * k for a, k in zip(a_row, k_x)), np.zeros_like(positions))
+            v = velocities + h * sum((a * k for a, k in zip(a_row, k_v)), np.zeros_like(velocities))
+            k_x.append(v)
+            k_v.append(self.accelerations(x))
+
+        new_x = positions + h * sum(b * k for b, k in zip(_DP_B5, k_x))
+        new_v = velocities + h * sum(b * k for b, k in zip(_DP_B5, k_v))
+        err_x = h * sum((b5 - b4) * k for b5, b4, k in zip(_DP_B5, _DP_B4, k_x))
+        err_v = h * sum((b5 - b4) * k for b5, b4, k in zip(_DP_B5, _DP_B4, k_v))
+        return new_x, new_v, err_x, err_v
+
+    def _advance_adaptive(self, dt):
+        b = self.bodies
+        elapsed = 0.0
+        h = self._step_size or dt
+        while elapsed < dt:
+            h_try = min(h, dt - elapsed)
+            new_x, new_v, err_x, err_v = self._dormand_prince(b.positions, b.velocities, h_try)
+
+            # Fehler relativ zur Größenordnung von Orten und Geschwindigkeiten
+            scale_x = self.rtol * max(np.abs(b.positions).max(), np.abs(new_x).max(), 1.0)
+            scale_v = self.rtol * max(np.abs(b.velocities).max(), np.abs(new_v).max(), 1e-12)
+            error = max(np.abs(err_x).max() / scale_x, np.abs(err_v).max() / scale_v)
+
+            factor = 5.0 if error == 0 else min(5.0, max(0.2, 0.9 * error ** -0.2))
+            if error <= 1.0:
+                b.positions[:] = new_x
+                b.velocities[:] = new_v
+                elapsed += h_try
+                self.steps += 1
+                # Ein nur wegen des Intervallendes verkürzter Schritt soll die Schrittweite nicht verkleinern
+                h = max(h, h_try * factor) if h_try < h else h_try * factor
+            else:
+                self.rejected_steps += 1
+                h = h_try * factor
+        self._step_size = h
+
+    def state(self):
+        """
+        Gibt den internen Zustand des Integrators (ohne Körperarrays) als JSON-taugliches dict zurück.
+        """
+        return {
+            'integrator': self.integrator,
+            'steps': self.steps,
+            'rejected_steps': self.rejected_steps,
+            'step_size': self._step_size,
+            'initial_energy': float(self.initial_energy),
+            'initial_angular_momentum': self.initial_angular_momentum.tolist(),
+            'max_energy_drift': self.max_energy_drift,
+            'max_angular_momentum_drift': self.max_angular_momentum_drift,
+        }
+
+    def restore(self, state):
+        """
+        Stellt den mit state() gesicherten Zustand wieder her, damit Schrittweite und Drift-Referenz erhalten bleiben.
+        """
+        self.steps = state['steps']
+        self.rejected_steps = state['rejected_steps']
+        self._step_size = state['step_size']
+        self.initial_energy = state['initial_energy']
+        self.initial_angular_momentum = np.array(state['initial_angular_momentum'])
+        self.max_energy_drift = state['max_energy_drift']
+        self.max_angular_momentum_drift = state['max_angular_momentum_drift']
+
+    def energy(self):
+        b = self.bodies
+        return total_energy(b.positions, b.velocities, b.masses, self.constant)
+
+    def angular_momentum(self):
+        b = self.bodies
+        return total_angular_momentum(b.positions, b.velocities, b.masses)
+
+    def diagnostics(self):
+        """
+        Gibt die aktuelle relative Energie- und Drehimpulsdrift zurück und aktualisiert deren Maxima.
+        """
+        energy_drift = abs(self.energy() - self.initial_energy) / abs(self.initial_energy) if self.initial_energy else 0.0
+        reference = np.linalg.norm(self.initial_angular_momentum)
+        difference = np.linalg.norm(self.angular_momentum() - self.initial_angular_momentum)
+        angular_momentum_drift = difference / reference if reference else difference
+
+        self.max_energy_drift = max(self.max_energy_drift, energy_drift)
+        self.max_angular_momentum_drift = max(self.max_angular_momentum_drift, angular_momentum_drift)
+        return float(energy_drift), float(angular_momentum_drift)
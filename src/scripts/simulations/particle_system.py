@@ -0,0 +1,135 @@
+import numpy as np
+
+# Maximale Anzahl gleichzeitig ausgewerteter Teilchenpaare pro Block (begrenzt den Speicherbedarf)
+PAIR_BUDGET = 1 << 19
+
+class ParticleSystem:
+    """
+    Teilchensystem mit zusammenhängenden NumPy-Arrays für Positionen, Geschwindigkeiten, Massen und Ladungen.
+    Zeile i aller Arrays beschreibt das Teilchen mit der ID ids[i]. Ohne charges sind alle Teilchen ungeladen.
+    """
+
+    def __init__(self, positions, velocities, masses, ids=None, charges=None):
+        self.positions = np.ascontiguousarray(positions, dtype=np.float64).reshape(-1, 3)
+        self.velocities = np.ascontiguousarray(velocities, dtype=np.float64).reshape(-1, 3)
+        self.masses = np.ascontiguousarray(masses, dtype=np.float64).reshape(-1)
+
+        count = self.positions.shape[0]
+        if charges is None:
+            charges = np.zeros(count)
+        self.charges = np.ascontiguousarray(charges, dtype=np.float64).reshape(-1)
+        if self.velocities.shape[0] != count or self.masses.shape[0] != count or self.charges.shape[0] != count:
+            raise ValueError("positions, velocities, masses und charges müssen gleich viele Teilchen enthalten.")
+
+        if ids is None:
+            ids = np.arange(count)
+        self.ids = np.ascontiguousarray(ids, dtype=np.int64).reshape(-1)
+
+    def __len__(self):
+        return self.positions.shape[0]
+
+    def arrays(self):
+        """
+        Gibt alle Zustandsarrays als dict zurück (z. B. für Checkpoints).
+        """
+        return {'positions': self.positions, 'velocities': self.velocities, 'masses': self.masses, 'ids': self.ids,
+                'charges': self.charges}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(arrays['positions'], arrays['velocities'], arrays['masses'], arrays.get('ids'), arrays.get('charges'))
+
+    @classmethod
+    def random(cls, count, box_size, mass_range=(1.0, 10.0), rng=None, charge_range=None):
+        """
+        Erzeugt ein ruhendes Teilchensystem mit gleichverteilten Positionen im Würfel [0, box_size)^3.
+        Mit charge_range erhalten die Teilchen gleichverteilte Ladungen in diesem Bereich, sonst keine.
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+        positions = rng.uniform(0.0, box_size, size=(count, 3))
+        masses = rng.uniform(mass_range[0], mass_range[1], size=count)
+        charges = None if charge_range is None else rng.uniform(charge_range[0], charge_range[1], size=count)
+        return cls(positions, np.zeros((count, 3)), masses, charges=charges)
+
+def default_chunk_size(count, pair_budget=PAIR_BUDGET):
+    """
+    Wählt die Blockgröße so, dass pro Block höchstens pair_budget Paare ausgewertet werden.
+    """
+    return max(1, pair_budget // max(count, 1))
+
+def expand_ranges(lo, hi):
+    """
+    Entfaltet die Bereiche [lo[i], hi[i]) zu flachen Arrays (Bereichsindex, Wert).
+    """
+    counts = hi - lo
+    total = int(counts.sum())
+    owner = np.repeat(np.arange(counts.size), counts)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return owner, lo[owner] + offsets
+
+def minimum_image(diff, box_size):
+    """
+    Wendet die Minimum-Image-Konvention für einen periodischen Würfel der Kantenlänge box_size an.
+    """
+    return diff - box_size * np.round(diff / box_size)
+
+def pair_block_forces(components, masses, constant, start, stop, out, cutoff=None, box_size=None):
+    """
+    Berechnet die Kräfte auf die Teilchen start..stop-1 durch alle Teilchen und schreibt sie in out[start:stop].
+    components sind die Positionsspalten als zusammenhängende Arrays (x, y, z); siehe pairwise_forces.
+    """
+    # Verbindungsvektoren r_j - r_i für alle Paare des Blocks, je Komponente Form (Block, N)
+    diff = [c[np.newaxis, :] - c[start:stop, np.newaxis] for c in components]
+    if box_size is not None:
+        diff = [minimum_image(d, box_size) for d in diff]
+    dist_sq = diff[0] * diff[0]
+    dist_sq += diff[1] * diff[1]
+    dist_sq += diff[2] * diff[2]
+
+    # k * m_i * m_j / r^3, damit die Multiplikation mit diff Betrag und Richtung liefert
+    with np.errstate(divide='ignore'):
+        weights = dist_sq * np.sqrt(dist_sq)
+        np.divide(masses[np.newaxis, :], weights, out=weights)
+    weights[dist_sq == 0] = 0.0
+    if cutoff is not None:
+        weights[dist_sq >= cutoff * cutoff] = 0.0
+    weights *= (constant * masses[start:stop])[:, np.newaxis]
+
+    for k in range(3):
+        out[start:stop, k] = np.einsum('ij,ij->i', weights, diff[k])
+
+def pairwise_forces(positions, masses, constant, chunk_size=None, cutoff=None, box_size=None):
+    """
+    Berechnet für jedes Teilchen die Summe der anziehenden Kräfte F = k * m_i * m_j / r^2
+    aller anderen Teilchen in einem vektorisierten Durchlauf.
+    Die Zeilen werden blockweise verarbeitet, damit der Speicherbedarf bei großem N begrenzt bleibt.
+    Teilchenpaare mit Abstand 0 tragen keine Kraft bei. Mit cutoff werden nur Paare mit r < cutoff
+    berücksichtigt, mit box_size werden Abstände periodisch (Minimum Image) gemessen.
+    """
+    count = positions.shape[0]
+    forces = np.zeros((count, 3))
+    if count < 2:
+        return forces
+
+    if chunk_size is None:
+        chunk_size = default_chunk_size(count)
+
+    # Komponentenweise Spalten sind für die Differenzbildung deutlich cache-freundlicher
+    components = [np.ascontiguousarray(positions[:, k]) for k in range(3)]
+
+    for start in range(0, count, chunk_size):
+        pair_block_forces(components, masses, constant, start, min(start + chunk_size, count), forces, cutoff, box_size)
+
+    return forces
+
+def relative_force_error(approx, exact):
+    """
+    Vergleicht genäherte mit exakten Kräften.
+    Gibt den mittleren und maximalen relativen Fehler pro Teilchen zurück.
+    """
+    norm = np.linalg.norm(exact, axis=1)
+    error = np.linalg.norm(approx - exact, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        relative = np.where(norm > 0, error / norm, error)
+    return float(relative.mean()), float(relative.max())
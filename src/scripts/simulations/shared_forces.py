@@ -0,0 +1,177 @@
+import multiprocessing
+import multiprocessing.connection
+import threading
+from multiprocessing import shared_memory
+import numpy as np
+from scripts.simulations.particle_system import default_chunk_size, pair_block_forces
+
+# Befehle an die Worker über das gemeinsame Steuerfeld
+COMPUTE, STOP = 0, 1
+JOIN_TIMEOUT = 10.0  # Sekunden, die beim Beenden auf die Worker gewartet wird
+# Worker werden neu gestartet statt geforkt: ein Fork übernimmt sonst ggf. laufende Threadpools des Hauptprozesses
+# (z. B. der numba-Kerne, siehe scripts.simulations.kernel_backends), die danach hängen können
+START_METHOD = 'spawn'
+
+def _attach(name, shape, dtype=np.float64):
+    """
+    Öffnet einen gemeinsamen Speicherblock und gibt ihn mit einer NumPy-Sicht der Form shape zurück.
+    """
+    segment = shared_memory.SharedMemory(name=name)
+    return segment, np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+
+def _compute(positions, masses, forces, constant, chunk_size, starts):
+    """
+    Berechnet die Kräfte der Blöcke, die bei starts beginnen; dieselben Blockgrenzen wie in pairwise_forces.
+    """
+    count = len(masses)
+    components = [np.ascontiguousarray(positions[:, k]) for k in range(3)]
+    for start in starts:
+        pair_block_forces(components, masses, constant, start, min(start + chunk_size, count), forces)
+
+def _worker(names, count, constant, chunk_size, starts, start_barrier, done_barrier):
+    """
+    Hauptschleife eines Workers: wartet je Schritt an start_barrier, berechnet seine Blöcke direkt im gemeinsamen
+    Speicher und meldet sich an done_barrier zurück, bis das Steuerfeld STOP enthält.
+    """
+    segments, arrays = [], {}
+    try:
+        for name, shape, dtype in (('positions', (count, 3), np.float64), ('masses', (count,), np.float64),
+                                   ('forces', (count, 3), np.float64), ('control', (1,), np.int64)):
+            segment, arrays[name] = _attach(names[name], shape, dtype)
+            segments.append(segment)
+
+        while True:
+            start_barrier.wait()
+            if arrays['control'][0] == STOP:
+                break
+            _compute(arrays['positions'], arrays['masses'], arrays['forces'], constant, chunk_size, starts)
+            done_barrier.wait()
+    except threading.BrokenBarrierError:
+        pass  # Der Hauptprozess hat den Pool abgebrochen
+    except BaseException:
+        # Hauptprozess und übrige Worker nicht an der Barriere hängen lassen
+        start_barrier.abort()
+        done_barrier.abort()
+        raise
+    finally:
+        arrays.clear()  # Sichten freigeben, bevor die Blöcke geschlossen werden
+        for segment in segments:
+            segment.close()
+
+class SharedForcePool:
+    """
+    Berechnet die direkten Paarkräfte (siehe pairwise_forces) auf mehreren Kernen. Positionen, Massen und Kräfte
+    liegen in multiprocessing.shared_memory; die Arrays von particles werden durch Sichten darauf ersetzt, sodass
+    update_particle_positions direkt im gemeinsamen Speicher rechnet und je Schritt nichts serialisiert wird.
+    Die Blöcke von pairwise_forces werden zusammenhängend auf workers Prozesse verteilt (einer davon ist der aufrufende
+    Prozess; höchstens so viele Prozesse wie Blöcke); die dauerhaft laufenden Worker warten je Schritt an einer
+    Barriere. Jeder Block wird mit denselben Operationen wie in pairwise_forces berechnet, bei gleicher chunk_size
+    also mit denselben Blockgrenzen; die Kräfte
+    stimmen daher mit dem seriellen Pfad überein. Endet ein Worker unerwartet, löst forces einen RuntimeError aus.
+    Nach close gehören die Arrays wieder particles.
+    """
+
+    def __init__(self, particles, workers, chunk_size=None, constant=1.0, timeout=None):
+        count = len(particles)
+        self.particles = particles
+        self.constant = constant
+        workers = max(1, workers)
+        if chunk_size is None:
+            # Höchstens so groß wie in pairwise_forces, aber mindestens ein Block je Worker
+            chunk_size = max(1, min(default_chunk_size(count), -(-count // workers)))
+        self.chunk_size = chunk_size
+        # Keine Worker ohne eigenen Block starten
+        workers = min(workers, max(1, -(-count // chunk_size)))
+        self.timeout = timeout  # Höchstdauer eines Schritts in Sekunden (None: unbegrenzt)
+
+        self._segments = {}
+        self._positions = self._share('positions', particles.positions)
+        self._masses = self._share('masses', particles.masses)
+        self._forces = self._share('forces', np.zeros((count, 3)))
+        self._control = self._share('control', np.array([COMPUTE], dtype=np.int64))
+        particles.positions, particles.masses = self._positions, self._masses
+
+        # Blöcke zusammenhängend verteilen; Anteil 0 rechnet der aufrufende Prozess
+        parts = np.array_split(np.arange(0, count, self.chunk_size), workers)
+        self._starts = parts[0].tolist()
+        context = multiprocessing.get_context(START_METHOD)
+        self._start_barrier = context.Barrier(len(parts))
+        self._done_barrier = context.Barrier(len(parts))
+        names = {name: segment.name for name, segment in self._segments.items()}
+        self._processes = [
+            context.Process(target=_worker, daemon=True,
+                                    args=(names, count, constant, self.chunk_size, part.tolist(),
+                                          self._start_barrier, self._done_barrier))
+            for part in parts[1:]
+        ]
+        for process in self._processes:
+            process.start()
+        self._closing = False
+        if self._processes:
+            threading.Thread(target=self._watch, daemon=True).start()
+
+    def _share(self, name, values):
+        values = np.ascontiguousarray(values)
+        segment = shared_memory.SharedMemory(create=True, size=max(1, values.nbytes))
+        self._segments[name] = segment
+        array = np.ndarray(values.shape, dtype=values.dtype, buffer=segment.buf)
+        array[...] = values
+        return array
+
+    def _watch(self):
+        # Endet ein Worker unerwartet, die Barrieren abbrechen, damit der Hauptprozess nicht dauerhaft wartet
+        multiprocessing.connection.wait([process.sentinel for process in self._processes])
+        if not self._closing:
+            self._start_barrier.abort()
+            self._done_barrier.abort()
+
+    @property
+    def workers(self):
+        return len(self._processes) + 1
+
+    def forces(self):
+        """
+        Berechnet die Kräfte für die aktuellen Positionen und gibt sie als (N, 3)-Array zurück.
+        """
+        if self._segments is None:
+            raise RuntimeError("Der Pool ist bereits geschlossen.")
+        try:
+            self._start_barrier.wait(self.timeout)
+            _compute(self._positions, self._masses, self._forces, self.constant, self.chunk_size, self._starts)
+            self._done_barrier.wait(self.timeout)
+        except threading.BrokenBarrierError:
+            raise RuntimeError("Ein Worker der Kraftberechnung ist ausgefallen.") from None
+        return self._forces.copy()
+
+    def close(self):
+        """
+        Beendet die Worker, gibt den gemeinsamen Speicher frei und übergibt particles wieder eigene Arrays.
+        Mehrfaches Aufrufen ist unbedenklich.
+        """
+        if self._segments is None:
+            return
+        self._closing = True
+        self._control[0] = STOP
+        try:
+            self._start_barrier.wait(JOIN_TIMEOUT)
+        except threading.BrokenBarrierError:
+            pass
+        for process in self._processes:
+            process.join(JOIN_TIMEOUT)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+        self.particles.positions = self._positions.copy()
+        self.particles.masses = self._masses.copy()
+        del self._positions, self._masses, self._forces, self._control
+        for segment in self._segments.values():
+            segment.close()
+            segment.unlink()
+        self._segments = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
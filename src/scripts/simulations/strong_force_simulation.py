@@ -1,123 +1,219 @@
-import sqlite3
-import time
-import logging
 import os
 import math
-import random
+import numpy as np
+from scripts.storage.db_writer import close_writers, get_writer
+from scripts.storage.backends import SQLiteStorage, open_storage, storage_name
+from scripts.funcs.cores import available_cores
+from scripts.funcs.metrics import timer
+from scripts.funcs.pacing import make_pacer
+from scripts.funcs.sim_logging import get_simulation_logger
+from scripts.storage.checkpoint import CHECKPOINT_INTERVAL, Checkpointer, restore_rng, rng_state
+from scripts.storage.schema import create_run, finish_run
+from scripts.simulations.particle_system import ParticleSystem
+from scripts.simulations.barnes_hut import DEFAULT_THETA, barnes_hut_forces
+from scripts.simulations.cell_list import BOUNDARIES, NeighborList, cutoff_forces, wrap_positions
+from scripts.simulations.kernel_backends import get_kernels, kernel_backend_name
+from scripts.simulations.shared_forces import SharedForcePool
 
-# Logging-Konfiguration
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH = os.path.join(BASE_DIR, '..', '..', 'database', 'simulation_data.db')
-LOG_PATH = os.path.join(BASE_DIR, '..', '..', 'logs', 'simulations.log')
 
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(LOG_PATH),
-        logging.StreamHandler()
-    ]
-)
+# Logging-Konfiguration (Level und Sampling je Simulation über scripts.funcs.sim_logging.configure_logging)
+logger = get_simulation_logger('strong_force')
 
 # Konstanten
 STRONG_FORCE_CONSTANT = 1.0  # Starke Wechselwirkungskonstante (willkürlicher Wert für Simulation)
 PARTICLE_COUNT = 5  # Anzahl der Teilchen in der Simulation
 BOX_SIZE = 10.0  # Größe des Simulationsbereichs (willkürlicher Würfel in Einheiten)
+CUTOFF_RADIUS = 2.0  # Reichweite der starken Wechselwirkung im Cutoff-Modus (in Einheiten)
 
-def initialize_particles():
+# Läufe, in die insert_strong_force_data ohne storage schreibt (je Datenbank)
+_legacy_runs = {}
+
+def initialize_particles(count=PARTICLE_COUNT, rng=None, box_size=BOX_SIZE):
     """
     Initialisiert die Teilchen mit zufälligen Positionen und Massen.
     """
-    particles = []
-    for i in range(PARTICLE_COUNT):
-        particle = {
-            'id': i,
-            'position': [random.uniform(0, BOX_SIZE) for _ in range(3)],
-            'mass': random.uniform(1.0, 10.0)
-        }
-        particles.append(particle)
-    return particles
-
-def compute_strong_force(p1, p2):
+    return ParticleSystem.random(count, box_size, rng=rng)
+
+def legacy_particles(particles):
     """
-    Berechnet die starke Wechselwirkung zwischen zwei Teilchen.
+    Wandelt eine Liste von Teilchen-dicts ({'id', 'position', 'mass'}) der alten Schnittstelle in ein ParticleSystem.
     """
-    distance = math.sqrt(sum((p1['position'][i] - p2['position'][i]) ** 2 for i in range(3)))
-    if distance == 0:
-        return 0  # Vermeidet Division durch Null
-    force = STRONG_FORCE_CONSTANT * (p1['mass'] * p2['mass']) / (distance ** 2)
-    return force
+    return ParticleSystem([particle['position'] for particle in particles], np.zeros((len(particles), 3)),
+                          [particle['mass'] for particle in particles], [particle['id'] for particle in particles])
 
-def update_particle_positions(particles, forces, dt):
+def compute_strong_force(particles, chunk_size=None, solver='direct', theta=DEFAULT_THETA,
+                         cutoff=CUTOFF_RADIUS, boundary='open', neighbor_list=None,
+                         constant=STRONG_FORCE_CONSTANT, box_size=BOX_SIZE, kernel_backend=None):
     """
-    Aktualisiert die Positionen der Teilchen basierend auf den Kräften.
+    Berechnet die starke Wechselwirkung zwischen allen Teilchenpaaren mit der Kopplungskonstante constant.
+    Gibt die resultierende Kraft pro Teilchen als Array der Form (N, 3) zurück.
+    solver='direct' summiert exakt über alle Paare (Referenz), solver='barnes_hut'
+    nähert entfernte Teilchengruppen über einen Octree mit Öffnungswinkel theta an.
+    solver='cutoff' berücksichtigt nur Paare mit Abstand < cutoff (Zellgitter oder
+    wiederverwendete Verlet-Nachbarliste) bei offenen oder periodischen Rändern.
+    kernel_backend wählt die Rechenkerne des direkten Lösers (siehe scripts.simulations.kernel_backends).
+    Die alte Form compute_strong_force(p1, p2) mit zwei Teilchen-dicts gibt den Kraftbetrag des Paars zurück.
     """
-    for i, particle in enumerate(particles):
-        acceleration = [forces[i][j] / particle['mass'] for j in range(3)]
-        for j in range(3):
-            particle['position'][j] += acceleration[j] * dt
-
-def insert_strong_force_data(time_step, particles, forces):
+    if isinstance(particles, dict):
+        # Alte Form: das zweite Argument ist das zweite Teilchen
+        p1, p2 = particles, chunk_size
+        distance = math.dist(p1['position'], p2['position'])
+        if distance == 0:
+            return 0  # Vermeidet Division durch Null
+        return constant * (p1['mass'] * p2['mass']) / (distance ** 2)
+    if solver == 'direct':
+        return get_kernels(kernel_backend)['pair_forces'](particles.positions, particles.masses, constant, chunk_size)
+    if solver == 'barnes_hut':
+        return barnes_hut_forces(particles.positions, particles.masses, constant, theta)
+    if solver == 'cutoff':
+        if neighbor_list is not None:
+            return neighbor_list.forces(particles.positions, particles.masses, constant)
+        return cutoff_forces(particles.positions, particles.masses, constant, cutoff, box_size,
+                             boundary == 'periodic', chunk_size)
+    raise ValueError(f"Unbekannter Kraftlöser: {solver}")
+
+def update_particle_positions(particles, forces, dt, kernel_backend=None):
+    """
+    Aktualisiert die Geschwindigkeiten und Positionen der Teilchen basierend auf den Kräften.
+    Eine Liste von Teilchen-dicts (alte Schnittstelle) wird wie bisher ohne Geschwindigkeit um a * dt verschoben.
+    """
+    if not isinstance(particles, ParticleSystem):
+        for particle, force in zip(particles, forces):
+            for j in range(3):
+                particle['position'][j] += force[j] / particle['mass'] * dt
+        return
+    get_kernels(kernel_backend)['update_particles'](particles.positions, particles.velocities, forces, particles.masses, dt)
+
+def insert_strong_force_data(time_step, particles, forces, storage=None):
     """
-    Speichert die Daten der starken Wechselwirkung in der Datenbank.
+    Speichert die Daten der starken Wechselwirkung über das Speicher-Backend des Laufs.
+    Ohne storage (alte Schnittstelle) werden die Zeilen sofort in DB_PATH geschrieben, in einem je Prozess
+    einmal angelegten Lauf.
     """
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    for i, particle in enumerate(particles):
-        force_magnitude = math.sqrt(sum(f ** 2 for f in forces[i]))
-        cursor.execute("""
-        INSERT INTO strong_force_data (time, particle_id, position_x, position_y, position_z, force)
-        VALUES (?, ?, ?, ?, ?, ?)
-        """, (
-            time_step,
-            particle['id'],
-            particle['position'][0],
-            particle['position'][1],
-            particle['position'][2],
-            force_magnitude
-        ))
-
-    conn.commit()
-    conn.close()
-    logging.info(f'Daten für Zeitschritt {time_step} gespeichert.')
-
-def run_strong_force_simulation():
+    if not isinstance(particles, ParticleSystem):
+        particles = legacy_particles(particles)
+    legacy = storage is None
+    if legacy:
+        if DB_PATH not in _legacy_runs:
+            _legacy_runs[DB_PATH] = create_run(DB_PATH, 'strong_force', {'legacy': True})
+        storage = SQLiteStorage(DB_PATH, _legacy_runs[DB_PATH])
+    storage.append('strong_force_data', {
+        'time': time_step,
+        'particle_id': particles.ids,
+        'position_x': particles.positions[:, 0],
+        'position_y': particles.positions[:, 1],
+        'position_z': particles.positions[:, 2],
+        'force': np.linalg.norm(np.asarray(forces, dtype=np.float64), axis=1),
+    })
+    if legacy:
+        get_writer(DB_PATH).flush()
+
+def run_strong_force_simulation(particle_count=PARTICLE_COUNT, chunk_size=None, solver='direct', theta=DEFAULT_THETA,
+                                cutoff=CUTOFF_RADIUS, boundary='open', verlet_skin=None, pacing=None,
+                                resume=True, checkpoint_interval=CHECKPOINT_INTERVAL, db_path=DB_PATH,
+                                storage=None, output=None, total_time=3600 * 24, dt=60, seed=None,
+                                force_constant=STRONG_FORCE_CONSTANT, box_size=BOX_SIZE, workers=None, kernel_backend=None):
     """
-    Führt die Simulation der starken Wechselwirkung durch.
+    Führt die Simulation der starken Wechselwirkung durch. solver wählt den Kraftlöser (siehe compute_strong_force),
+    workers > 1 verteilt den direkten Löser auf Prozesse (siehe scripts.simulations.shared_forces).
+    Übrige Argumente siehe Readme, Abschnitt Nutzung.
     """
-    total_time = 3600 * 24  # Simulation für 24 Stunden
-    dt = 60  # Zeitschritt in Sekunden
-
-    logging.info(f'Simulation startet. Gesamtdauer: {total_time / 3600} Stunden, Zeitschritt: {dt} Sekunden.')
-
-    particles = initialize_particles()
-    current_time = 0
-
-    while current_time <= total_time:
-        # Berechne die Kräfte zwischen den Teilchen
-        forces = [[0, 0, 0] for _ in particles]
-        for i, p1 in enumerate(particles):
-            for j, p2 in enumerate(particles):
-                if i != j:
-                    force_magnitude = compute_strong_force(p1, p2)
-                    direction = [(p2['position'][k] - p1['position'][k]) for k in range(3)]
-                    distance = math.sqrt(sum(d ** 2 for d in direction))
-                    if distance > 0:
-                        direction = [d / distance for d in direction]
-                        forces[i] = [forces[i][k] + force_magnitude * direction[k] for k in range(3)]
-
-        # Aktualisiere die Positionen der Teilchen
-        update_particle_positions(particles, forces, dt)
-
-        # Speichere die Ergebnisse in der Datenbank
-        insert_strong_force_data(current_time, particles, forces)
-
-        # Zeit inkrementieren
-        current_time += dt
-        time.sleep(0.1)  # Simulationsgeschwindigkeit steuern
-
-    logging.info("Simulation der starken Wechselwirkung abgeschlossen.")
+    if boundary not in BOUNDARIES:
+        raise ValueError(f"Unbekannte Randbedingung: {boundary}")
+    if boundary == 'periodic' and solver != 'cutoff':
+        raise ValueError("Periodische Randbedingungen werden nur mit solver='cutoff' unterstützt.")
+    if workers is not None and workers > 1 and solver != 'direct':
+        raise ValueError("Mehrere Worker werden nur mit solver='direct' unterstützt.")
+
+    kernel_backend = kernel_backend_name(kernel_backend)
+    logger.info('Simulation startet. Gesamtdauer: %s Stunden, Zeitschritt: %s Sekunden, Teilchen: %d, Kraftlöser: %s, Kerne: %s.',
+                total_time / 3600, dt, particle_count, solver, kernel_backend)
+
+    checkpointer = Checkpointer(db_path, 'strong_force', checkpoint_interval)
+    checkpoint = checkpointer.load() if resume else None
+    if checkpoint is not None:
+        particles = ParticleSystem.from_arrays(checkpoint.arrays)
+        rng = restore_rng(checkpoint.meta['rng'])
+        step, current_time = checkpoint.step, checkpoint.time
+        logger.info('Simulation fortgesetzt bei Zeit %ss (Schritt %d, Teilchen: %d).', current_time, step, len(particles))
+    else:
+        rng = np.random.default_rng(seed)
+        particles = initialize_particles(particle_count, rng, box_size)
+        step, current_time = 0, 0
+
+    run_id = checkpoint.run_id if checkpoint is not None else None
+    if run_id is None:
+        config = {'particle_count': particle_count, 'solver': solver, 'theta': theta,
+                  'cutoff': cutoff, 'boundary': boundary, 'verlet_skin': verlet_skin, 'total_time': total_time, 'dt': dt,
+                  'seed': seed, 'force_constant': force_constant, 'box_size': box_size, 'kernel_backend': kernel_backend}
+        run_id = create_run(db_path, 'strong_force', config, storage_name(storage), output)
+    storage = open_storage(db_path, run_id, storage)
+    checkpointer.run_id, checkpointer.storage = run_id, storage
+    if checkpoint is not None:
+        # Nach dem Checkpoint geschriebene Zeilen verwerfen und die Ausgaberichtlinie fortsetzen
+        storage.resume('strong_force_data', checkpoint)
+
+    def state():
+        return particles.arrays(), {'rng': rng_state(rng)}
+
+    neighbor_list = None
+    if solver == 'cutoff' and verlet_skin is not None:
+        neighbor_list = NeighborList(cutoff, box_size, verlet_skin, boundary == 'periodic')
+
+    if workers is not None and workers > 1:
+        cores = available_cores()
+        if workers > cores:
+            logger.info('workers=%d auf %d verfügbare Kerne begrenzt.', workers, cores)
+            workers = cores
+
+    pool = None
+    if workers is not None and workers > 1:
+        pool = SharedForcePool(particles, workers, chunk_size, force_constant)
+        logger.info('Kraftberechnung auf %d Prozesse verteilt.', pool.workers)
+
+    pacer = make_pacer(pacing, dt)
+    try:
+        while current_time <= total_time:
+            # Berechne die Kräfte zwischen den Teilchen
+            with timer('step.forces'):
+                if pool is not None:
+                    forces = pool.forces()
+                else:
+                    forces = compute_strong_force(particles, chunk_size, solver, theta, cutoff, boundary, neighbor_list,
+                                                  force_constant, box_size, kernel_backend)
+
+            # Aktualisiere die Positionen der Teilchen
+            with timer('step.integration'):
+                update_particle_positions(particles, forces, dt, kernel_backend)
+                if boundary == 'periodic':
+                    wrap_positions(particles.positions, box_size)
+
+            # Speichere die Ergebnisse in der Datenbank
+            with timer('step.storage'):
+                insert_strong_force_data(current_time, particles, forces, storage)
+
+            step += 1
+            logger.sampled_debug(step, 'Daten für Zeitschritt %s gespeichert.', current_time)
+
+            # Zeit inkrementieren
+            current_time += dt
+            checkpointer.maybe_save(step, current_time, state)
+            pacer.wait()  # Simulationsgeschwindigkeit steuern
+
+        # Endzustand sichern, damit ein erneuter Start nicht von vorne beginnt
+        checkpointer.save(step, current_time, *state())
+        finish_run(db_path, run_id)
+    finally:
+        if pool is not None:
+            pool.close()
+        # Gepufferte Daten auch bei Abbruch schreiben
+        storage.close()
+        close_writers()
+
+    logger.info(pacer.summary())
+    logger.info("Simulation der starken Wechselwirkung abgeschlossen.")
 
 if __name__ == "__main__":
     run_strong_force_simulation()
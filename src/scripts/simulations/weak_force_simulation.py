@@ -0,0 +1,142 @@
+import os
+import math
+import numpy as np
+from scripts.storage.db_writer import close_writers
+from scripts.storage.backends import open_storage, storage_name
+from scripts.funcs.metrics import timer
+from scripts.funcs.pacing import make_pacer
+from scripts.funcs.sim_logging import get_simulation_logger
+from scripts.storage.checkpoint import CHECKPOINT_INTERVAL, Checkpointer, restore_rng, rng_state
+from scripts.storage.schema import create_run, finish_run
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(BASE_DIR, '..', '..', 'database', 'simulation_data.db')
+
+# Logging-Konfiguration (Level und Sampling je Simulation über scripts.funcs.sim_logging.configure_logging)
+logger = get_simulation_logger('weak_force')
+
+# Konstanten
+PARTICLE_COUNT = 100000  # Anzahl der Mutterteilchen zu Beginn der Simulation
+BOX_SIZE = 10.0  # Größe des Simulationsbereichs (willkürlicher Würfel in Einheiten)
+HALF_LIVES = (6 * 3600, 18 * 3600)  # Halbwertszeiten der Zerfallskette A -> B -> C in Sekunden (C ist stabil)
+DECAY_CHAIN = tuple(math.log(2) / half_life for half_life in HALF_LIVES)  # Zerfallsraten der instabilen Stufen in 1/s
+SAMPLE_CHUNK = 1 << 20  # Teilchen, deren Zerfallszeiten gleichzeitig gezogen werden
+
+def initialize_particles(count=PARTICLE_COUNT, rng=None):
+    """
+    Verteilt die Teilchen gleichmäßig im Würfel [0, BOX_SIZE)^3 und gibt ihre Positionen als (N, 3)-Array zurück.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    return rng.uniform(0.0, BOX_SIZE, size=(count, 3))
+
+def sample_decays(count, decay_rates, horizon, rng, chunk_size=SAMPLE_CHUNK):
+    """
+    Zieht die Zerfallszeiten aller Teilchen einer Zerfallskette auf einmal statt Schritt für Schritt zu würfeln.
+    Jede Stufe s zerfällt nach einer exponentialverteilten Lebensdauer mit Rate decay_rates[s] in die nächste;
+    die Zerfallszeit der Stufe s ist daher die Summe der Lebensdauern der Stufen 0..s.
+    Gibt die Zerfälle bis einschließlich horizon zeitlich sortiert als (times, particle_ids, stages) zurück.
+    """
+    rates = np.asarray(decay_rates, dtype=np.float64).reshape(-1)
+    if len(rates) == 0 or np.any(rates <= 0):
+        raise ValueError("Die Zerfallskette benötigt mindestens eine positive Zerfallsrate je Stufe.")
+    scales = 1.0 / rates
+
+    times, particle_ids, stages = [], [], []
+    for lo in range(0, count, chunk_size):
+        n = min(chunk_size, count - lo)
+        decay_times = np.cumsum(rng.exponential(scales, size=(n, len(rates))), axis=1)
+        particle, stage = np.nonzero(decay_times <= horizon)
+        times.append(decay_times[particle, stage])
+        particle_ids.append(particle + lo)
+        stages.append(stage)
+
+    times = np.concatenate(times) if times else np.empty(0)
+    particle_ids = np.concatenate(particle_ids) if particle_ids else np.empty(0, dtype=np.int64)
+    stages = np.concatenate(stages) if stages else np.empty(0, dtype=np.int64)
+    order = np.argsort(times, kind='stable')
+    return times[order], particle_ids[order], stages[order]
+
+def insert_weak_force_data(times, particle_ids, decay_rates, positions, storage):
+    """
+    Speichert einen Block von Zerfällen (Zeit, Teilchen, Rate der zerfallenen Stufe, Ort) über das Speicher-Backend des Laufs.
+    """
+    storage.append('weak_force_data', {
+        'time': times,
+        'particle_id': particle_ids,
+        'decay_rate': decay_rates,
+        'position_x': positions[:, 0],
+        'position_y': positions[:, 1],
+        'position_z': positions[:, 2],
+    })
+
+def run_weak_force_simulation(particle_count=PARTICLE_COUNT, decay_rates=DECAY_CHAIN, pacing=None,
+                              resume=True, checkpoint_interval=CHECKPOINT_INTERVAL, db_path=DB_PATH, storage=None,
+                              total_time=3600 * 24, dt=60, seed=None):
+    """
+    Führt die Monte-Carlo-Simulation des schwachen Zerfalls durch. Alle Zerfallszeiten werden zu Beginn gezogen
+    und je Zeitschritt blockweise geschrieben; resume reproduziert sie aus dem gespeicherten Zufallsgenerator.
+    Übrige Argumente siehe Readme, Abschnitt Nutzung.
+    """
+    checkpointer = Checkpointer(db_path, 'weak_force', checkpoint_interval)
+    checkpoint = checkpointer.load() if resume else None
+    if checkpoint is not None:
+        meta = checkpoint.meta
+        particle_count, decay_rates = meta['particle_count'], tuple(meta['decay_rates'])
+        rng = restore_rng(meta['rng'])
+        step, current_time = checkpoint.step, checkpoint.time
+    else:
+        rng = np.random.default_rng(seed)
+        meta = {'particle_count': particle_count, 'decay_rates': list(decay_rates), 'rng': rng_state(rng)}
+        step, current_time = 0, 0
+
+    run_id = checkpoint.run_id if checkpoint is not None else None
+    if run_id is None:
+        config = {'particle_count': particle_count, 'decay_rates': list(decay_rates), 'total_time': total_time, 'dt': dt, 'seed': seed}
+        run_id = create_run(db_path, 'weak_force', config, storage_name(storage))
+    storage = open_storage(db_path, run_id, storage)
+    checkpointer.run_id, checkpointer.storage = run_id, storage
+    if checkpoint is not None:
+        # Nach dem Checkpoint geschriebene Zeilen verwerfen
+        storage.discard_after('weak_force_data', current_time)
+
+    logger.info('Simulation startet. Gesamtdauer: %s Stunden, Zeitschritt: %s Sekunden, Teilchen: %d, Zerfallsraten: %s.',
+                total_time / 3600, dt, particle_count, decay_rates)
+
+    positions = initialize_particles(particle_count, rng)
+    times, particle_ids, stages = sample_decays(particle_count, decay_rates, total_time, rng)
+    rates = np.asarray(decay_rates)
+    logger.info('%d Zerfälle gezogen.', len(times))
+    if checkpoint is not None:
+        logger.info('Simulation fortgesetzt bei Zeit %ss (Schritt %d).', current_time, step)
+
+    pacer = make_pacer(pacing, dt)
+    try:
+        while current_time <= total_time:
+            # Zerfälle dieses Zeitschritts auswählen und speichern
+            lo, hi = np.searchsorted(times, [current_time, current_time + dt])
+            with timer('step.storage'):
+                insert_weak_force_data(times[lo:hi], particle_ids[lo:hi], rates[stages[lo:hi]], positions[particle_ids[lo:hi]], storage)
+
+            step += 1
+            logger.sampled_debug(step, 'Zeit %ss: %d Zerfälle gespeichert.', current_time, hi - lo)
+
+            # Zeit inkrementieren
+            current_time += dt
+            checkpointer.maybe_save(step, current_time, lambda: ({}, meta))
+            pacer.wait()  # Simulationsgeschwindigkeit steuern
+
+        # Endzustand sichern, damit ein erneuter Start nicht von vorne beginnt
+        checkpointer.save(step, current_time, {}, meta)
+        finish_run(db_path, run_id)
+    finally:
+        # Gepufferte Daten auch bei Abbruch schreiben
+        storage.close()
+        close_writers()
+
+    logger.info('Zerfälle je Stufe: %s', np.bincount(stages, minlength=len(rates)).tolist())
+    logger.info(pacer.summary())
+    logger.info("Simulation der schwachen Wechselwirkung abgeschlossen.")
+
+if __name__ == "__main__":
+    run_weak_force_simulation()
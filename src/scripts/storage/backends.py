@@ -0,0 +1,219 @@
+import itertools
+import numpy as np
+from scripts.funcs.metrics import count
+from scripts.storage.checkpoint import discard_aggregates_after, discard_rows_after
+from scripts.storage.columnar import CHUNK_ROWS, COMPRESSION_LEVEL, ColumnStore, store_path
+from scripts.storage.db_writer import get_writer
+from scripts.storage.output_policy import EVENT_TABLES, TableOutput
+from scripts.storage.schema import DATA_COLUMNS, NUMPY_TYPES, run_output, run_storage
+
+DEFAULT_STORAGE = 'sqlite'
+
+class StorageBackend:
+    """
+    Schnittstelle, über die alle insert_*-Funktionen die Datenzeilen eines Laufs schreiben.
+    append erhält je Spalte ein Array (oder einen Skalar für alle Zeilen) statt einzelner Zeilen.
+    """
+
+    name = None
+    flush_checkpoints = False  # Checkpoints sofort schreiben statt mit den übrigen Zeilen des Writers zu bündeln
+
+    def __init__(self, db_path, run_id):
+        self.db_path = db_path
+        self.run_id = run_id
+
+    def append(self, table, columns):
+        """
+        Schreibt die Zeilen eines Zeitpunkts; gibt zurück, ob Zeilen geschrieben wurden (siehe OutputStorage).
+        """
+        raise NotImplementedError
+
+    def discard_after(self, table, time):
+        """
+        Verwirft die Zeilen des Laufs mit time >= time (beim Fortsetzen nach einem Checkpoint)
+        samt der daraus zusammengefassten Ergebnisse.
+        """
+        raise NotImplementedError
+
+    def resume(self, table, checkpoint):
+        """
+        Setzt das Schreiben nach einem geladenen Checkpoint fort: verwirft die danach geschriebenen Zeilen.
+        """
+        self.discard_after(table, checkpoint.time)
+
+    def state(self):
+        """
+        Zustand, der mit jedem Checkpoint gespeichert wird, als (arrays, meta) (siehe Checkpointer.save).
+        """
+        return {}, {}
+
+    def flush(self):
+        """
+        Schreibt gepufferte Zeilen, bevor ein Checkpoint gespeichert wird (siehe Checkpointer.save).
+        """
+
+    def close(self):
+        pass
+
+class SQLiteStorage(StorageBackend):
+    """
+    Zeilen in den Datentabellen der Datenbank, gebündelt über den Writer des Prozesses (bzw. den Speicherprozess).
+    Checkpoints laufen über denselben Writer; flush ist daher nicht nötig, um die Reihenfolge zu sichern.
+    """
+
+    name = 'sqlite'
+
+    def append(self, table, columns):
+        lengths = [np.size(values) for values in columns.values() if np.ndim(values) > 0]
+        rows = max(lengths) if lengths else 1
+        count('storage.rows', rows)
+        values = [np.asarray(values).tolist() if np.ndim(values) > 0 else itertools.repeat(np.asarray(values).item(), rows)
+                  for values in columns.values()]
+
+        get_writer(self.db_path).insert(f"""
+    INSERT INTO {table} (run_id, {', '.join(columns)})
+    VALUES ({', '.join('?' * (len(columns) + 1))})
+    """, zip(itertools.repeat(self.run_id, rows), *values))
+        return True
+
+    def discard_after(self, table, time):
+        discard_rows_after(self.db_path, table, time, self.run_id)
+        discard_aggregates_after(self.db_path, table, time, self.run_id)
+
+class ColumnarStorage(StorageBackend):
+    """
+    Spaltendateien je Tabelle und Lauf (siehe scripts.storage.columnar.ColumnStore): Schreiben hängt ganze Arrays
+    an, Lesen bildet die Dateien ohne Umwandlung in den Speicher ab. Lauf und Checkpoints stehen weiterhin in der Datenbank.
+    """
+
+    name = 'columnar'
+    flush_checkpoints = True  # Der Writer puffert hier nur Checkpoints; sie sollen so aktuell wie die Spaltendateien sein
+
+    def __init__(self, db_path, run_id, compression=None, level=COMPRESSION_LEVEL, chunk_rows=CHUNK_ROWS):
+        super().__init__(db_path, run_id)
+        self.compression = compression
+        self.level = level
+        self.chunk_rows = chunk_rows
+        self._stores = {}
+
+    def store(self, table):
+        store = self._stores.get(table)
+        if store is None:
+            fields = {name: NUMPY_TYPES[kind] for name, kind in DATA_COLUMNS[table]}
+            store = self._stores[table] = ColumnStore(store_path(self.db_path, table, self.run_id), 'a',
+                                                      self.compression, self.level, self.chunk_rows, fields)
+        return store
+
+    def append(self, table, columns):
+        self.store(table).append(columns)
+        return True
+
+    def discard_after(self, table, time):
+        self.store(table).discard_after(time)
+        discard_aggregates_after(self.db_path, table, time, self.run_id)
+
+    def flush(self):
+        for store in self._stores.values():
+            store.flush()
+
+    def close(self):
+        for store in self._stores.values():
+            store.close()
+        self._stores = {}
+
+class OutputStorage(StorageBackend):
+    """
+    Ausgaberichtlinie vor einem Backend (siehe scripts.storage.output_policy): reicht je Zeitpunkt nur die
+    ausgewählten Zeilen weiter und hält Richtlinie und Zeitraster je Tabelle in run_outputs fest,
+    damit scripts.storage.reader ausgelassene Zeitpunkte wieder auffüllen kann.
+    """
+
+    def __init__(self, inner, policy):
+        super().__init__(inner.db_path, inner.run_id)
+        self.inner = inner
+        self.policy = policy
+        self.name = inner.name
+        self.flush_checkpoints = inner.flush_checkpoints
+        self._tables = {}
+
+    def output(self, table):
+        output = self._tables.get(table)
+        if output is None:
+            key = 'particle_id' if any(name == 'particle_id' for name, _ in DATA_COLUMNS[table]) else None
+            output = self._tables[table] = TableOutput(table, self.policy, key)
+        return output
+
+    def append(self, table, columns):
+        if table in EVENT_TABLES:
+            return self.inner.append(table, columns)
+        columns = self.output(table).select(columns)
+        return columns is not None and self.inner.append(table, columns)
+
+    def discard_after(self, table, time):
+        self.inner.discard_after(table, time)
+
+    def resume(self, table, checkpoint):
+        meta = checkpoint.meta.get('output', {}).get(table)
+        if meta is not None:
+            prefix = f'output.{table}.'
+            arrays = {name[len(prefix):]: values for name, values in checkpoint.arrays.items() if name.startswith(prefix)}
+            self.output(table).restore(arrays, meta)
+        self.inner.resume(table, checkpoint)
+
+    def state(self):
+        arrays, meta = {}, {}
+        for table, output in self._tables.items():
+            table_arrays, meta[table] = output.state()
+            arrays.update({f'output.{table}.{name}': values for name, values in table_arrays.items()})
+        return arrays, {'output': meta}
+
+    def _record(self):
+        writer = get_writer(self.db_path)
+        for table, output in self._tables.items():
+            writer.execute("""
+    INSERT OR REPLACE INTO run_outputs (run_id, table_name, start, dt, steps)
+    VALUES (?, ?, ?, ?, ?)
+    """, (self.run_id, table) + output.record())
+
+    def flush(self):
+        self.inner.flush()
+        self._record()
+
+    def close(self):
+        self.inner.close()
+        self._record()
+
+# Verfügbare Speicher-Backends je Lauf
+STORAGE_BACKENDS = {
+    'sqlite': SQLiteStorage,
+    'columnar': ColumnarStorage,
+}
+
+def storage_name(storage):
+    """
+    Name des Backends einer Konfiguration: None (Standard), ein Name oder ein dict
+    wie {'backend': 'columnar', 'compression': 'zlib'}.
+    """
+    if storage is None:
+        return DEFAULT_STORAGE
+    name = storage if isinstance(storage, str) else storage.get('backend', DEFAULT_STORAGE)
+    if name not in STORAGE_BACKENDS:
+        raise ValueError(f"Unbekanntes Speicher-Backend: {name}")
+    return name
+
+def open_storage(db_path, run_id, storage=None):
+    """
+    Öffnet das Backend des Laufs run_id. Maßgeblich sind das beim Anlegen des Laufs gespeicherte Backend und
+    die Ausgaberichtlinie (siehe scripts.storage.schema.create_run), damit ein fortgesetzter Lauf dort weiterschreibt;
+    die Optionen aus storage gelten nur, wenn sie dasselbe Backend nennen.
+    """
+    name = run_storage(db_path, run_id)
+    options = {}
+    if isinstance(storage, dict) and storage_name(storage) == name:
+        options = {key: value for key, value in storage.items() if key != 'backend'}
+    backend = STORAGE_BACKENDS[name](db_path, run_id, **options)
+
+    policy = run_output(db_path, run_id)
+    if policy['mode'] == 'all':
+        return backend
+    return OutputStorage(backend, policy)
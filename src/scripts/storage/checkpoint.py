@@ -0,0 +1,146 @@
+import io
+import json
+import sqlite3
+import numpy as np
+from scripts.funcs.metrics import timer
+from scripts.storage.db_writer import get_writer
+from scripts.storage.schema import migrate
+
+# Anzahl der Ausgabeschritte zwischen zwei Checkpoints (0 schaltet periodische Checkpoints ab)
+CHECKPOINT_INTERVAL = 60
+
+class Checkpoint:
+    """
+    Geladener Simulationszustand: Schrittzähler, nächster Simulationszeitpunkt, Arrays, Metadaten und Lauf.
+    """
+
+    def __init__(self, name, step, time, arrays, meta, run_id=None):
+        self.name = name
+        self.step = step
+        self.time = time
+        self.arrays = arrays
+        self.meta = meta
+        self.run_id = run_id
+
+def init_checkpoint_table(db_path):
+    """
+    Erstellt die Tabelle für Checkpoints, falls noch nicht vorhanden (siehe scripts.storage.schema).
+    """
+    migrate(db_path)
+
+def encode_arrays(arrays, compress=False):
+    """
+    Serialisiert ein dict aus NumPy-Arrays in das kompakte NPZ-Binärformat.
+    """
+    buffer = io.BytesIO()
+    if compress:
+        np.savez_compressed(buffer, **arrays)
+    else:
+        np.savez(buffer, **arrays)
+    return buffer.getvalue()
+
+def decode_arrays(blob):
+    with np.load(io.BytesIO(blob), allow_pickle=False) as data:
+        return {key: data[key] for key in data.files}
+
+def rng_state(rng):
+    """
+    Gibt den Zustand eines numpy.random.Generator als JSON-taugliches dict zurück.
+    """
+    return rng.bit_generator.state
+
+def restore_rng(state):
+    """
+    Erzeugt einen numpy.random.Generator mit dem gespeicherten Zustand.
+    """
+    bit_generator = getattr(np.random, state['bit_generator'])()
+    bit_generator.state = state
+    return np.random.Generator(bit_generator)
+
+def save_checkpoint(db_path, name, step, time, arrays, meta, compress=False, run_id=None):
+    """
+    Speichert den Zustand über den Writer der Simulation. Da der Checkpoint in derselben Reihenfolge
+    und Transaktionsfolge wie die Simulationsdaten geschrieben wird, ist er nie neuer als die gespeicherten Daten.
+    """
+    get_writer(db_path).execute("""
+    INSERT OR REPLACE INTO simulation_checkpoints (name, step, time, meta, data, run_id)
+    VALUES (?, ?, ?, ?, ?, ?)
+    """, (name, step, time, json.dumps(meta), encode_arrays(arrays, compress), run_id))
+
+def load_checkpoint(db_path, name):
+    """
+    Lädt den letzten Checkpoint einer Simulation oder gibt None zurück.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        row = conn.execute(
+            "SELECT step, time, meta, data, run_id FROM simulation_checkpoints WHERE name = ?", (name,)
+        ).fetchone()
+    except sqlite3.OperationalError:
+        row = None  # Tabelle existiert noch nicht
+    finally:
+        conn.close()
+
+    if row is None:
+        return None
+    step, time, meta, data, run_id = row
+    return Checkpoint(name, step, time, decode_arrays(data), json.loads(meta), run_id)
+
+def discard_rows_after(db_path, table, time, run_id=None):
+    """
+    Verwirft Zeilen des Laufs run_id, die nach dem Checkpoint geschrieben wurden,
+    damit sie beim Fortsetzen nicht doppelt vorkommen.
+    """
+    if run_id is None:
+        get_writer(db_path).execute(f"DELETE FROM {table} WHERE time >= ?", (time,))
+    else:
+        get_writer(db_path).execute(f"DELETE FROM {table} WHERE run_id = ? AND time >= ?", (run_id, time))
+
+def discard_aggregates_after(db_path, table, time, run_id):
+    """
+    Verwirft die aus den Zeilen des Laufs mit time >= time zusammengefassten Ergebnisse und setzt die Marke der
+    Aggregation (siehe scripts.orchestration.aggregation) zurück, damit neu geschriebene Zeilen erneut eingehen.
+    """
+    writer = get_writer(db_path)
+    writer.execute("DELETE FROM results WHERE run_id = ? AND source = ? AND time >= ?", (run_id, table, time))
+    writer.execute("UPDATE aggregation_marks SET time = MIN(time, ?) WHERE run_id = ? AND table_name = ?", (time, run_id, table))
+
+class Checkpointer:
+    """
+    Speichert den Zustand einer Simulation alle interval Ausgabeschritte und lädt ihn beim Fortsetzen.
+    run_id ordnet die gespeicherten Checkpoints einem Lauf zu. Ist storage gesetzt (siehe scripts.storage.backends),
+    werden dessen gepufferte Zeilen vor jedem Checkpoint geschrieben, sodass der Checkpoint nie neuer als die Daten ist.
+    """
+
+    def __init__(self, db_path, name, interval=CHECKPOINT_INTERVAL, compress=False, run_id=None, storage=None):
+        self.db_path = db_path
+        self.name = name
+        self.interval = interval
+        self.compress = compress
+        self.run_id = run_id
+        self.storage = storage
+        init_checkpoint_table(db_path)
+
+    def load(self):
+        return load_checkpoint(self.db_path, self.name)
+
+    def save(self, step, time, arrays, meta):
+        with timer('step.checkpoint'):
+            if self.storage is not None:
+                self.storage.flush()
+                # Zustand des Backends (z. B. der Ausgaberichtlinie) zusammen mit dem der Simulation sichern
+                storage_arrays, storage_meta = self.storage.state()
+                arrays, meta = {**arrays, **storage_arrays}, {**meta, **storage_meta}
+            save_checkpoint(self.db_path, self.name, step, time, arrays, meta, self.compress, self.run_id)
+            if self.storage is not None and self.storage.flush_checkpoints:
+                get_writer(self.db_path).flush()
+
+    def maybe_save(self, step, time, state):
+        """
+        Speichert, wenn step ein Vielfaches des Intervalls ist, und gibt zurück, ob gespeichert wurde.
+        state() liefert (arrays, meta) und wird nur bei Bedarf aufgerufen.
+        """
+        if self.interval and step % self.interval == 0:
+            self.save(step, time, *state())
+            return True
+        return False
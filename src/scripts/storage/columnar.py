@@ -0,0 +1,254 @@
+import bisect
+import json
+import os
+import shutil
+import zlib
+import numpy as np
+from scripts.funcs.metrics import count, timer
+
+MANIFEST = 'manifest.json'
+FORMAT_VERSION = 1
+
+CHUNK_ROWS = 1 << 16  # Gepufferte Zeilen, ab denen ein Block an die Spaltendateien angehängt wird
+COMPRESSIONS = (None, 'zlib')
+COMPRESSION_LEVEL = 6
+
+def columnar_root(db_path):
+    """
+    Verzeichnis der Spaltendaten einer Datenbank: neben der Datei unter columnar/<Name der Datenbank>.
+    """
+    directory, filename = os.path.split(os.path.abspath(db_path))
+    return os.path.join(directory, 'columnar', os.path.splitext(filename)[0])
+
+def store_path(db_path, table, run_id):
+    return os.path.join(columnar_root(db_path), table, f'run-{run_id}')
+
+def remove_run_stores(db_path, run_id):
+    """
+    Löscht die Spaltendaten eines Laufs in allen Tabellen.
+    """
+    root = columnar_root(db_path)
+    if not os.path.isdir(root):
+        return
+    for table in os.listdir(root):
+        path = os.path.join(root, table, f'run-{run_id}')
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+
+class ColumnStore:
+    """
+    Spaltenweise Ablage einer Tabelle eines Laufs: je Feld eine Datei, an die Blöcke nur angehängt werden,
+    und ein Manifest (manifest.json) mit Datentypen, Zeilenzahl und Blockverzeichnis (Zeilen, Zeitbereich,
+    Byte-Bereiche je Feld). Ohne Kompression ist jede Spaltendatei ein rohes Array und wird zum Lesen
+    direkt speicherabgebildet; mit compression='zlib' wird jeder Block einzeln komprimiert.
+    fields legt die Felder und Datentypen eines neuen Speichers fest (sonst aus dem ersten Block).
+    Die Zeilen müssen nach time aufsteigend angehängt werden. Nur was im Manifest steht, gilt als geschrieben;
+    nach einem Absturz werden überzählige Bytes beim nächsten Öffnen zum Schreiben abgeschnitten.
+    """
+
+    def __init__(self, path, mode='r', compression=None, level=COMPRESSION_LEVEL, chunk_rows=CHUNK_ROWS, fields=None):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unbekannte Kompression: {compression}")
+        self.path = path
+        self.mode = mode
+        self.level = level
+        self.chunk_rows = chunk_rows
+        self._buffer = []
+        self._buffered_rows = 0
+        self._maps = {}
+        self._decoded = {}
+
+        manifest_path = os.path.join(path, MANIFEST)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        elif mode == 'r':
+            raise FileNotFoundError(f"Kein Spaltenspeicher unter {path}")
+        else:
+            os.makedirs(path, exist_ok=True)
+            fields = {name: np.dtype(kind).str for name, kind in (fields or {}).items()}
+            self.manifest = {'version': FORMAT_VERSION, 'compression': compression, 'fields': fields, 'rows': 0, 'chunks': []}
+            self._write_manifest()
+        self._chunk_ends = list(np.cumsum([chunk['rows'] for chunk in self.chunks], dtype=np.int64).tolist())
+
+        if mode != 'r':
+            self._truncate_files()
+
+    @property
+    def rows(self):
+        return self.manifest['rows']
+
+    @property
+    def chunks(self):
+        return self.manifest['chunks']
+
+    @property
+    def fields(self):
+        return {name: np.dtype(kind) for name, kind in self.manifest['fields'].items()}
+
+    @property
+    def compression(self):
+        return self.manifest['compression']
+
+    def _field_path(self, name):
+        return os.path.join(self.path, f'{name}.bin')
+
+    def _field_size(self, name):
+        if not self.chunks:
+            return 0
+        offset, length = self.chunks[-1]['offsets'][name]
+        return offset + length
+
+    def _write_manifest(self):
+        # Über eine temporäre Datei ersetzen, damit das Manifest nie halb geschrieben ist
+        manifest_path = os.path.join(self.path, MANIFEST)
+        with open(manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f)
+        os.replace(manifest_path + '.tmp', manifest_path)
+
+    def _truncate_files(self):
+        for name in self.manifest['fields']:
+            path = self._field_path(name)
+            size = self._field_size(name)
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                os.truncate(path, size)
+
+    def append(self, columns):
+        """
+        Puffert einen Block von Zeilen; columns ordnet jedem Feld ein Array oder einen Skalar (für alle Zeilen) zu.
+        """
+        block = {}
+        lengths = set()
+        for name, values in columns.items():
+            values = np.asarray(values)
+            if values.ndim:
+                lengths.add(len(values))
+                values = values.copy()  # Aufrufer verändern ihre Arrays (z. B. Positionen) anschließend weiter
+            block[name] = values
+        if len(lengths) > 1:
+            raise ValueError(f"Die Felder haben unterschiedliche Längen: {sorted(lengths)}.")
+        rows = lengths.pop() if lengths else 1
+        if rows == 0:
+            return
+        count('storage.rows', rows)
+        if not self.manifest['fields']:
+            self.manifest['fields'] = {name: values.dtype.str for name, values in block.items()}
+        elif block.keys() != self.manifest['fields'].keys():
+            raise ValueError(f"Felder {sorted(block)} passen nicht zum Spaltenspeicher {sorted(self.manifest['fields'])}.")
+
+        self._buffer.append((rows, block))
+        self._buffered_rows += rows
+        if self._buffered_rows >= self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        """
+        Hängt die gepufferten Zeilen als einen Block an die Spaltendateien an und aktualisiert das Manifest.
+        """
+        if not self._buffer:
+            return
+        with timer('columnar.flush'):
+            offsets = {}
+            time_range = None
+            for name, kind in self.fields.items():
+                data = np.concatenate([block[name] if block[name].ndim else np.full(rows, block[name])
+                                       for rows, block in self._buffer]).astype(kind, copy=False)
+                if name == 'time':
+                    time_range = [float(data[0]), float(data[-1])]
+                payload = data.tobytes()
+                if self.compression == 'zlib':
+                    payload = zlib.compress(payload, self.level)
+                offset = self._field_size(name)
+                with open(self._field_path(name), 'ab') as f:
+                    f.write(payload)
+                offsets[name] = [offset, len(payload)]
+
+            self.chunks.append({'rows': self._buffered_rows, 'time': time_range, 'offsets': offsets})
+            self.manifest['rows'] += self._buffered_rows
+            self._chunk_ends.append(self.manifest['rows'])
+            self._buffer = []
+            self._buffered_rows = 0
+            self._maps.clear()
+            self._write_manifest()
+
+    def close(self):
+        if self.mode != 'r':
+            self.flush()
+        self._maps.clear()
+        self._decoded.clear()
+
+    def _chunk(self, name, index):
+        """
+        Liest Block index eines Felds (bei Kompression entpackt; der zuletzt gelesene Block je Feld wird behalten).
+        """
+        cached = self._decoded.get(name)
+        if cached is not None and cached[0] == index:
+            return cached[1]
+        offset, length = self.chunks[index]['offsets'][name]
+        with open(self._field_path(name), 'rb') as f:
+            f.seek(offset)
+            payload = f.read(length)
+        if self.compression == 'zlib':
+            payload = zlib.decompress(payload)
+        data = np.frombuffer(payload, dtype=self.fields[name])
+        self._decoded[name] = (index, data)
+        return data
+
+    def column(self, name, start=0, stop=None):
+        """
+        Gibt die Zeilen [start, stop) eines Felds zurück; ohne Kompression als Sicht auf die speicherabgebildete Datei.
+        """
+        stop = self.rows if stop is None else min(stop, self.rows)
+        kind = self.fields[name]
+        if start >= stop:
+            return np.empty(0, dtype=kind)
+        if self.compression is None:
+            data = self._maps.get(name)
+            if data is None:
+                data = self._maps[name] = np.memmap(self._field_path(name), dtype=kind, mode='r', shape=(self.rows,))
+            return data[start:stop]
+
+        first = bisect.bisect_right(self._chunk_ends, start)
+        last = bisect.bisect_left(self._chunk_ends, stop)
+        parts = []
+        for index in range(first, last + 1):
+            begin = self._chunk_ends[index - 1] if index > 0 else 0
+            parts.append(self._chunk(name, index)[max(start - begin, 0):stop - begin])
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def search_time(self, time, side='left'):
+        """
+        Erste Zeile mit time >= time (side='left') bzw. time > time (side='right'); nutzt die Zeitbereiche der Blöcke,
+        sodass nur ein Block gelesen wird.
+        """
+        ends = [chunk['time'][1] for chunk in self.chunks]
+        index = bisect.bisect_left(ends, time) if side == 'left' else bisect.bisect_right(ends, time)
+        if index == len(self.chunks):
+            return self.rows
+        begin = self._chunk_ends[index - 1] if index > 0 else 0
+        return begin + int(np.searchsorted(self._chunk(name='time', index=index), time, side))
+
+    def discard_after(self, time):
+        """
+        Verwirft alle Zeilen mit time >= time (z. B. nach einem Checkpoint geschriebene Zeilen beim Fortsetzen).
+        """
+        self.flush()
+        keep = self.search_time(time)
+        if keep == self.rows:
+            return
+        index = bisect.bisect_right(self._chunk_ends, keep)
+        begin = self._chunk_ends[index - 1] if index > 0 else 0
+        partial = {name: np.array(self.column(name, begin, keep)) for name in self.fields} if keep > begin else None
+
+        # Betroffene Blöcke aus dem Manifest entfernen, Dateien kürzen und den behaltenen Teil neu anhängen
+        del self.chunks[index:]
+        del self._chunk_ends[index:]
+        self.manifest['rows'] = begin
+        self._maps.clear()
+        self._decoded.clear()
+        self._write_manifest()
+        self._truncate_files()
+        if partial is not None:
+            self._buffer.append((keep - begin, partial))
+            self._buffered_rows = keep - begin
+            self.flush()
@@ -0,0 +1,138 @@
+import atexit
+import os
+import sqlite3
+import time
+from scripts.funcs.metrics import count, timer
+
+# Standardwerte für das Schreiben in die Datenbank
+FLUSH_ROWS = 5000  # Anzahl gepufferter Zeilen, ab der geschrieben wird
+FLUSH_SECONDS = 2.0  # Maximale Zeit in Sekunden, die Zeilen im Puffer verbleiben
+BUSY_TIMEOUT_MS = 30000  # Wartezeit, falls ein anderer Prozess die Datenbank sperrt
+
+# Pragmas für schnelles, dennoch absturzsicheres Schreiben im WAL-Modus
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'temp_store': 'MEMORY',
+    'cache_size': -65536,  # 64 MiB Seitencache
+    'busy_timeout': BUSY_TIMEOUT_MS,
+}
+
+class DatabaseWriter:
+    """
+    Schreibt Zeilen über eine dauerhaft geöffnete Verbindung gebündelt mit executemany.
+    Zeilen werden gepuffert und geschrieben, sobald flush_rows Zeilen anliegen oder
+    seit dem letzten Schreiben flush_seconds vergangen sind. Die Reihenfolge der Anweisungen bleibt erhalten.
+    """
+
+    def __init__(self, db_path, flush_rows=FLUSH_ROWS, flush_seconds=FLUSH_SECONDS, pragmas=None):
+        self.db_path = db_path
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_MS / 1000)
+        for name, value in {**PRAGMAS, **(pragmas or {})}.items():
+            self.conn.execute(f"PRAGMA {name} = {value}")
+
+        self._batches = []  # Liste aus [sql, zeilen] in Einfügereihenfolge
+        self._pending_rows = 0
+        self._last_flush = time.monotonic()
+        self.rows_written = 0
+        self.flushes = 0
+        atexit.register(self.close)
+
+    @property
+    def closed(self):
+        return self.conn is None
+
+    def insert(self, sql, rows):
+        """
+        Puffert mehrere Zeilen für dieselbe Anweisung und schreibt bei Erreichen eines Grenzwerts.
+        """
+        rows = list(rows)
+        if not rows:
+            return
+        if self._batches and self._batches[-1][0] == sql:
+            self._batches[-1][1].extend(rows)
+        else:
+            self._batches.append([sql, rows])
+        self._pending_rows += len(rows)
+        self._maybe_flush()
+
+    def execute(self, sql, params=()):
+        """
+        Puffert eine einzelne Anweisung (z. B. ein UPDATE) in der richtigen Reihenfolge.
+        """
+        self.insert(sql, [params])
+
+    def _maybe_flush(self):
+        if self._pending_rows >= self.flush_rows or time.monotonic() - self._last_flush >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        """
+        Schreibt alle gepufferten Zeilen in einer Transaktion.
+        """
+        if self._batches:
+            with timer('db.commit'), self.conn:
+                for sql, rows in self._batches:
+                    self.conn.executemany(sql, rows)
+            count('db.rows', self._pending_rows)
+            self.rows_written += self._pending_rows
+            self.flushes += 1
+            self._batches = []
+            self._pending_rows = 0
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        """
+        Schreibt verbleibende Zeilen und schließt die Verbindung. Mehrfaches Aufrufen ist unbedenklich.
+        """
+        if self.conn is None:
+            return
+        try:
+            self.flush()
+        finally:
+            self.conn.close()
+            self.conn = None
+            atexit.unregister(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+# Ein Writer pro Prozess und Datenbankdatei; nach einem fork wird eine neue Verbindung geöffnet
+_writers = {}
+
+# Erzeugt neue Writer; kann ersetzt werden, um z. B. an einen Speicherprozess zu schreiben
+_writer_factory = DatabaseWriter
+
+def set_writer_factory(factory):
+    """
+    Legt fest, womit get_writer in diesem Prozess neue Writer erzeugt.
+    Die Fabrik erhält db_path und die Optionen von get_writer und muss insert, execute, flush und close anbieten.
+    """
+    global _writer_factory
+    _writer_factory = factory
+
+def get_writer(db_path, **options):
+    """
+    Gibt den gemeinsamen Writer dieses Prozesses für db_path zurück und legt ihn bei Bedarf an.
+    options (flush_rows, flush_seconds, pragmas) wirken nur beim Anlegen.
+    """
+    key = (os.getpid(), os.path.abspath(db_path))
+    writer = _writers.get(key)
+    if writer is None or writer.closed:
+        writer = _writer_factory(db_path, **options)
+        _writers[key] = writer
+    return writer
+
+def close_writers():
+    """
+    Schreibt und schließt alle Writer dieses Prozesses.
+    Muss am Ende jeder Simulation aufgerufen werden, da multiprocessing-Kindprozesse keine atexit-Handler ausführen.
+    """
+    pid = os.getpid()
+    for key in [k for k in _writers if k[0] == pid]:
+        _writers.pop(key).close()
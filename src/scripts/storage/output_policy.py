@@ -0,0 +1,167 @@
+import json
+import math
+import numpy as np
+
+# Ausgaberichtlinien je Lauf und Tabelle:
+#   'all'     - jeden Zeitpunkt speichern (Standard)
+#   'every'   - nur jeden k-ten Zeitpunkt speichern (verlustbehaftete Ausdünnung)
+#   'changes' - nur Zeilen speichern, deren Werte sich seit der zuletzt gespeicherten Zeile um mehr als
+#               atol + rtol * |Wert| geändert haben; Wiederholungen werden beim Lesen aufgefüllt (Lauflängenkodierung)
+OUTPUT_MODES = ('all', 'every', 'changes')
+DEFAULT_OUTPUT = 'all'
+
+# Tabellen mit Ereignissen statt Zeitreihen: jede Zeile ist ein eigenes Ereignis und wird nie ausgedünnt
+EVENT_TABLES = ('weak_force_data',)
+
+# Relative Toleranz, mit der die Zeitpunkte eines Laufs auf einem gleichmäßigen Raster liegen müssen
+GRID_TOLERANCE = 1e-9
+
+def make_output_policy(output=None):
+    """
+    Normalisiert eine Ausgabekonfiguration: None, ein Modusname oder ein dict wie {'mode': 'every', 'k': 10}
+    bzw. {'mode': 'changes', 'atol': 1e-6, 'rtol': 0.0}. Ohne Toleranzen speichert 'changes' verlustfrei
+    nur geänderte Zeilen.
+    """
+    if output is None:
+        output = DEFAULT_OUTPUT
+    if isinstance(output, str):
+        output = {'mode': output}
+    mode = output.get('mode', DEFAULT_OUTPUT)
+    if mode not in OUTPUT_MODES:
+        raise ValueError(f"Unbekannte Ausgaberichtlinie: {mode} (erwartet: {', '.join(OUTPUT_MODES)}).")
+
+    if mode == 'every':
+        k = int(output.get('k', 1))
+        if k < 1:
+            raise ValueError("k muss mindestens 1 sein.")
+        return {'mode': mode, 'k': k}
+    if mode == 'changes':
+        atol, rtol = float(output.get('atol', 0.0)), float(output.get('rtol', 0.0))
+        if atol < 0 or rtol < 0:
+            raise ValueError("atol und rtol dürfen nicht negativ sein.")
+        return {'mode': mode, 'atol': atol, 'rtol': rtol}
+    return {'mode': mode}
+
+def encode_policy(policy):
+    return json.dumps(policy, sort_keys=True)
+
+def decode_policy(text):
+    return make_output_policy(json.loads(text))
+
+class TableOutput:
+    """
+    Ausgabezustand einer Tabelle eines Laufs. select entscheidet je Zeitpunkt, welche Zeilen gespeichert werden.
+    key nennt die Spalte, die Teilchen unterscheidet (particle_id): dann wird je Teilchen verglichen und nur die
+    geänderten Teilchen werden gespeichert. Ohne key (gravity_data, electromagnetic_data) wird ein Zeitpunkt
+    nur ganz oder gar nicht gespeichert, da dort die Reihenfolge der Zeilen die Körper bestimmt.
+    Zusätzlich wird das Zeitraster (start, dt, steps) festgehalten, auf dem das Lesen die Lücken wieder auffüllt.
+    """
+
+    def __init__(self, table, policy, key=None):
+        self.table = table
+        self.policy = policy
+        self.key = key
+        self.steps = 0
+        self.start = None
+        self.dt = None
+        self.keys = None  # Sortierte Teilchen-IDs mit zuletzt gespeicherten Werten
+        self.last = None  # Zuletzt gespeicherte Werte je Spalte
+
+    def _check_grid(self, time):
+        if self.start is None:
+            self.start = time
+        elif self.dt is None:
+            self.dt = time - self.start
+            if self.dt <= 0:
+                raise ValueError(f"{self.table}: die Zeitpunkte müssen aufsteigend sein.")
+        elif not math.isclose(time, self.start + self.steps * self.dt, rel_tol=GRID_TOLERANCE,
+                              abs_tol=GRID_TOLERANCE * self.dt):
+            raise ValueError(f"{self.table}: die Ausgaberichtlinie 'changes' benötigt gleichmäßige Zeitschritte "
+                             f"(erwartet {self.start + self.steps * self.dt}, erhalten {time}).")
+
+    def _exceeds(self, values, last):
+        # Vergleich wie numpy.isclose, aber ohne NaN als gleich zu werten
+        tolerance = self.policy['atol'] + self.policy['rtol'] * np.abs(last)
+        return ~(np.abs(values - last) <= tolerance)
+
+    def select(self, columns):
+        """
+        Gibt die zu speichernden Spalten eines Zeitpunkts zurück oder None, wenn nichts gespeichert wird.
+        """
+        mode = self.policy['mode']
+        step = self.steps
+        if mode == 'every':
+            self.steps += 1
+            return columns if step % self.policy['k'] == 0 else None
+
+        self._check_grid(float(np.asarray(columns['time']).reshape(-1)[0]))
+        self.steps += 1
+        names = [name for name in columns if name not in ('time', self.key)]
+        if self.key is None:
+            values = {name: np.array(columns[name], dtype=np.float64, ndmin=1) for name in names}
+            if self.last is not None and all(
+                    values[name].shape == self.last[name].shape and not self._exceeds(values[name], self.last[name]).any()
+                    for name in names):
+                return None
+            self.last = values
+            return columns
+
+        keys = np.asarray(columns[self.key]).reshape(-1)
+        values = {name: np.broadcast_to(np.asarray(columns[name], dtype=np.float64), keys.shape) for name in names}
+        if self.keys is None:
+            changed = np.ones(len(keys), dtype=bool)
+            position = np.zeros(len(keys), dtype=np.int64)
+            known = ~changed
+        else:
+            position = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+            known = self.keys[position] == keys
+            changed = ~known
+            for name in names:
+                changed |= known & self._exceeds(values[name], self.last[name][position])
+        if not changed.any():
+            return None
+
+        # Zuletzt gespeicherte Werte nachführen; neue Teilchen sortiert einfügen
+        update = changed & known
+        if update.any():
+            for name in names:
+                self.last[name][position[update]] = values[name][update]
+        new = changed & ~known
+        if new.any():
+            merged = np.union1d(self.keys if self.keys is not None else np.empty(0, dtype=keys.dtype), keys[new])
+            last = {}
+            for name in names:
+                column = np.empty(len(merged), dtype=np.float64)
+                if self.keys is not None:
+                    column[np.searchsorted(merged, self.keys)] = self.last[name]
+                column[np.searchsorted(merged, keys[new])] = values[name][new]
+                last[name] = column
+            self.keys, self.last = merged, last
+
+        if changed.all():
+            return columns
+        selected = np.flatnonzero(changed)
+        return {name: np.asarray(column)[selected] if np.ndim(column) else column for name, column in columns.items()}
+
+    def record(self):
+        """
+        Zeitraster für die Tabelle run_outputs: (Start, dt, Anzahl der Zeitpunkte).
+        """
+        return self.start, self.dt, self.steps
+
+    def state(self):
+        """
+        Zustand für Checkpoints als (arrays, meta).
+        """
+        arrays = {}
+        if self.last is not None:
+            arrays = {name: column for name, column in self.last.items()}
+            if self.keys is not None:
+                arrays[self.key] = self.keys
+        return arrays, {'steps': self.steps, 'start': self.start, 'dt': self.dt}
+
+    def restore(self, arrays, meta):
+        self.steps, self.start, self.dt = meta['steps'], meta['start'], meta['dt']
+        if arrays:
+            self.keys = arrays.pop(self.key, None) if self.key is not None else None
+            self.last = {name: np.array(column, dtype=np.float64) for name, column in arrays.items()}
@@ -0,0 +1,412 @@
+import os
+import pathlib
+import sqlite3
+import numpy as np
+from scripts.storage.columnar import MANIFEST, ColumnStore, store_path
+from scripts.storage.output_policy import decode_policy
+from scripts.storage.schema import DATA_COLUMNS, NUMPY_TYPES
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(BASE_DIR, '..', '..', 'database', 'simulation_data.db')
+
+CHUNK_ROWS = 65536  # Zeilen pro gelieferten Block; bestimmt den Arbeitsspeicher unabhängig von der Größe des Laufs
+
+def particle_key(table):
+    """
+    Spalte, die die Teilchen eines Zeitpunkts unterscheidet: particle_id bzw. bei gravity_data der Körperindex body
+    (Position der Zeile innerhalb des Zeitpunkts, 0 = Erde, 1 = Mond, ...). None für electromagnetic_data.
+    """
+    if table == 'gravity_data':
+        return 'body'
+    if any(name == 'particle_id' for name, _ in DATA_COLUMNS[table]):
+        return 'particle_id'
+    return None
+
+def _value_columns(table):
+    return [(name, kind) for name, kind in DATA_COLUMNS[table] if name not in ('time', 'particle_id')]
+
+def trajectory_dtype(table, bucket=False):
+    """
+    Strukturierter Datentyp der gelesenen Blöcke: run_id, time, gegebenenfalls body bzw. particle_id und die Messwerte.
+    Mit bucket kommt die Anzahl der gemittelten Zeilen (samples) hinzu; alle Messwerte sind dann Mittelwerte.
+    """
+    fields = [('run_id', np.int64), ('time', np.float64)]
+    key = particle_key(table)
+    if key is not None:
+        fields.append((key, np.int64))
+    for name, kind in _value_columns(table):
+        fields.append((name, np.float64 if bucket else NUMPY_TYPES[kind]))
+    if bucket:
+        fields.append(('samples', np.int64))
+    return np.dtype(fields)
+
+def _query(table, run_id, start, stop, particles, every, bucket, exclude=()):
+    if table not in DATA_COLUMNS:
+        raise ValueError(f"Unbekannte Datentabelle: {table} (erwartet: {', '.join(DATA_COLUMNS)}).")
+    if every < 1:
+        raise ValueError("every muss mindestens 1 sein.")
+    if bucket is not None and bucket <= 0:
+        raise ValueError("bucket muss eine positive Dauer in Sekunden sein.")
+    key = particle_key(table)
+    if particles is not None and key is None:
+        raise ValueError(f"{table} enthält keine Teilchen; particles ist hier nicht möglich.")
+
+    values = [name for name, _ in _value_columns(table)]
+    where, params = [], []
+    if run_id is not None:
+        where.append("run_id = ?")
+        params.append(run_id)
+    if exclude:
+        # Läufe, die read_trajectory gesondert liest (Spaltenformat, aufgefüllte Ausgabe)
+        where.append(f"(run_id IS NULL OR run_id NOT IN ({', '.join('?' * len(exclude))}))")
+        params.extend(exclude)
+    if start is not None:
+        where.append("time >= ?")
+        params.append(start)
+    if stop is not None:
+        where.append("time < ?")
+        params.append(stop)
+    particles = None if particles is None else [int(particle) for particle in np.atleast_1d(particles)]
+    if particles is not None and key == 'particle_id':
+        where.append(f"particle_id IN ({', '.join('?' * len(particles))})")
+        params.extend(particles)
+
+    # Die Fenster folgen der Reihenfolge der Indizes (run_id, time), die bei gleichem Zeitpunkt nach der rowid ordnen;
+    # SQLite liest daher der Reihe nach aus dem Index, ohne das Ergebnis zu sortieren (dafür muss das Fenster der
+    # Schrittnummer vor dem des Körperindex stehen). Innerhalb eines Zeitpunkts nummeriert ROW_NUMBER die Zeilen
+    # nach id, also in Einfügereihenfolge (Körperindex), unabhängig davon, in welcher Reihenfolge SQLite sie liest.
+    columns = ['run_id', 'time']
+    if every > 1:
+        columns.append("DENSE_RANK() OVER (PARTITION BY run_id ORDER BY time) - 1 AS step")
+    if key == 'body':
+        columns.append("ROW_NUMBER() OVER (PARTITION BY run_id, time ORDER BY id) - 1 AS body")
+    elif key is not None:
+        columns.append('particle_id')
+    columns += values
+
+    sql = f"SELECT {', '.join(columns)} FROM {table}"
+    if where:
+        sql += f" WHERE {' AND '.join(where)}"
+    if every == 1:
+        sql += " ORDER BY run_id, time" + {'particle_id': ", particle_id", 'body': ", id"}.get(key, "")
+
+    # Filter auf berechnete Spalten (Körperindex, Schrittnummer) greifen erst nach den Fensterfunktionen
+    outer = []
+    if particles is not None and key == 'body':
+        outer.append(f"body IN ({', '.join('?' * len(particles))})")
+        params.extend(particles)
+    if every > 1:
+        outer.append(f"step % {int(every)} = 0")
+    if outer:
+        sql = f"SELECT * FROM ({sql}) WHERE {' AND '.join(outer)}"
+
+    key_columns = [key] if key else []
+    if bucket is None:
+        return f"SELECT COALESCE(run_id, 0), {', '.join(['time'] + key_columns + values)} FROM ({sql})", params
+
+    # Zeitfenster-Mittelwerte: time ist der Beginn des Fensters, samples die Anzahl der gemittelten Zeilen
+    group = ', '.join(['run_id', 'bucket'] + key_columns)
+    sql = (f"SELECT COALESCE(run_id, 0), bucket * ?, {', '.join(key_columns + [f'AVG({name})' for name in values])}, COUNT(*) "
+           f"FROM (SELECT *, CAST(time / ? AS INTEGER) AS bucket FROM ({sql})) GROUP BY {group} ORDER BY {group}")
+    return sql, [float(bucket)] + [float(bucket)] + params
+
+def _connect(db_path):
+    # Schreibgeschützt öffnen: Lesen während laufender Simulationen, ohne versehentlich eine leere Datenbank anzulegen
+    return sqlite3.connect(pathlib.Path(db_path).resolve().as_uri() + '?mode=ro', uri=True, timeout=30)
+
+def _columnar_runs(conn, run_id):
+    """
+    Läufe, deren Daten im Spaltenformat liegen (alle bzw. nur run_id).
+    """
+    if 'storage' not in {row[1] for row in conn.execute("PRAGMA table_info(runs)")}:
+        return []  # Datenbank aus der Zeit vor den Speicher-Backends
+    sql = "SELECT id FROM runs WHERE storage = 'columnar'"
+    if run_id is None:
+        return [row[0] for row in conn.execute(sql + " ORDER BY id")]
+    return [row[0] for row in conn.execute(sql + " AND id = ?", (run_id,))]
+
+def _split(array, chunk_size):
+    for lo in range(0, len(array), chunk_size):
+        yield array[lo:lo + chunk_size]
+
+def _filled_runs(conn, table, run_id):
+    """
+    Läufe mit der Ausgaberichtlinie 'changes' (alle bzw. nur run_id) und ihr Zeitraster (start, dt, steps) in table.
+    """
+    if 'run_outputs' not in {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}:
+        return {}  # Datenbank aus der Zeit vor den Ausgaberichtlinien
+    sql = ("SELECT o.run_id, r.output, o.start, o.dt, o.steps FROM run_outputs AS o JOIN runs AS r ON r.id = o.run_id "
+           "WHERE o.table_name = ?")
+    params = [table]
+    if run_id is not None:
+        sql += " AND o.run_id = ?"
+        params.append(run_id)
+    return {run: (start, dt, steps) for run, output, start, dt, steps in conn.execute(sql, params)
+            if decode_policy(output)['mode'] == 'changes' and start is not None}
+
+def _store_slices(store, table, start, stop, chunk_size):
+    """
+    Gespeicherte Zeilen [start, stop) eines Spaltenspeichers als Blöcke (time, Teilchen-IDs bzw. None, Messwerte).
+    """
+    values = [name for name, _ in _value_columns(table)]
+    lo = 0 if start is None else store.search_time(start)
+    hi = store.rows if stop is None else store.search_time(stop)
+    for begin in range(lo, hi, chunk_size):
+        end = min(begin + chunk_size, hi)
+        keys = store.column('particle_id', begin, end) if particle_key(table) == 'particle_id' else None
+        yield store.column('time', begin, end), keys, {name: store.column(name, begin, end) for name in values}
+
+def _sql_slices(conn, table, run_id, stop, chunk_size):
+    """
+    Gespeicherte Zeilen eines Laufs mit time < stop in Einfügereihenfolge als Blöcke wie bei _store_slices.
+    """
+    key = particle_key(table)
+    columns = [('time', 'REAL')] + ([('particle_id', 'INTEGER')] if key == 'particle_id' else []) + _value_columns(table)
+    order = {'particle_id': 'time, particle_id', 'body': 'time, id'}.get(key, 'time')
+    sql = f"SELECT {', '.join(name for name, _ in columns)} FROM {table} WHERE run_id = ?"
+    params = [run_id]
+    if stop is not None:
+        sql += " AND time < ?"
+        params.append(stop)
+    dtype = np.dtype([(name, NUMPY_TYPES[kind]) for name, kind in columns])
+
+    cursor = conn.execute(sql + f" ORDER BY {order}", params)
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        block = np.array(rows, dtype=dtype)
+        keys = block['particle_id'] if key == 'particle_id' else None
+        yield block['time'], keys, {name: block[name] for name, _ in _value_columns(table)}
+
+def _concat_slices(first, second):
+    time = np.concatenate([first[0], second[0]])
+    keys = None if first[1] is None else np.concatenate([first[1], second[1]])
+    return time, keys, {name: np.concatenate([column, second[2][name]]) for name, column in first[2].items()}
+
+def _take_slice(part, lo, hi):
+    time, keys, data = part
+    return time[lo:hi], None if keys is None else keys[lo:hi], {name: column[lo:hi] for name, column in data.items()}
+
+def _rebatch(slices, chunk_size):
+    """
+    Fasst kleine Blöcke zusammen, bis sie mindestens chunk_size Zeilen haben.
+    """
+    pending = None
+    for part in slices:
+        pending = part if pending is None else _concat_slices(pending, part)
+        if len(pending[0]) >= chunk_size:
+            yield pending
+            pending = None
+    if pending is not None:
+        yield pending
+
+def _fill_slices(slices, table, grid, start, stop, chunk_size):
+    """
+    Dekodiert einen Lauf mit der Ausgaberichtlinie 'changes': jeder Zeitpunkt start_grid + k * dt des Rasters
+    erhält die zuletzt gespeicherten Werte (je Teilchen bzw. des ganzen Zeitpunkts). Die Werte weichen damit
+    höchstens um die Toleranz der Richtlinie von den berechneten ab. Liefert ganze Zeitpunkte in [start, stop).
+    """
+    origin, dt, steps = grid
+    dt = dt or 1.0  # Ein einzelner Zeitpunkt ohne Schrittweite
+    keyed = particle_key(table) == 'particle_id'
+    state_keys, state = None, None
+    next_step = 0
+    carry = None
+
+    def repeat(until):
+        # Zeitpunkte next_step .. until - 1 mit dem aktuellen Zustand
+        rows = len(next(iter(state.values())))
+        per = max(1, chunk_size // max(rows, 1))
+        for lo in range(next_step, until, per):
+            times = origin + dt * np.arange(lo, min(until, lo + per))
+            if start is not None:
+                times = times[times >= start]
+            if stop is not None:
+                times = times[times < stop]
+            if len(times):
+                keys = np.tile(state_keys, len(times)) if keyed else None
+                yield np.repeat(times, rows), keys, {name: np.tile(column, len(times)) for name, column in state.items()}
+
+    def fill(part):
+        nonlocal state_keys, state, next_step
+        time, keys, data = part
+        index = np.rint((np.asarray(time) - origin) / dt).astype(np.int64)
+        bounds = np.concatenate([[0], np.flatnonzero(np.diff(index)) + 1, [len(index)]])
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            step = int(index[lo])
+            if state is not None:
+                yield from repeat(step)
+            next_step = step
+            if not keyed:
+                state = {name: np.array(column[lo:hi]) for name, column in data.items()}
+                continue
+            group = np.asarray(keys[lo:hi])
+            if state_keys is None or not np.isin(group, state_keys).all():
+                merged = np.union1d(group if state_keys is None else state_keys, group)
+                state = {name: _regrid(state, state_keys, merged, name, column.dtype) for name, column in data.items()}
+                state_keys = merged
+            position = np.searchsorted(state_keys, group)
+            for name, column in data.items():
+                state[name][position] = column[lo:hi]
+
+    def fills():
+        nonlocal carry
+        for part in slices:
+            part = part if carry is None else _concat_slices(carry, part)
+            time = part[0]
+            if len(time) == 0:
+                continue
+            # Den letzten Zeitpunkt zurückhalten, bis alle seine Zeilen gelesen sind
+            end = int(np.searchsorted(time, time[-1]))
+            carry = _take_slice(part, end, len(time))
+            if end:
+                yield from fill(_take_slice(part, 0, end))
+        if carry is not None:
+            yield from fill(carry)
+        if state is not None:
+            yield from repeat(max(steps, next_step + 1))
+
+    yield from _rebatch(fills(), chunk_size)
+
+def _regrid(state, old_keys, keys, name, kind):
+    column = np.zeros(len(keys), dtype=kind)
+    if state is not None:
+        column[np.searchsorted(keys, old_keys)] = state[name]
+    return column
+
+def _filter_slices(slices, table, run_id, particles, every, bucket, chunk_size):
+    """
+    Wendet die Filter von read_trajectory auf die Blöcke eines Laufs an und liefert dasselbe Ergebnis wie die
+    SQL-Abfrage. Zeilen des letzten Zeitpunkts bzw. Zeitfensters eines Blocks werden bis zum nächsten Block
+    zurückgehalten, damit Körperindex, Schrittnummer und Mittelwerte vollständig sind.
+    """
+    key = particle_key(table)
+    dtype = trajectory_dtype(table, bucket is not None)
+    particles = None if particles is None else np.atleast_1d(np.asarray(particles, dtype=np.int64))
+    steps = 0
+
+    def convert(time, keys, data):
+        nonlocal steps
+        new_step = np.empty(len(time), dtype=bool)
+        new_step[0] = True
+        np.not_equal(time[1:], time[:-1], out=new_step[1:])
+        step = np.cumsum(new_step) - 1
+        if key == 'body':
+            keys = np.arange(len(time)) - np.flatnonzero(new_step)[step]
+        mask = np.ones(len(time), dtype=bool)
+        if particles is not None and key == 'body':
+            mask &= np.isin(keys, particles)
+        if every > 1:
+            mask &= (steps + step) % every == 0
+        steps += int(step[-1]) + 1
+
+        time = time[mask]
+        keys = keys[mask] if keys is not None else None
+        data = {name: np.asarray(column)[mask] for name, column in data.items()}
+        if bucket is None:
+            out = np.empty(len(time), dtype=dtype)
+            out['run_id'] = run_id
+            out['time'] = time
+            if key is not None:
+                out[key] = keys
+            for name, column in data.items():
+                out[name] = column
+        else:
+            # Zeitfenster-Mittelwerte je (Fenster, Teilchen), sortiert wie GROUP BY in SQL
+            groups = (time / bucket).astype(np.int64)[:, np.newaxis]
+            if key is not None:
+                groups = np.column_stack([groups, keys])
+            unique, inverse = np.unique(groups, axis=0, return_inverse=True)
+            inverse = inverse.reshape(-1)
+            samples = np.bincount(inverse, minlength=len(unique))
+            out = np.empty(len(unique), dtype=dtype)
+            out['run_id'] = run_id
+            out['time'] = unique[:, 0] * float(bucket)
+            if key is not None:
+                out[key] = unique[:, 1]
+            for name, column in data.items():
+                out[name] = np.bincount(inverse, weights=column, minlength=len(unique)) / samples
+            out['samples'] = samples
+        return out
+
+    carry = None
+    for time, keys, data in slices:
+        if particles is not None and key == 'particle_id':
+            # Wie in SQL: Teilchenfilter vor der Schrittnummerierung
+            selected = np.flatnonzero(np.isin(keys, particles))
+            time, keys = np.asarray(time)[selected], np.asarray(keys)[selected]
+            data = {name: np.asarray(column)[selected] for name, column in data.items()}
+        part = (np.asarray(time), keys, data)
+        if carry is not None:
+            part = _concat_slices(carry, part)
+        time = part[0]
+        if len(time) == 0:
+            continue
+        edge = time if bucket is None else (time / bucket).astype(np.int64)
+        end = int(np.searchsorted(edge, edge[-1]))
+        carry = _take_slice(part, end, len(time))
+        if end:
+            yield from _split(convert(*_take_slice(part, 0, end)), chunk_size)
+    if carry is not None and len(carry[0]):
+        yield from _split(convert(*carry), chunk_size)
+
+def read_trajectory(table, db_path=DB_PATH, run_id=None, start=None, stop=None, particles=None, every=1, bucket=None,
+                    chunk_size=CHUNK_ROWS, decode=True):
+    """
+    Liest eine Datentabelle als Folge von NumPy-Blöcken (strukturierte Arrays, siehe trajectory_dtype) mit höchstens
+    chunk_size Zeilen, sortiert nach run_id, time und Teilchen. Gefiltert wird über die Indizes (run_id, time, ...)
+    nach run_id, Zeitbereich [start, stop) und particles (bei gravity_data die Körperindizes); every liefert jeden
+    every-ten Zeitpunkt, bucket mittelt je Teilchen über Zeitfenster von bucket Sekunden. Zeilen ohne Lauf: run_id 0.
+    Läufe im Spaltenformat und Läufe mit der Ausgaberichtlinie 'changes' folgen auf die übrigen; bei 'changes' werden
+    ausgelassene Zeitpunkte mit den zuletzt gespeicherten Werten aufgefüllt, mit decode=False nicht.
+    """
+    sql, params = _query(table, run_id, start, stop, particles, every, bucket)
+    dtype = trajectory_dtype(table, bucket is not None)
+
+    conn = _connect(db_path)
+    try:
+        columnar = _columnar_runs(conn, run_id)
+        filled = _filled_runs(conn, table, run_id) if decode else {}
+        special = sorted(set(columnar) | set(filled))
+        if run_id is None or not special:
+            if special:
+                sql, params = _query(table, run_id, start, stop, particles, every, bucket, exclude=special)
+            cursor = conn.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield np.array(rows, dtype=dtype)
+
+        for special_run in special:
+            # Gefüllte Läufe ab Beginn lesen: vor start gespeicherte Werte gelten bis zur nächsten Änderung
+            first = None if special_run in filled else start
+            if special_run in columnar:
+                path = store_path(db_path, table, special_run)
+                if not os.path.exists(os.path.join(path, MANIFEST)):
+                    continue
+                slices = _store_slices(ColumnStore(path), table, first, stop, chunk_size)
+            else:
+                slices = _sql_slices(conn, table, special_run, stop, chunk_size)
+            if special_run in filled:
+                slices = _fill_slices(slices, table, filled[special_run], start, stop, chunk_size)
+            yield from _filter_slices(slices, table, special_run, particles, every, bucket, chunk_size)
+    finally:
+        conn.close()
+
+def load_trajectory(table, db_path=DB_PATH, **filters):
+    """
+    Liest eine (gefilterte bzw. ausgedünnte) Tabelle vollständig als ein strukturiertes Array;
+    filters wie bei read_trajectory. Für große Läufe read_trajectory verwenden.
+    """
+    chunks = list(read_trajectory(table, db_path, **filters))
+    if not chunks:
+        return np.empty(0, dtype=trajectory_dtype(table, filters.get('bucket') is not None))
+    return np.concatenate(chunks)
+
+def positions(chunk):
+    """
+    Gibt die Positionen eines Blocks als (M, 3)-Array zurück.
+    """
+    return np.stack([chunk['position_x'], chunk['position_y'], chunk['position_z']], axis=1)
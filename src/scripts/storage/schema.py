@@ -0,0 +1,425 @@
+import json
+import os
+import shutil
+import sqlite3
+import numpy as np
+from scripts.storage.columnar import columnar_root, remove_run_stores
+from scripts.storage.db_writer import get_writer
+from scripts.storage.output_policy import decode_policy, encode_policy, make_output_policy
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(BASE_DIR, '..', '..', 'database', 'simulation_data.db')
+
+# Einzige Quelle für das Datenbankschema. Die Version steht in PRAGMA user_version;
+# migrate() führt alle noch fehlenden Migrationen der Reihe nach aus.
+SCHEMA_VERSION = 7
+
+# Datentabellen mit ihren Spalten (ohne id, timestamp und run_id)
+DATA_COLUMNS = {
+    'gravity_data': (
+        ('time', 'REAL'),
+        ('position_x', 'REAL'), ('position_y', 'REAL'), ('position_z', 'REAL'),
+        ('velocity_x', 'REAL'), ('velocity_y', 'REAL'), ('velocity_z', 'REAL'),
+    ),
+    'electromagnetic_data': (
+        ('time', 'REAL'),
+        ('electric_field', 'REAL'), ('magnetic_field', 'REAL'),
+    ),
+    'strong_force_data': (
+        ('time', 'REAL'), ('particle_id', 'INTEGER'),
+        ('position_x', 'REAL'), ('position_y', 'REAL'), ('position_z', 'REAL'),
+        ('force', 'REAL'),
+    ),
+    'weak_force_data': (
+        ('time', 'REAL'), ('particle_id', 'INTEGER'), ('decay_rate', 'REAL'),
+        ('position_x', 'REAL'), ('position_y', 'REAL'), ('position_z', 'REAL'),
+    ),
+    # Gebündelte Gravitationssysteme (siehe scripts.simulations.ensemble); particle_id = system * Körperzahl + body
+    'ensemble_data': (
+        ('time', 'REAL'), ('particle_id', 'INTEGER'), ('system', 'INTEGER'), ('body', 'INTEGER'),
+        ('position_x', 'REAL'), ('position_y', 'REAL'), ('position_z', 'REAL'),
+        ('velocity_x', 'REAL'), ('velocity_y', 'REAL'), ('velocity_z', 'REAL'),
+    ),
+    # Gekoppelte Simulation aller Kräfte auf einem Teilchensystem (siehe scripts.simulations.coupled_simulation)
+    'coupled_data': (
+        ('time', 'REAL'), ('particle_id', 'INTEGER'),
+        ('position_x', 'REAL'), ('position_y', 'REAL'), ('position_z', 'REAL'),
+        ('velocity_x', 'REAL'), ('velocity_y', 'REAL'), ('velocity_z', 'REAL'),
+        ('force', 'REAL'),
+    ),
+}
+DATA_TABLES = tuple(DATA_COLUMNS)
+
+# NumPy-Datentypen der Spaltentypen (Lesen als Arrays, Spaltenspeicher)
+NUMPY_TYPES = {'REAL': np.float64, 'INTEGER': np.int64}
+
+# Zusammengesetzte Indizes für Abfragen je Lauf, Zeitbereich und Teilchen
+INDEXES = {
+    'gravity_data': (('run_id', 'time'),),
+    'electromagnetic_data': (('run_id', 'time'),),
+    'strong_force_data': (('run_id', 'time', 'particle_id'), ('run_id', 'particle_id', 'time')),
+    'weak_force_data': (('run_id', 'time', 'particle_id'), ('run_id', 'particle_id', 'time')),
+    'ensemble_data': (('run_id', 'time', 'particle_id'), ('run_id', 'particle_id', 'time')),
+    'coupled_data': (('run_id', 'time', 'particle_id'), ('run_id', 'particle_id', 'time')),
+}
+
+# Kompaktes Layout: STRICT-Tabellen ohne timestamp-Spalte; wo die Zeilen einen natürlichen Schlüssel haben,
+# ist die Tabelle selbst nach diesem Schlüssel sortiert (WITHOUT ROWID) und benötigt keinen eigenen Index dafür.
+# gravity_data behält die rowid, da die Reihenfolge der Körper je Zeitpunkt nur durch sie festgelegt ist.
+COMPACT_KEYS = {
+    'electromagnetic_data': ('run_id', 'time'),
+    'strong_force_data': ('run_id', 'time', 'particle_id'),
+    'weak_force_data': ('run_id', 'time', 'particle_id'),
+    'ensemble_data': ('run_id', 'time', 'particle_id'),
+    'coupled_data': ('run_id', 'time', 'particle_id'),
+}
+
+RUN_REFERENCE = 'run_id INTEGER REFERENCES runs(id) ON DELETE CASCADE'
+
+# Ergebnisse je Lauf, Quelltabelle und Zeitschritt (eindeutig ab Version 7); ein erneutes Schreiben desselben
+# Zeitschritts, z. B. nach dem Fortsetzen oder beim erneuten Zusammenfassen, ersetzt die vorhandene Zeile
+INSERT_RESULTS = """
+INSERT OR REPLACE INTO results (run_id, source, time, calculated_force, unified_theory, samples)
+VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+def _data_table_sql(table, compact):
+    columns = [f'{name} {kind}' for name, kind in DATA_COLUMNS[table]]
+    if not compact:
+        return (f"CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, "
+                f"{', '.join(columns)}, {RUN_REFERENCE})")
+
+    key = COMPACT_KEYS.get(table)
+    if key is None:
+        return f"CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY, {', '.join(columns)}, {RUN_REFERENCE}) STRICT"
+    columns = [f'{column} NOT NULL' if column.split()[0] in key else column for column in columns]
+    return (f"CREATE TABLE IF NOT EXISTS {table} ({', '.join(columns)}, run_id INTEGER NOT NULL REFERENCES runs(id) "
+            f"ON DELETE CASCADE, PRIMARY KEY ({', '.join(key)})) STRICT, WITHOUT ROWID")
+
+def _migration_base(conn, compact):
+    """
+    Grundschema: Datentabellen, Ergebnisse, Zustand der Gravitationssimulation und Checkpoints.
+    """
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS runs (
+        id INTEGER PRIMARY KEY,
+        simulation TEXT NOT NULL,
+        started_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        finished_at TEXT,
+        config TEXT NOT NULL DEFAULT '{}',
+        storage TEXT NOT NULL DEFAULT 'sqlite',
+        output TEXT NOT NULL DEFAULT '{"mode": "all"}'
+    )
+    """)
+    for table in DATA_TABLES:
+        conn.execute(_data_table_sql(table, compact))
+
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS results (
+        id INTEGER PRIMARY KEY,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+        calculated_force REAL,
+        unified_theory REAL
+    )
+    """)
+
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS simulation_state (
+        id INTEGER PRIMARY KEY,
+        last_time INTEGER NOT NULL
+    )
+    """)
+
+    conn.execute(f"""
+    CREATE TABLE IF NOT EXISTS simulation_checkpoints (
+        name TEXT PRIMARY KEY,
+        step INTEGER NOT NULL,
+        time REAL NOT NULL,
+        meta TEXT NOT NULL,
+        data BLOB NOT NULL,
+        {RUN_REFERENCE}
+    )
+    """)
+
+def _create_indexes(conn, table):
+    without_rowid = conn.execute(
+        "SELECT sql LIKE '%WITHOUT ROWID%' FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone()[0]
+    for columns in INDEXES[table]:
+        if without_rowid and columns == COMPACT_KEYS.get(table):
+            continue  # Der Primärschlüssel ist bereits dieser Index
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{'_'.join(columns)} ON {table} ({', '.join(columns)})")
+
+def _migration_runs(conn, compact):
+    """
+    Läufe: run_id in Datenbanken aus der Zeit vor der runs-Tabelle nachrüsten und Indizes anlegen.
+    """
+    for table in DATA_TABLES + ('simulation_checkpoints',):
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if 'run_id' not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {RUN_REFERENCE}")
+
+    for table in INDEXES:
+        _create_indexes(conn, table)
+
+def _migration_storage(conn, compact):
+    """
+    Speicher-Backend je Lauf: 'sqlite' (Datentabellen) oder 'columnar' (Spaltendateien, siehe scripts.storage.backends).
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(runs)")}
+    if 'storage' not in columns:
+        conn.execute("ALTER TABLE runs ADD COLUMN storage TEXT NOT NULL DEFAULT 'sqlite'")
+
+def _migration_outputs(conn, compact):
+    """
+    Ausgaberichtlinie je Lauf (siehe scripts.storage.output_policy) und das Zeitraster je Lauf und Tabelle,
+    auf dem beim Lesen nicht gespeicherte Zeitpunkte aufgefüllt werden.
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(runs)")}
+    if 'output' not in columns:
+        conn.execute("""ALTER TABLE runs ADD COLUMN output TEXT NOT NULL DEFAULT '{"mode": "all"}'""")
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS run_outputs (
+        run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+        table_name TEXT NOT NULL,
+        start REAL,
+        dt REAL,
+        steps INTEGER NOT NULL,
+        PRIMARY KEY (run_id, table_name)
+    )
+    """)
+
+def _migration_ensemble(conn, compact):
+    """
+    Gebündelte Gravitationssysteme: Zustände je Ausgabeschritt in ensemble_data und das Ergebnis je System
+    (Status, Endzeit, Schritte, maximale Drift) in ensemble_systems.
+    """
+    conn.execute(_data_table_sql('ensemble_data', compact))
+    _create_indexes(conn, 'ensemble_data')
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS ensemble_systems (
+        run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+        system INTEGER NOT NULL,
+        status TEXT NOT NULL,
+        end_time REAL NOT NULL,
+        steps INTEGER NOT NULL,
+        energy_drift REAL,
+        angular_momentum_drift REAL,
+        PRIMARY KEY (run_id, system)
+    )
+    """)
+
+def _migration_coupled(conn, compact):
+    """
+    Gekoppelte Simulation: Teilchendaten in coupled_data; results erhält run_id und time, damit je Ausgabeschritt
+    die mittlere Gesamtkraft (calculated_force) und die Gesamtenergie aller Kräfte (unified_theory) gespeichert werden.
+    """
+    conn.execute(_data_table_sql('coupled_data', compact))
+    _create_indexes(conn, 'coupled_data')
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(results)")}
+    if 'run_id' not in columns:
+        conn.execute(f"ALTER TABLE results ADD COLUMN {RUN_REFERENCE}")
+    if 'time' not in columns:
+        conn.execute("ALTER TABLE results ADD COLUMN time REAL")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_results_run_id_time ON results (run_id, time)")
+
+def _migration_aggregation(conn, compact):
+    """
+    Aggregation (siehe scripts.orchestration.aggregation): results erhält die Quelltabelle (source) und die Anzahl der
+    zusammengefassten Zeilen (samples); je Lauf und Quelltabelle speichert aggregation_marks den Zeitpunkt, ab dem
+    noch nicht zusammengefasste Zeilen beginnen.
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(results)")}
+    if 'source' not in columns:
+        conn.execute("ALTER TABLE results ADD COLUMN source TEXT")
+    if 'samples' not in columns:
+        conn.execute("ALTER TABLE results ADD COLUMN samples INTEGER")
+    conn.execute("UPDATE results SET source = 'coupled_data' WHERE source IS NULL AND run_id IN "
+                 "(SELECT id FROM runs WHERE simulation = 'coupled')")
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_results_run_id_source_time ON results (run_id, source, time)")
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS aggregation_marks (
+        run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+        table_name TEXT NOT NULL,
+        time REAL NOT NULL,
+        PRIMARY KEY (run_id, table_name)
+    )
+    """)
+
+# Migrationen in aufsteigender Reihenfolge: (Version, Funktion)
+MIGRATIONS = (
+    (1, _migration_base),
+    (2, _migration_runs),
+    (3, _migration_storage),
+    (4, _migration_outputs),
+    (5, _migration_ensemble),
+    (6, _migration_coupled),
+    (7, _migration_aggregation),
+)
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(db_path=DB_PATH, compact=False):
+    """
+    Bringt die Datenbank auf SCHEMA_VERSION und gibt die Version zurück. Bestehende Datenbanken
+    werden ohne Datenverlust erweitert. compact wählt für neu angelegte Tabellen das kompakte Layout
+    (STRICT, WITHOUT ROWID, ohne timestamp-Spalte; benötigt SQLite 3.37 oder höher).
+    Alle ausstehenden Migrationen laufen in einer Transaktion unter Schreibsperre (BEGIN IMMEDIATE); die Version
+    wird erst danach gelesen, sodass gleichzeitig startende Prozesse keine Migration doppelt ausführen.
+    """
+    if compact and sqlite3.sqlite_version_info < (3, 37, 0):
+        raise RuntimeError(f"Das kompakte Layout benötigt SQLite 3.37 oder höher (vorhanden: {sqlite3.sqlite_version}).")
+
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    try:
+        version = schema_version(conn)
+        if version >= SCHEMA_VERSION:
+            return version
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Ein anderer Prozess kann inzwischen migriert haben
+            version = schema_version(conn)
+            for target, migration in MIGRATIONS:
+                if target <= version:
+                    continue
+                migration(conn, compact)
+                conn.execute(f"PRAGMA user_version = {target}")
+                version = target
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return version
+    finally:
+        conn.close()
+
+def create_run(db_path, simulation, config=None, storage='sqlite', output=None):
+    """
+    Legt einen neuen Lauf an und gibt seine run_id zurück. storage nennt das Speicher-Backend der Datenzeilen,
+    output die Ausgaberichtlinie (siehe scripts.storage.output_policy.make_output_policy).
+    """
+    migrate(db_path)
+    output = encode_policy(make_output_policy(output))
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        with conn:
+            cursor = conn.execute("INSERT INTO runs (simulation, config, storage, output) VALUES (?, ?, ?, ?)",
+                                  (simulation, json.dumps(config or {}, default=str), storage, output))
+        return cursor.lastrowid
+    finally:
+        conn.close()
+
+def run_storage(db_path, run_id):
+    """
+    Gibt das Speicher-Backend eines Laufs zurück ('sqlite' für unbekannte Läufe und ältere Datenbanken).
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        row = conn.execute("SELECT storage FROM runs WHERE id = ?", (run_id,)).fetchone()
+    except sqlite3.OperationalError:
+        row = None  # Datenbank ohne Spalte storage
+    finally:
+        conn.close()
+    return row[0] if row is not None else 'sqlite'
+
+def run_output(db_path, run_id):
+    """
+    Gibt die Ausgaberichtlinie eines Laufs zurück ({'mode': 'all'} für unbekannte Läufe und ältere Datenbanken).
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        row = conn.execute("SELECT output FROM runs WHERE id = ?", (run_id,)).fetchone()
+    except sqlite3.OperationalError:
+        row = None  # Datenbank ohne Spalte output
+    finally:
+        conn.close()
+    return decode_policy(row[0]) if row is not None else make_output_policy()
+
+def finish_run(db_path, run_id):
+    """
+    Markiert einen Lauf als beendet. Läuft über den Writer, damit die Markierung nach den Daten geschrieben wird.
+    """
+    get_writer(db_path).execute("UPDATE runs SET finished_at = CURRENT_TIMESTAMP WHERE id = ?", (run_id,))
+
+def list_runs(db_path=DB_PATH, simulation=None):
+    """
+    Gibt alle Läufe als Liste von (id, simulation, started_at, finished_at) zurück.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        sql = "SELECT id, simulation, started_at, finished_at FROM runs"
+        if simulation is None:
+            return conn.execute(sql + " ORDER BY id").fetchall()
+        return conn.execute(sql + " WHERE simulation = ? ORDER BY id", (simulation,)).fetchall()
+    finally:
+        conn.close()
+
+def drop_run(db_path, run_id):
+    """
+    Löscht einen Lauf mit allen zugehörigen Zeilen und Dateien; Schema und übrige Läufe bleiben erhalten.
+    Mit run_id=None werden die Zeilen ohne Laufzuordnung (aus älteren Datenbanken) gelöscht.
+    """
+    condition = "run_id IS NULL" if run_id is None else "run_id = ?"
+    params = () if run_id is None else (run_id,)
+    migrate(db_path)
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        with conn:
+            for table in DATA_TABLES + ('results', 'simulation_checkpoints'):
+                conn.execute(f"DELETE FROM {table} WHERE {condition}", params)
+            if run_id is not None:
+                conn.execute("DELETE FROM run_outputs WHERE run_id = ?", (run_id,))
+                conn.execute("DELETE FROM ensemble_systems WHERE run_id = ?", (run_id,))
+                conn.execute("DELETE FROM aggregation_marks WHERE run_id = ?", (run_id,))
+                conn.execute("DELETE FROM runs WHERE id = ?", (run_id,))
+    finally:
+        conn.close()
+    if run_id is not None:
+        remove_run_stores(db_path, run_id)
+
+def drop_all_runs(db_path=DB_PATH):
+    """
+    Löscht alle Läufe einzeln (einschließlich Zeilen ohne Laufzuordnung) und setzt den Zustand der
+    Gravitationssimulation zurück, ohne die Datenbank neu aufzubauen.
+    """
+    migrate(db_path)
+    for run in list_runs(db_path):
+        drop_run(db_path, run[0])
+    drop_run(db_path, None)
+
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        with conn:
+            conn.execute("UPDATE simulation_state SET last_time = 0")
+    finally:
+        conn.close()
+
+def rebuild_database(db_path=DB_PATH, compact=False):
+    """
+    Löscht alle Tabellen und Spaltendaten und legt das Schema neu an (vollständiges Zurücksetzen).
+    """
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        with conn:
+            for table in DATA_TABLES + ('results', 'simulation_results', 'simulation_state', 'simulation_checkpoints', 'run_outputs', 'ensemble_systems', 'aggregation_marks', 'runs'):
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+            conn.execute("PRAGMA user_version = 0")
+    finally:
+        conn.close()
+    shutil.rmtree(columnar_root(db_path), ignore_errors=True)
+    return migrate(db_path, compact)
+
+def reset_database(db_path=DB_PATH, run_ids=None, rebuild=False):
+    """
+    Setzt die Datenbank zurück, indem die angegebenen Läufe (ohne Angabe alle) gelöscht werden.
+    Schema und Indizes bleiben erhalten; mit rebuild werden alle Tabellen gelöscht und neu erstellt.
+    """
+    if rebuild:
+        rebuild_database(db_path)
+    elif run_ids:
+        for run_id in run_ids:
+            drop_run(db_path, run_id)
+    else:
+        drop_all_runs(db_path)
@@ -0,0 +1,139 @@
+import glob
+import os
+import pathlib
+import shutil
+import sqlite3
+from scripts.storage.columnar import columnar_root, store_path
+from scripts.storage.schema import DATA_TABLES, migrate
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SHARD_DIR = os.path.join(BASE_DIR, '..', '..', 'database', 'shards')
+
+def shard_path(name, run=None, shard_dir=SHARD_DIR):
+    """
+    Pfad des Shards einer Simulation (z. B. 'gravity'), mit run optional je Lauf ein eigener Shard.
+    """
+    filename = f'{name}.db' if run is None else f'{name}-{run}.db'
+    return os.path.join(shard_dir, filename)
+
+def create_shard(name, run=None, shard_dir=SHARD_DIR, compact=False):
+    """
+    Erstellt den Shard einer Simulation mit dem aktuellen Schema und gibt seinen Pfad zurück.
+    Jeder Simulationsprozess schreibt in seine eigene Datei und wartet daher nie auf die Schreibsperre eines anderen.
+    """
+    os.makedirs(shard_dir, exist_ok=True)
+    path = shard_path(name, run, shard_dir)
+    migrate(path, compact)
+    return path
+
+def list_shards(shard_dir=SHARD_DIR):
+    return sorted(glob.glob(os.path.join(shard_dir, '*.db')))
+
+def _shard_tables(conn, schema):
+    return {row[0] for row in conn.execute(f"SELECT name FROM {schema}.sqlite_master WHERE type = 'table'")}
+
+def open_unified(shard_paths=None, shard_dir=SHARD_DIR):
+    """
+    Öffnet eine Verbindung, an die alle Shards schreibgeschützt angehängt (ATTACH) sind.
+    Die temporären Sichten runs und die Datentabellen (gravity_data, electromagnetic_data, ...) vereinigen die
+    gleichnamigen Tabellen aller Shards; die zusätzliche Spalte shard nennt die Herkunft.
+    Die run_id ist nur zusammen mit shard eindeutig. Läufe im Spaltenformat sind in den Sichten nicht enthalten;
+    sie werden je Shard mit scripts.storage.reader gelesen.
+    """
+    if shard_paths is None:
+        shard_paths = list_shards(shard_dir)
+
+    conn = sqlite3.connect(':memory:', uri=True)
+    limit = conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+    if len(shard_paths) > limit:
+        conn.close()
+        raise ValueError(f"Zu viele Shards ({len(shard_paths)}) für ATTACH (max. {limit}); bitte vorher merge_shards ausführen.")
+
+    parts = {table: [] for table in ('runs',) + DATA_TABLES}
+    for index, path in enumerate(shard_paths):
+        schema = f'shard{index}'
+        uri = pathlib.Path(path).resolve().as_uri() + '?mode=ro'
+        conn.execute(f"ATTACH DATABASE ? AS {schema}", (uri,))
+        label = os.path.splitext(os.path.basename(path))[0].replace("'", "''")
+        tables = _shard_tables(conn, schema)
+        for table in parts:
+            if table in tables:
+                parts[table].append(f"SELECT '{label}' AS shard, * FROM {schema}.{table}")
+
+    for table, selects in parts.items():
+        if selects:
+            conn.execute(f"CREATE TEMP VIEW {table} AS {' UNION ALL '.join(selects)}")
+    return conn
+
+def merge_shards(target_path, shard_paths=None, shard_dir=SHARD_DIR, remove=False, vacuum=True):
+    """
+    Führt die Shards samt allen Tabellen und Spaltendaten ihrer Läufe zu einer einzigen Datenbank target_path
+    zusammen und verdichtet sie mit VACUUM. Die Läufe erhalten neue run_ids; die Zeilen behalten ihre Reihenfolge.
+    Die Simulationen müssen dabei beendet sein. Mit remove werden die Shards danach gelöscht.
+    Gibt die Anzahl der übernommenen Datenzeilen zurück.
+    """
+    if shard_paths is None:
+        shard_paths = list_shards(shard_dir)
+
+    migrate(target_path)
+    conn = sqlite3.connect(target_path)
+    rows = 0
+    try:
+        for path in shard_paths:
+            migrate(path)
+            conn.execute("ATTACH DATABASE ? AS shard", (path,))
+
+            # Läufe übernehmen und alte auf neue run_ids abbilden
+            conn.execute("CREATE TEMP TABLE run_map (old INTEGER PRIMARY KEY, new INTEGER)")
+            for run in conn.execute("SELECT id, simulation, started_at, finished_at, config, storage, output FROM shard.runs").fetchall():
+                cursor = conn.execute("INSERT INTO main.runs (simulation, started_at, finished_at, config, storage, output) "
+                                      "VALUES (?, ?, ?, ?, ?, ?)", run[1:])
+                conn.execute("INSERT INTO run_map VALUES (?, ?)", (run[0], cursor.lastrowid))
+                if run[5] == 'columnar':
+                    # Spaltendateien unter der neuen run_id neben die Zieldatenbank kopieren
+                    for table in DATA_TABLES:
+                        source = store_path(path, table, run[0])
+                        if os.path.isdir(source):
+                            shutil.copytree(source, store_path(target_path, table, cursor.lastrowid))
+
+            for table in DATA_TABLES + ('results', 'aggregation_marks', 'simulation_checkpoints', 'run_outputs', 'ensemble_systems'):
+                source = [row[1] for row in conn.execute(f"PRAGMA shard.table_info({table})")]
+                target = {row[1] for row in conn.execute(f"PRAGMA main.table_info({table})")}
+                columns = [column for column in source if column in target and column not in ('id', 'run_id')]
+                select = ', '.join(f's.{column}' for column in columns)
+                order = " ORDER BY s.id" if 'id' in source else ""
+                verb = "INSERT" if table in DATA_TABLES + ('results',) else "INSERT OR REPLACE"
+                cursor = conn.execute(
+                    f"{verb} INTO main.{table} ({', '.join(columns)}, run_id) SELECT {select}, m.new "
+                    f"FROM shard.{table} AS s LEFT JOIN run_map AS m ON m.old = s.run_id{order}"
+                )
+                if table in DATA_TABLES:
+                    rows += cursor.rowcount
+            conn.commit()
+            conn.execute("DROP TABLE run_map")
+            conn.execute("DETACH DATABASE shard")
+
+        if vacuum:
+            conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+    if remove:
+        for path in shard_paths:
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+            shutil.rmtree(columnar_root(path), ignore_errors=True)
+    return rows
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Shards zu einer Datenbank zusammenführen.")
+    parser.add_argument('target', help="Pfad der zusammengeführten Datenbank")
+    parser.add_argument('--shard-dir', default=SHARD_DIR, help="Verzeichnis der Shards")
+    parser.add_argument('--remove', action='store_true', help="Shards nach dem Zusammenführen löschen")
+    args = parser.parse_args()
+
+    merged = merge_shards(args.target, shard_dir=args.shard_dir, remove=args.remove)
+    print(f"{merged} Zeilen nach {args.target} übernommen.")
@@ -0,0 +1,206 @@
+import multiprocessing
+import os
+import queue
+import signal
+import time
+from scripts.funcs.metrics import add_time, configure_metrics, process_report, reset_metrics
+from scripts.storage.db_writer import FLUSH_ROWS, FLUSH_SECONDS, DatabaseWriter, set_writer_factory
+
+# Maximale Anzahl gepufferter Nachrichten; volle Warteschlange bremst die Simulationen (Backpressure)
+QUEUE_SIZE = 64
+
+class QueueWriter:
+    """
+    Writer für Simulationsprozesse: bündelt Zeilen lokal und übergibt sie stapelweise
+    an den Speicherprozess, statt selbst in die Datenbank zu schreiben.
+    """
+
+    def __init__(self, storage_queue, db_path, flush_rows=FLUSH_ROWS, flush_seconds=FLUSH_SECONDS, **_):
+        self.queue = storage_queue
+        self.db_path = db_path
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self._batches = []
+        self._pending_rows = 0
+        self._last_flush = time.monotonic()
+        self.blocked_seconds = 0.0  # Zeit, die put() auf freien Platz in der Warteschlange gewartet hat
+        self.messages = 0
+        self.closed = False
+
+    def insert(self, sql, rows):
+        rows = list(rows)
+        if not rows:
+            return
+        if self._batches and self._batches[-1][0] == sql:
+            self._batches[-1][1].extend(rows)
+        else:
+            self._batches.append([sql, rows])
+        self._pending_rows += len(rows)
+        if self._pending_rows >= self.flush_rows or time.monotonic() - self._last_flush >= self.flush_seconds:
+            self.flush()
+
+    def execute(self, sql, params=()):
+        self.insert(sql, [params])
+
+    def _put(self, message):
+        start = time.monotonic()
+        self.queue.put(message)
+        blocked = time.monotonic() - start
+        self.blocked_seconds += blocked
+        add_time('queue.put', blocked)
+        self.messages += 1
+
+    def flush(self):
+        if self._batches:
+            self._put(('rows', self.db_path, self._batches))
+            self._batches = []
+            self._pending_rows = 0
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        if self.closed:
+            return
+        self.flush()
+        self._put(('stats', os.getpid(), self.blocked_seconds, self.messages))
+        self.closed = True
+
+def attach_storage_queue(storage_queue):
+    """
+    Leitet alle Writer dieses Prozesses an den Speicherprozess um.
+    """
+    set_writer_factory(lambda db_path, **options: QueueWriter(storage_queue, db_path, **options))
+
+def run_with_storage(storage_queue, target, *args, **kwargs):
+    """
+    Einstiegspunkt für Simulationsprozesse, die über den Speicherprozess schreiben.
+    """
+    attach_storage_queue(storage_queue)
+    return target(*args, **kwargs)
+
+def _storage_loop(storage_queue, result_queue, queue_size, flush_rows, flush_seconds, metrics=False):
+    """
+    Hauptschleife des Speicherprozesses: schreibt Nachrichten aus der Warteschlange,
+    bis das Endsignal None eintrifft, und meldet anschließend die Statistik (mit metrics samt dem
+    Bericht des Prozesses unter 'metrics', siehe scripts.funcs.metrics).
+    """
+    # Abbruch mit Strg+C beendet nur die Simulationen; der Speicherprozess leert die Warteschlange bis zum Endsignal
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    reset_metrics()  # Vom Elternprozess geerbte Messwerte verwerfen
+    configure_metrics(metrics)
+
+    writers = {}
+    depth_max = 0
+    depth_sum = 0
+    depth_samples = 0
+    messages = 0
+    producers = {}
+    start = time.monotonic()
+
+    while True:
+        try:
+            message = storage_queue.get(timeout=flush_seconds)
+        except queue.Empty:
+            for writer in writers.values():
+                writer.flush()
+            continue
+
+        try:
+            depth = storage_queue.qsize()
+        except NotImplementedError:  # z. B. unter macOS
+            depth = None
+        if depth is not None:
+            depth_max = max(depth_max, depth)
+            depth_sum += depth
+            depth_samples += 1
+
+        if message is None:
+            break
+        messages += 1
+
+        if message[0] == 'rows':
+            _, db_path, batches = message
+            writer = writers.get(db_path)
+            if writer is None:
+                writer = writers[db_path] = DatabaseWriter(db_path, flush_rows, flush_seconds)
+            for sql, rows in batches:
+                writer.insert(sql, rows)
+        elif message[0] == 'stats':
+            _, pid, blocked_seconds, sent = message
+            producers[pid] = {'blocked_seconds': blocked_seconds, 'messages': sent}
+
+    for writer in writers.values():
+        writer.close()
+    elapsed = time.monotonic() - start
+    rows_written = sum(writer.rows_written for writer in writers.values())
+
+    report = {
+        'rows_written': rows_written,
+        'messages': messages,
+        'transactions': sum(writer.flushes for writer in writers.values()),
+        'elapsed_seconds': elapsed,
+        'rows_per_second': rows_written / elapsed if elapsed > 0 else 0.0,
+        'max_queue_depth': depth_max,
+        'mean_queue_depth': depth_sum / depth_samples if depth_samples else None,
+        'queue_size': queue_size,
+        'producers': producers,
+    }
+    if metrics:
+        # Commit-Latenzen und geschriebene Zeilen
+        report['metrics'] = process_report('storage', elapsed)
+    result_queue.put(report)
+
+class StorageProcess:
+    """
+    Einziger schreibender Prozess für alle Simulationen. Die Simulationen übergeben ihre Zeilen
+    über eine begrenzte Warteschlange, sodass Rechnen und Schreiben überlappen und
+    keine Simulation auf die Schreibsperre von SQLite warten muss. Mit metrics erfasst der Prozess
+    Commit-Latenzen und geschriebene Zeilen; stop liefert sie unter 'metrics' mit.
+    """
+
+    def __init__(self, queue_size=QUEUE_SIZE, flush_rows=FLUSH_ROWS, flush_seconds=FLUSH_SECONDS, metrics=False):
+        self.queue = multiprocessing.Queue(maxsize=queue_size)
+        self._results = multiprocessing.Queue()
+        self._process = multiprocessing.Process(
+            target=_storage_loop,
+            args=(self.queue, self._results, queue_size, flush_rows, flush_seconds, metrics),
+            name='storage'
+        )
+
+    def start(self):
+        self._process.start()
+        return self
+
+    def stop(self):
+        """
+        Sendet das Endsignal, wartet bis alle Zeilen geschrieben sind und gibt die Statistik zurück.
+        """
+        self.queue.put(None)
+        while True:
+            try:
+                report = self._results.get(timeout=1.0)
+                break
+            except queue.Empty:
+                if not self._process.is_alive():
+                    raise RuntimeError("Der Speicherprozess wurde unerwartet beendet.")
+        self._process.join()
+        return report
+
+def format_report(report):
+    """
+    Formatiert die Statistik des Speicherprozesses für die Ausgabe am Ende eines Laufs.
+    """
+    mean_depth = report['mean_queue_depth']
+    blocked = sum(p['blocked_seconds'] for p in report['producers'].values())
+    if mean_depth is None:
+        depth_line = "  Warteschlange: Füllstand nicht verfügbar"
+    else:
+        depth_line = f"  Warteschlange: max. {report['max_queue_depth']} / {report['queue_size']}, Mittel {mean_depth:.2f}"
+
+    lines = [
+        "Speicherprozess:",
+        f"  Geschriebene Zeilen: {report['rows_written']} in {report['transactions']} Transaktionen",
+        f"  Durchsatz: {report['rows_per_second']:.0f} Zeilen/s über {report['elapsed_seconds']:.2f} s",
+        depth_line,
+        f"  Wartezeit der Simulationen durch Backpressure: {blocked:.2f} s",
+    ]
+    return "\n".join(lines)
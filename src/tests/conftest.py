@@ -0,0 +1,42 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+# Die Module werden wie in main.py ab src importiert (from scripts.x import ...)
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+@pytest.fixture
+def random_system():
+    """
+    Liefert eine Funktion, die count zufällige Positionen im Würfel der Kantenlänge box_size und Massen zwischen 1 und 2 erzeugt.
+    """
+    def make(count, seed, box_size=10.0):
+        rng = np.random.default_rng(seed)
+        return rng.uniform(0.0, box_size, size=(count, 3)), rng.uniform(1.0, 2.0, size=count)
+    return make
+
+@pytest.fixture
+def interrupt_after(monkeypatch):
+    """
+    Liefert eine Funktion, die die Simulation der starken Wechselwirkung nach steps Schritten mit KeyboardInterrupt
+    abbricht, wie ein Beenden des Prozesses zwischen zwei Checkpoints. monkeypatch.undo() hebt den Abbruch wieder auf.
+    """
+    from scripts.funcs import pacing
+    from scripts.simulations import strong_force_simulation
+
+    def interrupt(steps):
+        def make_pacer(config, dt):
+            pacer = pacing.make_pacer(config, dt)
+            wait = pacer.wait
+
+            def interrupting_wait():
+                wait()
+                if pacer.steps >= steps:
+                    raise KeyboardInterrupt()
+            pacer.wait = interrupting_wait
+            return pacer
+        monkeypatch.setattr(strong_force_simulation, 'make_pacer', make_pacer)
+    return interrupt
@@ -0,0 +1,83 @@
+import sqlite3
+import numpy as np
+import pytest
+from scripts.orchestration.aggregation import aggregate
+from scripts.simulations.strong_force_simulation import run_strong_force_simulation
+from scripts.storage.backends import open_storage
+from scripts.storage.db_writer import close_writers
+from scripts.storage.schema import create_run, finish_run, migrate
+
+PARTICLES = 5
+
+def results(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT run_id, source, time, calculated_force, unified_theory, samples FROM results "
+                            "ORDER BY run_id, source, time").fetchall()
+    finally:
+        conn.close()
+
+def append_steps(db_path, run_id, times):
+    """
+    Schreibt je Zeitpunkt PARTICLES Zeilen in strong_force_data, deren Kraft sich aus Zeit und Teilchen ergibt.
+    """
+    storage = open_storage(db_path, run_id)
+    ids = np.arange(PARTICLES)
+    for time in times:
+        storage.append('strong_force_data', {'time': time, 'particle_id': ids, 'position_x': 0.0, 'position_y': 0.0,
+                                             'position_z': 0.0, 'force': time + ids})
+    storage.close()
+    close_writers()
+
+def test_incremental_matches_full_aggregation(tmp_path):
+    path = str(tmp_path / 'incremental.db')
+    migrate(path)
+    run_id = create_run(path, 'strong_force')
+    append_steps(path, run_id, range(0, 300, 60))
+
+    # Der letzte Zeitschritt eines laufenden Laufs kann unvollständig sein und wird zurückgehalten
+    assert aggregate(path, ['strong_force_data'], chunk_size=7) == {'strong_force_data': 4}
+    append_steps(path, run_id, range(300, 600, 60))
+    finish_run(path, run_id)
+    close_writers()
+    assert aggregate(path, ['strong_force_data'], chunk_size=7) == {'strong_force_data': 6}
+    assert aggregate(path, ['strong_force_data'], chunk_size=7) == {'strong_force_data': 0}
+
+    incremental = results(path)
+    assert [row[2] for row in incremental] == list(range(0, 600, 60))
+    assert all(row[5] == PARTICLES for row in incremental)
+    for row in incremental:
+        assert row[3] == pytest.approx(row[2] + (PARTICLES - 1) / 2)
+
+    # Ohne Marken von vorne in einem Durchlauf zusammengefasst ergeben sich dieselben Ergebnisse
+    conn = sqlite3.connect(path)
+    conn.execute("DELETE FROM results")
+    conn.execute("DELETE FROM aggregation_marks")
+    conn.commit()
+    conn.close()
+    assert aggregate(path, ['strong_force_data']) == {'strong_force_data': 10}
+    assert results(path) == incremental
+
+def test_resumed_run_is_aggregated_again(tmp_path, interrupt_after, monkeypatch):
+    settings = {'particle_count': 8, 'pacing': {'mode': 'fast'}, 'total_time': 900, 'dt': 60, 'seed': 2,
+                'checkpoint_interval': 4}
+    reference_path = str(tmp_path / 'reference.db')
+    run_strong_force_simulation(db_path=reference_path, **settings)
+    aggregate(reference_path, ['strong_force_data'])
+
+    # Zusammengefasste Zeitschritte nach dem Checkpoint (Schritt 8) werden beim Fortsetzen verworfen und neu berechnet
+    path = str(tmp_path / 'resumed.db')
+    interrupt_after(10)
+    with pytest.raises(KeyboardInterrupt):
+        run_strong_force_simulation(db_path=path, **settings)
+    assert aggregate(path, ['strong_force_data']) == {'strong_force_data': 9}
+
+    monkeypatch.undo()
+    run_strong_force_simulation(db_path=path, **settings)
+    aggregate(path, ['strong_force_data'])
+    assert results(path) == results(reference_path)
+    assert len(results(path)) == 16
+
+def test_unknown_table_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        aggregate(str(tmp_path / 'unknown.db'), ['results'])
@@ -0,0 +1,21 @@
+import numpy as np
+from scripts.simulations.barnes_hut import barnes_hut_forces
+from scripts.simulations.particle_system import pairwise_forces
+
+def test_theta_zero_matches_pairwise_forces(random_system):
+    # Ohne Näherung wird jedes Paar einzeln ausgewertet
+    positions, masses = random_system(400, 0)
+    np.testing.assert_allclose(barnes_hut_forces(positions, masses, 1.5, theta=0.0),
+                               pairwise_forces(positions, masses, 1.5), rtol=1e-9, atol=1e-12)
+
+def test_approximation_error_small(random_system):
+    positions, masses = random_system(2000, 1)
+    exact = pairwise_forces(positions, masses, 1.0)
+    approx = barnes_hut_forces(positions, masses, 1.0, theta=0.5)
+    error = np.linalg.norm(approx - exact, axis=1) / np.linalg.norm(exact, axis=1)
+    assert np.median(error) < 1e-2
+
+def test_small_systems(random_system):
+    assert barnes_hut_forces(np.zeros((1, 3)), np.ones(1), 1.0).shape == (1, 3)
+    positions, masses = random_system(2, 2)
+    np.testing.assert_allclose(barnes_hut_forces(positions, masses, 1.0), pairwise_forces(positions, masses, 1.0))
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+from scripts.simulations.cell_list import NeighborList, cutoff_forces
+from scripts.simulations.particle_system import pairwise_forces
+
+@pytest.mark.parametrize('periodic', [False, True])
+def test_cutoff_forces_match_pairwise_forces(periodic, random_system):
+    positions, masses = random_system(800, 0)
+    box_size = 10.0 if periodic else None
+    expected = pairwise_forces(positions, masses, 1.0, cutoff=2.0, box_size=box_size)
+    np.testing.assert_allclose(cutoff_forces(positions, masses, 1.0, 2.0, 10.0, periodic), expected, rtol=1e-9, atol=1e-12)
+
+@pytest.mark.parametrize('periodic', [False, True])
+def test_neighbor_list_matches_cutoff_forces_while_moving(periodic, random_system):
+    positions, masses = random_system(500, 1)
+    rng = np.random.default_rng(2)
+    neighbor_list = NeighborList(2.0, 10.0, skin=0.4, periodic=periodic)
+    for _ in range(10):
+        expected = cutoff_forces(positions, masses, 1.0, 2.0, 10.0, periodic)
+        np.testing.assert_allclose(neighbor_list.forces(positions, masses, 1.0), expected, rtol=1e-9, atol=1e-12)
+        positions = positions + rng.normal(scale=0.05, size=positions.shape)
+        if periodic:
+            positions %= 10.0
+    # Die Liste wird wiederverwendet, solange sich kein Teilchen weiter als skin / 2 bewegt hat
+    assert 1 < neighbor_list.rebuilds < 10
+
+def test_periodic_cutoff_limited_to_half_box(random_system):
+    positions, masses = random_system(10, 3)
+    with pytest.raises(ValueError):
+        cutoff_forces(positions, masses, 1.0, 6.0, 10.0, periodic=True)
@@ -0,0 +1,106 @@
+import sqlite3
+import numpy as np
+import pytest
+from scripts.simulations import gravity_simulation
+from scripts.simulations.strong_force_simulation import run_strong_force_simulation
+from scripts.storage.checkpoint import (Checkpointer, decode_arrays, discard_rows_after, encode_arrays, restore_rng,
+                                        rng_state)
+from scripts.storage.db_writer import close_writers, get_writer
+from scripts.storage.reader import load_trajectory
+from scripts.storage.schema import list_runs
+
+SETTINGS = {'particle_count': 12, 'pacing': {'mode': 'fast'}, 'total_time': 1200, 'dt': 60, 'seed': 5,
+            'checkpoint_interval': 3}
+
+def test_encode_arrays_round_trip():
+    arrays = {'positions': np.arange(12.0).reshape(4, 3), 'ids': np.arange(4)}
+    for compress in (False, True):
+        decoded = decode_arrays(encode_arrays(arrays, compress))
+        assert set(decoded) == set(arrays)
+        for key, values in arrays.items():
+            np.testing.assert_array_equal(decoded[key], values)
+            assert decoded[key].dtype == values.dtype
+
+def test_restored_rng_continues_sequence():
+    rng = np.random.default_rng(3)
+    rng.random(5)
+    restored = restore_rng(rng_state(rng))
+    np.testing.assert_array_equal(restored.random(5), rng.random(5))
+
+def test_checkpointer_saves_every_interval(tmp_path):
+    path = str(tmp_path / 'checkpoint.db')
+    checkpointer = Checkpointer(path, 'test', interval=3)
+    rng = np.random.default_rng(4)
+    saved = []
+
+    def state():
+        saved.append(step)
+        return {'positions': np.full((2, 3), float(step))}, {'rng': rng_state(rng)}
+
+    written = []
+    for step in range(1, 8):
+        written.append(checkpointer.maybe_save(step, step * 60, state))
+    close_writers()
+
+    assert saved == [3, 6]
+    assert written == [False, False, True, False, False, True, False]
+    checkpoint = checkpointer.load()
+    assert (checkpoint.step, checkpoint.time) == (6, 360)
+    np.testing.assert_array_equal(checkpoint.arrays['positions'], np.full((2, 3), 6.0))
+    np.testing.assert_array_equal(restore_rng(checkpoint.meta['rng']).random(3), rng.random(3))
+
+def test_gravity_time_stored_with_checkpoints(tmp_path, monkeypatch):
+    stored = []
+    monkeypatch.setattr(gravity_simulation, 'update_simulation_time', lambda time, db_path: stored.append(time))
+    gravity_simulation.run_grav_simulation(pacing={'mode': 'fast'}, total_time=600, dt=60, checkpoint_interval=4,
+                                           db_path=str(tmp_path / 'gravity.db'))
+    # Nicht je Schritt, sondern je Checkpoint und einmal am Ende
+    assert stored == [240, 480, 660]
+
+def test_discard_rows_after_checkpoint(tmp_path):
+    path = str(tmp_path / 'discard.db')
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE IF NOT EXISTS strong_force_data (time REAL, particle_id INTEGER)")
+    conn.executemany("INSERT INTO strong_force_data (time, particle_id) VALUES (?, ?)",
+                     [(time, particle) for time in range(0, 360, 60) for particle in range(2)])
+    conn.commit()
+
+    # Zeilen ab dem Zeitpunkt des Checkpoints werden beim Fortsetzen neu geschrieben
+    discard_rows_after(path, 'strong_force_data', 180)
+    get_writer(path).flush()
+    assert [row[0] for row in conn.execute("SELECT DISTINCT time FROM strong_force_data ORDER BY time")] == [0, 60, 120]
+    close_writers()
+    conn.close()
+
+@pytest.mark.parametrize('storage', ['sqlite', 'columnar'])
+def test_resumed_run_matches_uninterrupted_run(tmp_path, interrupt_after, monkeypatch, storage):
+    reference_path = str(tmp_path / 'reference.db')
+    run_strong_force_simulation(db_path=reference_path, storage=storage, **SETTINGS)
+
+    # Abbruch zwei Schritte nach dem Checkpoint bei Schritt 6; die Zeilen danach werden beim Fortsetzen verworfen
+    path = str(tmp_path / 'resumed.db')
+    interrupt_after(8)
+    with pytest.raises(KeyboardInterrupt):
+        run_strong_force_simulation(db_path=path, storage=storage, **SETTINGS)
+    checkpoint = Checkpointer(path, 'strong_force').load()
+    assert (checkpoint.step, checkpoint.time) == (6, 360)
+
+    monkeypatch.undo()
+    run_strong_force_simulation(db_path=path, storage=storage, **SETTINGS)
+
+    assert len(list_runs(path)) == 1
+    expected = load_trajectory('strong_force_data', reference_path)
+    actual = load_trajectory('strong_force_data', path)
+    assert len(actual) == len(expected) == 21 * SETTINGS['particle_count']
+    for name in ('time', 'particle_id', 'position_x', 'position_y', 'position_z', 'force'):
+        np.testing.assert_array_equal(actual[name], expected[name])
+
+def test_finished_run_is_not_repeated(tmp_path):
+    path = str(tmp_path / 'finished.db')
+    run_strong_force_simulation(db_path=path, **SETTINGS)
+    rows = len(load_trajectory('strong_force_data', path))
+
+    # Der Endzustand ist gesichert; ein erneuter Start schreibt keine weiteren Zeitschritte
+    run_strong_force_simulation(db_path=path, **SETTINGS)
+    assert len(load_trajectory('strong_force_data', path)) == rows
+    assert Checkpointer(path, 'strong_force').load().time == SETTINGS['total_time'] + SETTINGS['dt']
@@ -0,0 +1,136 @@
+import os
+import numpy as np
+import pytest
+from scripts.storage.columnar import MANIFEST, ColumnStore
+
+FIELDS = {'time': np.float64, 'particle_id': np.int64, 'force': np.float64}
+
+def write_steps(store, times, particles=3):
+    """
+    Hängt je Zeitpunkt particles Zeilen an; force ergibt sich aus Zeit und Teilchen.
+    """
+    ids = np.arange(particles)
+    for time in times:
+        store.append({'time': float(time), 'particle_id': ids, 'force': time + ids / 10})
+
+def expected(times, particles=3):
+    time = np.repeat(np.asarray(times, dtype=np.float64), particles)
+    ids = np.tile(np.arange(particles), len(times))
+    return time, ids, time + ids / 10
+
+def assert_store(store, times):
+    time, ids, force = expected(times)
+    assert store.rows == len(time)
+    np.testing.assert_array_equal(store.column('time'), time)
+    np.testing.assert_array_equal(store.column('particle_id'), ids)
+    np.testing.assert_array_equal(store.column('force'), force)
+
+def file_sizes(store):
+    return {name: os.path.getsize(os.path.join(store.path, f'{name}.bin')) for name in store.fields}
+
+@pytest.mark.parametrize('compression', [None, 'zlib'])
+def test_append_flush_reopen(tmp_path, compression):
+    path = str(tmp_path / 'store')
+    store = ColumnStore(path, 'a', compression, chunk_rows=7, fields=FIELDS)
+    write_steps(store, range(10))
+    # Gepufferte Zeilen gelten erst nach flush als geschrieben
+    assert store.rows < 30 and ColumnStore(path).rows == store.rows
+    store.close()
+    assert len(store.chunks) > 1
+
+    reader = ColumnStore(path)
+    assert reader.compression == compression
+    assert reader.fields == {name: np.dtype(kind) for name, kind in FIELDS.items()}
+    assert_store(reader, range(10))
+    # Zeilenbereiche über Blockgrenzen hinweg
+    time, _, force = expected(range(10))
+    np.testing.assert_array_equal(reader.column('force', 5, 23), force[5:23])
+    np.testing.assert_array_equal(reader.column('time', 29, 100), time[29:])
+    assert len(reader.column('time', 12, 12)) == 0
+
+    # Erneut zum Anhängen geöffnet, setzt der Speicher hinter den vorhandenen Blöcken fort
+    store = ColumnStore(path, 'a', chunk_rows=7)
+    write_steps(store, range(10, 15))
+    store.close()
+    assert_store(ColumnStore(path), range(15))
+    assert file_sizes(store) == {name: store._field_size(name) for name in store.fields}
+
+def test_zlib_smaller_than_raw(tmp_path):
+    sizes = {}
+    for compression in (None, 'zlib'):
+        store = ColumnStore(str(tmp_path / str(compression)), 'a', compression, fields=FIELDS)
+        store.append({'time': np.zeros(1000), 'particle_id': np.arange(1000), 'force': np.ones(1000)})
+        store.close()
+        sizes[compression] = sum(file_sizes(store).values())
+    assert sizes[None] == 1000 * 24
+    assert sizes['zlib'] < sizes[None]
+
+@pytest.mark.parametrize('compression', [None, 'zlib'])
+def test_search_time(tmp_path, compression):
+    store = ColumnStore(str(tmp_path / 'store'), 'a', compression, chunk_rows=4, fields=FIELDS)
+    write_steps(store, [0, 60, 60, 120, 180])
+    store.close()
+    time = store.column('time')
+    for value in (-1, 0, 30, 60, 120, 150, 180, 240):
+        assert store.search_time(value) == np.searchsorted(time, value, 'left')
+        assert store.search_time(value, 'right') == np.searchsorted(time, value, 'right')
+
+@pytest.mark.parametrize('compression', [None, 'zlib'])
+def test_discard_after_mid_chunk(tmp_path, compression):
+    path = str(tmp_path / 'store')
+    store = ColumnStore(path, 'a', compression, chunk_rows=12, fields=FIELDS)
+    write_steps(store, range(0, 600, 60))
+    store.flush()
+
+    # 360 liegt mitten im dritten Block: dessen vordere Zeilen bleiben, alles ab 360 wird verworfen
+    store.discard_after(360)
+    assert_store(store, range(0, 360, 60))
+    assert file_sizes(store) == {name: store._field_size(name) for name in store.fields}
+
+    # Weiterschreiben wie nach dem Fortsetzen eines Laufs
+    write_steps(store, range(360, 480, 60))
+    store.close()
+    assert_store(ColumnStore(path), range(0, 480, 60))
+
+    store = ColumnStore(path, 'a')
+    store.discard_after(1000)  # Nichts zu verwerfen
+    store.discard_after(0)
+    store.close()
+    assert ColumnStore(path).rows == 0
+    assert set(file_sizes(store).values()) == {0}
+
+@pytest.mark.parametrize('compression', [None, 'zlib'])
+def test_surplus_bytes_truncated_on_open(tmp_path, compression):
+    path = str(tmp_path / 'store')
+    store = ColumnStore(path, 'a', compression, fields=FIELDS)
+    write_steps(store, range(4))
+    store.close()
+    sizes = file_sizes(store)
+
+    # Absturz nach dem Schreiben der Spaltendateien, aber vor dem Manifest: die Bytes gehören zu keinem Block
+    for name in store.fields:
+        with open(os.path.join(path, f'{name}.bin'), 'ab') as f:
+            f.write(b'\x01' * 13)
+
+    # Lesen lässt die Dateien unverändert und liefert nur die Zeilen des Manifests
+    assert_store(ColumnStore(path), range(4))
+    assert file_sizes(store) == {name: size + 13 for name, size in sizes.items()}
+
+    store = ColumnStore(path, 'a')
+    assert file_sizes(store) == sizes
+    write_steps(store, range(4, 6))
+    store.close()
+    assert_store(ColumnStore(path), range(6))
+
+def test_invalid_use(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        ColumnStore(str(tmp_path / 'missing'))
+    with pytest.raises(ValueError):
+        ColumnStore(str(tmp_path / 'store'), 'a', compression='lz4')
+    store = ColumnStore(str(tmp_path / 'store'), 'a', fields=FIELDS)
+    with pytest.raises(ValueError):
+        store.append({'time': np.zeros(2), 'particle_id': np.arange(3), 'force': 1.0})
+    with pytest.raises(ValueError):
+        store.append({'time': 0.0, 'force': 1.0})
+    store.close()
+    assert os.path.exists(os.path.join(store.path, MANIFEST))
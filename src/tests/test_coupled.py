@@ -0,0 +1,32 @@
+import sqlite3
+import numpy as np
+from scripts.simulations.coupled_simulation import insert_results, run_coupled_simulation
+from scripts.storage.db_writer import close_writers
+
+def test_results_rewritten_for_existing_step(tmp_path):
+    path = str(tmp_path / 'coupled.db')
+    run_coupled_simulation(particle_count=20, pacing={'mode': 'fast'}, db_path=path, total_time=600, dt=60, seed=1)
+    conn = sqlite3.connect(path)
+    run_id, time, rows = conn.execute(
+        "SELECT run_id, MAX(time), COUNT(*) FROM results WHERE source = 'coupled_data'").fetchone()
+    assert rows == 11
+
+    # Ein Zeitschritt, der nach dem Fortsetzen erneut geschrieben wird, ersetzt die vorhandene Zeile
+    insert_results(path, run_id, time, np.ones((20, 3)), 1.0)
+    close_writers()
+    assert conn.execute("SELECT COUNT(*) FROM results WHERE source = 'coupled_data'").fetchone()[0] == rows
+    assert conn.execute("SELECT unified_theory FROM results WHERE run_id = ? AND time = ?", (run_id, time)).fetchone()[0] == 1.0
+    conn.close()
+
+def test_results_follow_output_policy(tmp_path):
+    path = str(tmp_path / 'coupled.db')
+    for output in ({'mode': 'every', 'k': 3}, {'mode': 'changes', 'atol': 1e5}):
+        run_coupled_simulation(particle_count=20, pacing={'mode': 'fast'}, resume=False, db_path=path, output=output,
+                               total_time=1200, dt=60, seed=1)
+    conn = sqlite3.connect(path)
+    for run_id in (1, 2):
+        stored = conn.execute("SELECT DISTINCT time FROM coupled_data WHERE run_id = ? ORDER BY time", (run_id,)).fetchall()
+        results = conn.execute("SELECT time FROM results WHERE run_id = ? ORDER BY time", (run_id,)).fetchall()
+        assert 0 < len(stored) < 21
+        assert results == stored
+    conn.close()
@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+from scripts.simulations.ensemble import BatchedGravityEngine, batched_accelerations
+from scripts.simulations.gravity_simulation import initialize_bodies
+from scripts.simulations.nbody import GravityEngine
+
+def test_batched_accelerations_independent_of_block_size():
+    rng = np.random.default_rng(1)
+    positions = rng.normal(size=(200, 5, 3))
+    masses = rng.uniform(1.0, 2.0, size=(200, 5))
+    whole = batched_accelerations(positions, masses, 1.0, pair_budget=10 ** 9)
+    for budget in (1, 25, 7 * 25):
+        np.testing.assert_array_equal(batched_accelerations(positions, masses, 1.0, pair_budget=budget), whole)
+
+@pytest.mark.parametrize('integrator', ['euler', 'leapfrog', 'yoshida4'])
+def test_single_system_matches_gravity_engine(integrator):
+    bodies = initialize_bodies()
+    batched = BatchedGravityEngine(bodies.positions[np.newaxis], bodies.velocities[np.newaxis], bodies.masses[np.newaxis],
+                                   integrator, max_step=60)
+    engine = GravityEngine(bodies, integrator, max_step=60, kernel_backend='numpy')
+    for _ in range(50):
+        engine.advance(600)
+        batched.advance(600)
+    np.testing.assert_allclose(batched.positions[0], bodies.positions, rtol=1e-9, atol=1e-3)
+    np.testing.assert_allclose(batched.velocities[0], bodies.velocities, rtol=1e-9, atol=1e-9)
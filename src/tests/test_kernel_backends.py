@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from scripts.simulations import kernel_backends
+from scripts.simulations.gravity_simulation import (M1, M2, position_earth, position_moon, two_body_step,
+                                                    update_positions_and_velocities, velocity_earth, velocity_moon)
+from scripts.simulations.kernel_backends import get_kernels, kernel_backend_name
+from scripts.simulations.strong_force_simulation import initialize_particles
+
+def test_unknown_backend_raises():
+    with pytest.raises(ValueError):
+        kernel_backend_name('cuda')
+
+def test_numba_falls_back_to_numpy_without_numba(monkeypatch):
+    monkeypatch.setattr(kernel_backends, 'numba', None)
+    assert kernel_backend_name('numba') == 'numpy'
+    assert kernel_backend_name('auto') == 'numpy'
+
+def test_two_body_update_uses_kernel_backend():
+    args = (position_earth, velocity_earth, position_moon, velocity_moon, 2.0e20, M1, M2, 60)
+    assert update_positions_and_velocities(*args, kernel_backend='numpy') == two_body_step(*args)
+
+def test_numba_kernels_match_numpy():
+    pytest.importorskip('numba')
+    numpy_kernels, numba_kernels = get_kernels('numpy'), get_kernels('numba')
+    assert numba_kernels['backend'] == 'numba'
+
+    particles = initialize_particles(200, np.random.default_rng(5))
+    for cutoff, box_size in ((None, None), (2.0, None), (2.0, 10.0)):
+        expected = numpy_kernels['pair_forces'](particles.positions, particles.masses, 3.0, cutoff=cutoff, box_size=box_size)
+        forces = numba_kernels['pair_forces'](particles.positions, particles.masses, 3.0, cutoff=cutoff, box_size=box_size)
+        np.testing.assert_allclose(forces, expected, rtol=1e-10, atol=1e-12 * np.abs(expected).max())
+
+    results = []
+    for kernels in (numpy_kernels, numba_kernels):
+        positions, velocities = particles.positions.copy(), particles.velocities.copy()
+        kernels['update_particles'](positions, velocities, expected, particles.masses, 60.0)
+        results.append((positions, velocities))
+    np.testing.assert_array_equal(results[0][0], results[1][0])
+    np.testing.assert_array_equal(results[0][1], results[1][1])
+
+    args = (position_earth, velocity_earth, position_moon, velocity_moon, 2.0e20, M1, M2, 60)
+    np.testing.assert_allclose(np.array(update_positions_and_velocities(*args, kernel_backend='numba')),
+                               np.array(update_positions_and_velocities(*args, kernel_backend='numpy')), rtol=1e-14)
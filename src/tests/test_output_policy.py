@@ -0,0 +1,169 @@
+import numpy as np
+import pytest
+from scripts.simulations.strong_force_simulation import run_strong_force_simulation
+from scripts.storage.backends import open_storage
+from scripts.storage.checkpoint import Checkpoint
+from scripts.storage.db_writer import close_writers
+from scripts.storage.output_policy import TableOutput, make_output_policy
+from scripts.storage.reader import load_trajectory
+from scripts.storage.schema import create_run, migrate
+
+TIMES = 12
+PARTICLES = 4
+NOISE = 1e-9
+
+def step_columns(step):
+    """
+    Zeitpunkt step: Teilchen p ändert seine Kraft alle p + 1 Schritte, die Positionen schwanken nur um NOISE.
+    """
+    ids = np.arange(PARTICLES)
+    noise = NOISE * np.sin(step + ids)
+    return {'time': step * 60.0, 'particle_id': ids, 'position_x': ids + noise, 'position_y': 0.0, 'position_z': 0.0,
+            'force': (step // (ids + 1)).astype(np.float64)}
+
+def write_run(path, output, storage='sqlite', steps=range(TIMES)):
+    run_id = create_run(path, 'strong_force', output=output, storage=storage)
+    writer = open_storage(path, run_id)
+    for step in steps:
+        writer.append('strong_force_data', step_columns(step))
+    writer.close()
+    close_writers()
+    return run_id
+
+def values(trajectory):
+    return {name: trajectory[name] for name in trajectory.dtype.names if name != 'run_id'}
+
+def test_make_output_policy():
+    assert make_output_policy() == {'mode': 'all'}
+    assert make_output_policy('every') == {'mode': 'every', 'k': 1}
+    assert make_output_policy({'mode': 'changes', 'atol': 1}) == {'mode': 'changes', 'atol': 1.0, 'rtol': 0.0}
+    for output in ('sometimes', {'mode': 'every', 'k': 0}, {'mode': 'changes', 'atol': -1.0}):
+        with pytest.raises(ValueError):
+            make_output_policy(output)
+
+@pytest.mark.parametrize('storage', ['sqlite', 'columnar'])
+def test_every_keeps_every_kth_step(tmp_path, storage):
+    path = str(tmp_path / 'every.db')
+    migrate(path)
+    reference = load_trajectory('strong_force_data', path, run_id=write_run(path, 'all', storage))
+    thinned = load_trajectory('strong_force_data', path, run_id=write_run(path, {'mode': 'every', 'k': 3}, storage))
+    expected = reference[np.isin(reference['time'], np.arange(0, TIMES, 3) * 60.0)]
+    for name, column in values(thinned).items():
+        np.testing.assert_array_equal(column, expected[name])
+
+@pytest.mark.parametrize('storage', ['sqlite', 'columnar'])
+@pytest.mark.parametrize('atol', [0.0, 1e-6])
+def test_changes_filled_like_all(tmp_path, storage, atol):
+    path = str(tmp_path / 'changes.db')
+    migrate(path)
+    reference = load_trajectory('strong_force_data', path, run_id=write_run(path, 'all', storage))
+    run_id = write_run(path, {'mode': 'changes', 'atol': atol}, storage)
+
+    stored = load_trajectory('strong_force_data', path, run_id=run_id, decode=False)
+    assert len(stored) < len(reference) if atol else len(stored) == len(reference)
+    filled = load_trajectory('strong_force_data', path, run_id=run_id)
+    for name, column in values(filled).items():
+        np.testing.assert_allclose(column, reference[name], rtol=0, atol=atol)
+    # Ohne Schwankungen der Positionen ändert sich force exakt nur an den gespeicherten Zeilen
+    np.testing.assert_array_equal(filled['force'], reference['force'])
+
+    # Auffüllen mit Filtern: Werte vor start gelten bis zur nächsten Änderung weiter
+    selected = load_trajectory('strong_force_data', path, run_id=run_id, start=300, particles=[3], every=2)
+    expected = reference[(reference['time'] >= 300) & (reference['particle_id'] == 3)][::2]
+    np.testing.assert_array_equal(selected['force'], expected['force'])
+    np.testing.assert_array_equal(selected['time'], expected['time'])
+
+def test_changes_without_key_skips_whole_steps(tmp_path):
+    path = str(tmp_path / 'gravity.db')
+    migrate(path)
+    runs = {}
+    for output in ('all', {'mode': 'changes'}):
+        run_id = runs[str(output)] = create_run(path, 'gravity', output=output)
+        writer = open_storage(path, run_id)
+        for step in range(TIMES):
+            # Zwei Körper, die nur bei jedem vierten Zeitpunkt springen
+            x = np.array([step // 4, 10 + step // 4], dtype=np.float64)
+            writer.append('gravity_data', {'time': step * 60.0, 'position_x': x, 'position_y': 0.0, 'position_z': 0.0,
+                                           'velocity_x': 0.0, 'velocity_y': 0.0, 'velocity_z': 0.0})
+        writer.close()
+    close_writers()
+
+    reference = load_trajectory('gravity_data', path, run_id=runs['all'])
+    run_id = runs[str({'mode': 'changes'})]
+    assert len(load_trajectory('gravity_data', path, run_id=run_id, decode=False)) == 2 * TIMES // 4
+    filled = load_trajectory('gravity_data', path, run_id=run_id)
+    for name, column in values(filled).items():
+        np.testing.assert_array_equal(column, reference[name])
+
+def test_table_output_state_restore():
+    policy = make_output_policy({'mode': 'changes', 'atol': 1e-6})
+    output = TableOutput('strong_force_data', policy, 'particle_id')
+    for step in range(5):
+        output.select(step_columns(step))
+
+    arrays, meta = output.state()
+    restored = TableOutput('strong_force_data', policy, 'particle_id')
+    restored.restore({name: np.array(column) for name, column in arrays.items()}, dict(meta))
+    assert restored.record() == output.record()
+    for step in range(5, TIMES):
+        expected, actual = output.select(step_columns(step)), restored.select(step_columns(step))
+        assert (expected is None) == (actual is None)
+        if expected is not None:
+            for name in expected:
+                np.testing.assert_array_equal(actual[name], expected[name])
+
+@pytest.mark.parametrize('storage', ['sqlite', 'columnar'])
+def test_resume_through_output_storage(tmp_path, storage):
+    path = str(tmp_path / 'resume.db')
+    migrate(path)
+    output = {'mode': 'changes', 'atol': 1e-6}
+    reference_id = write_run(path, output, storage)
+    reference = load_trajectory('strong_force_data', path, run_id=reference_id, decode=False)
+
+    # Bis Schritt 8 schreiben, den Zustand bei Schritt 6 sichern und wie beim Fortsetzen ab dort neu schreiben
+    run_id = create_run(path, 'strong_force', output=output, storage=storage)
+    writer = open_storage(path, run_id)
+    for step in range(9):
+        writer.append('strong_force_data', step_columns(step))
+        if step == 5:
+            writer.flush()
+            arrays, meta = writer.state()
+            checkpoint = Checkpoint('strong_force', 6, 360.0, {name: np.array(a) for name, a in arrays.items()}, meta, run_id)
+    writer.close()
+    close_writers()
+
+    writer = open_storage(path, run_id)
+    writer.resume('strong_force_data', checkpoint)
+    for step in range(6, TIMES):
+        writer.append('strong_force_data', step_columns(step))
+    writer.close()
+    close_writers()
+
+    resumed = load_trajectory('strong_force_data', path, run_id=run_id, decode=False)
+    for name, column in values(resumed).items():
+        np.testing.assert_array_equal(column, reference[name])
+    filled = load_trajectory('strong_force_data', path, run_id=reference_id)
+    for name, column in values(load_trajectory('strong_force_data', path, run_id=run_id)).items():
+        np.testing.assert_array_equal(column, filled[name])
+
+def test_resumed_simulation_with_changes_policy(tmp_path, interrupt_after, monkeypatch):
+    # Die Positionen wandern je Schritt um einige tausend Einheiten; atol lässt einen Teil der Zeilen aus
+    settings = {'particle_count': 6, 'pacing': {'mode': 'fast'}, 'total_time': 1200, 'dt': 60, 'seed': 7,
+                'checkpoint_interval': 4, 'output': {'mode': 'changes', 'atol': 5000.0}}
+    reference_path = str(tmp_path / 'reference.db')
+    run_strong_force_simulation(db_path=reference_path, **settings)
+
+    path = str(tmp_path / 'resumed.db')
+    interrupt_after(10)
+    with pytest.raises(KeyboardInterrupt):
+        run_strong_force_simulation(db_path=path, **settings)
+    monkeypatch.undo()
+    run_strong_force_simulation(db_path=path, **settings)
+
+    assert len(load_trajectory('strong_force_data', reference_path, decode=False)) < 6 * 21
+    for decode in (False, True):
+        expected = load_trajectory('strong_force_data', reference_path, decode=decode)
+        actual = load_trajectory('strong_force_data', path, decode=decode)
+        assert len(actual) == len(expected)
+        for name, column in values(actual).items():
+            np.testing.assert_array_equal(column, expected[name])
@@ -0,0 +1,68 @@
+import sqlite3
+import numpy as np
+import pytest
+from scripts.storage.reader import load_trajectory, read_trajectory
+from scripts.storage.schema import create_run, migrate
+
+BODIES = 3
+TIMES = 6
+
+def gravity_database(path):
+    """
+    Gravitationslauf, dessen Körper je Zeitpunkt an position_x = Körperindex zu erkennen sind.
+    """
+    migrate(path)
+    run_id = create_run(path, 'gravity')
+    conn = sqlite3.connect(path)
+    conn.executemany("INSERT INTO gravity_data (run_id, time, position_x, position_y, position_z, velocity_x, velocity_y, "
+                     "velocity_z) VALUES (?, ?, ?, 0, 0, 0, 0, 0)",
+                     [(run_id, time * 60.0, float(body)) for time in range(TIMES) for body in range(BODIES)])
+    conn.commit()
+    conn.close()
+    return run_id
+
+@pytest.mark.parametrize('filters', [{}, {'every': 2}, {'particles': [0, 2]}, {'start': 120, 'stop': 300}])
+def test_body_index_follows_insertion_order(tmp_path, filters):
+    path = str(tmp_path / 'gravity.db')
+    gravity_database(path)
+    # Ein zusätzlicher Index, der Zeilen gleicher Zeit anders als nach id ordnet, darf die Körper nicht vertauschen
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE INDEX idx_gravity_data_covering ON gravity_data (run_id, time, position_x DESC, position_y, "
+                 "position_z, velocity_x, velocity_y, velocity_z)")
+    conn.commit()
+    conn.close()
+
+    trajectory = load_trajectory('gravity_data', path, **filters)
+    assert len(trajectory)
+    np.testing.assert_array_equal(trajectory['body'], trajectory['position_x'])
+    assert np.all(np.diff(trajectory['time']) >= 0)
+
+def test_filters_match_numpy(tmp_path):
+    path = str(tmp_path / 'strong.db')
+    migrate(path)
+    run_id = create_run(path, 'strong_force')
+    rng = np.random.default_rng(0)
+    rows = [(run_id, time * 60.0, particle, *rng.random(4)) for time in range(TIMES) for particle in range(4)]
+    conn = sqlite3.connect(path)
+    conn.executemany("INSERT INTO strong_force_data (run_id, time, particle_id, position_x, position_y, position_z, force) "
+                     "VALUES (?, ?, ?, ?, ?, ?, ?)", rows[::-1])
+    conn.commit()
+    conn.close()
+
+    everything = load_trajectory('strong_force_data', path)
+    assert len(everything) == len(rows)
+    np.testing.assert_array_equal(everything['force'], [row[6] for row in rows])
+
+    selected = load_trajectory('strong_force_data', path, run_id=run_id, start=60, stop=240, particles=[1, 3], every=2)
+    mask = ((everything['time'] >= 60) & (everything['time'] < 240) & np.isin(everything['particle_id'], [1, 3])
+            & np.isin(everything['time'], [60, 180]))
+    np.testing.assert_array_equal(selected, everything[mask])
+
+    # Blockweises Lesen liefert dieselben Zeilen
+    chunks = list(read_trajectory('strong_force_data', path, chunk_size=5))
+    assert max(len(chunk) for chunk in chunks) == 5
+    np.testing.assert_array_equal(np.concatenate(chunks), everything)
+
+    buckets = load_trajectory('strong_force_data', path, particles=[0], bucket=180)
+    np.testing.assert_array_equal(buckets['samples'], [3, 3])
+    np.testing.assert_allclose(buckets['force'], everything['force'][everything['particle_id'] == 0].reshape(2, 3).mean(axis=1))
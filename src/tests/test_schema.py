@@ -0,0 +1,114 @@
+import multiprocessing
+import sqlite3
+import time
+from scripts.storage.schema import (DATA_TABLES, SCHEMA_VERSION, create_run, list_runs, migrate, reset_database,
+                                    schema_version)
+
+# Schema der ausgelieferten Datenbank vor den Migrationen (user_version 0, ohne runs und run_id)
+V0_SCHEMA = """
+CREATE TABLE results (id INTEGER PRIMARY KEY, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, calculated_force REAL,
+                      unified_theory REAL);
+CREATE TABLE gravity_data (id INTEGER PRIMARY KEY, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, time REAL,
+                           position_x REAL, position_y REAL, position_z REAL, velocity_x REAL, velocity_y REAL,
+                           velocity_z REAL);
+CREATE TABLE electromagnetic_data (id INTEGER PRIMARY KEY, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, time REAL,
+                                   electric_field REAL, magnetic_field REAL);
+CREATE TABLE strong_force_data (id INTEGER PRIMARY KEY, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, time REAL,
+                                particle_id INTEGER, position_x REAL, position_y REAL, position_z REAL, force REAL);
+CREATE TABLE weak_force_data (id INTEGER PRIMARY KEY, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, time REAL,
+                              particle_id INTEGER, decay_rate REAL, position_x REAL, position_y REAL, position_z REAL);
+CREATE TABLE simulation_state (id INTEGER PRIMARY KEY, last_time INTEGER NOT NULL);
+"""
+
+def create_v0_database(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(V0_SCHEMA)
+    conn.execute("INSERT INTO gravity_data (time, position_x) VALUES (60.0, 1.0)")
+    conn.commit()
+    conn.close()
+
+def columns(path, table):
+    conn = sqlite3.connect(path)
+    try:
+        return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    finally:
+        conn.close()
+
+def _slow_connect(*args, **kwargs):
+    # Jede Anweisung verzögern, damit sich die Prozesse auch auf einem Kern zwischen Prüfung und ALTER TABLE abwechseln
+    conn = _connect(*args, **kwargs)
+    conn.set_trace_callback(lambda sql: time.sleep(0.01))
+    return conn
+
+_connect = sqlite3.connect
+
+def _migrate_after(barrier, path, errors):
+    sqlite3.connect = _slow_connect  # Nur im Kindprozess
+    barrier.wait()
+    try:
+        migrate(path)
+    except Exception as exc:
+        errors.put(repr(exc))
+        raise SystemExit(1)
+
+def test_migrate_v0_keeps_rows_and_reaches_current_version(tmp_path):
+    path = str(tmp_path / 'v0.db')
+    create_v0_database(path)
+
+    assert migrate(path) == SCHEMA_VERSION
+    for table in DATA_TABLES:
+        assert 'run_id' in columns(path, table)
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT time, position_x FROM gravity_data").fetchall() == [(60.0, 1.0)]
+    assert schema_version(conn) == SCHEMA_VERSION
+    conn.close()
+
+    # Erneutes Migrieren ändert nichts
+    assert migrate(path) == SCHEMA_VERSION
+
+def test_migrate_fresh_database(tmp_path):
+    path = str(tmp_path / 'fresh.db')
+    assert migrate(path) == SCHEMA_VERSION
+    assert {'run_id', 'source', 'samples', 'time'} <= columns(path, 'results')
+
+def test_concurrent_migrate_on_v0_database(tmp_path):
+    # Wie main.py im Modus 'single': mehrere Simulationsprozesse migrieren gleichzeitig dieselbe Datenbank
+    path = str(tmp_path / 'v0.db')
+    create_v0_database(path)
+    context = multiprocessing.get_context('spawn')
+    barrier = context.Barrier(4)
+    errors = context.Queue()
+    processes = [context.Process(target=_migrate_after, args=(barrier, path, errors)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+
+    failures = []
+    while not errors.empty():
+        failures.append(errors.get())
+    assert failures == []
+    assert [process.exitcode for process in processes] == [0] * 4
+    conn = sqlite3.connect(path)
+    assert schema_version(conn) == SCHEMA_VERSION
+    conn.close()
+
+def test_reset_database(tmp_path):
+    path = str(tmp_path / 'reset.db')
+    migrate(path)
+    run_ids = [create_run(path, 'strong_force') for _ in range(3)]
+    conn = sqlite3.connect(path)
+    conn.executemany("INSERT INTO strong_force_data (run_id, time) VALUES (?, 0.0)", [(run_id,) for run_id in run_ids])
+    conn.commit()
+
+    # Nur die angegebenen Läufe werden gelöscht, ohne Angabe alle; das Schema bleibt erhalten
+    reset_database(path, run_ids[:2])
+    assert [run[0] for run in list_runs(path)] == run_ids[2:]
+    assert conn.execute("SELECT run_id FROM strong_force_data").fetchall() == [(run_ids[2],)]
+    reset_database(path)
+    assert list_runs(path) == []
+    assert conn.execute("SELECT COUNT(*) FROM strong_force_data").fetchone()[0] == 0
+
+    reset_database(path, rebuild=True)
+    assert schema_version(conn) == SCHEMA_VERSION
+    conn.close()
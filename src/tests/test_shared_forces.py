@@ -0,0 +1,25 @@
+import numpy as np
+from scripts.simulations.particle_system import pairwise_forces
+from scripts.simulations.shared_forces import SharedForcePool
+from scripts.simulations.strong_force_simulation import initialize_particles, update_particle_positions
+
+def test_pool_matches_serial_forces():
+    particles = initialize_particles(300, np.random.default_rng(3))
+    serial = initialize_particles(300, np.random.default_rng(3))
+    with SharedForcePool(particles, 3, chunk_size=64, constant=2.0) as pool:
+        assert pool.workers == 3
+        for _ in range(3):
+            forces = pool.forces()
+            expected = pairwise_forces(serial.positions, serial.masses, 2.0, chunk_size=64)
+            np.testing.assert_array_equal(forces, expected)
+            update_particle_positions(particles, forces, 60, 'numpy')
+            update_particle_positions(serial, expected, 60, 'numpy')
+    np.testing.assert_array_equal(particles.positions, serial.positions)
+
+def test_pool_starts_no_workers_without_blocks():
+    particles = initialize_particles(3, np.random.default_rng(0))
+    with SharedForcePool(particles, 8) as pool:
+        assert pool.workers == 3
+        np.testing.assert_array_equal(pool.forces(), pairwise_forces(particles.positions, particles.masses, 1.0, chunk_size=1))
+    with SharedForcePool(particles, 4, chunk_size=10) as pool:
+        assert pool.workers == 1
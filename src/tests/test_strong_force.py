@@ -0,0 +1,38 @@
+import sqlite3
+import numpy as np
+from scripts.simulations import strong_force_simulation
+from scripts.simulations.strong_force_simulation import (compute_strong_force, insert_strong_force_data, legacy_particles,
+                                                         update_particle_positions)
+
+def legacy_system(count=4):
+    rng = np.random.default_rng(2)
+    return [{'id': i, 'position': list(rng.uniform(0, 10, 3)), 'mass': float(rng.uniform(1, 10))} for i in range(count)]
+
+def test_legacy_interface(tmp_path, monkeypatch):
+    monkeypatch.setattr(strong_force_simulation, 'DB_PATH', str(tmp_path / 'legacy.db'))
+    monkeypatch.setattr(strong_force_simulation, '_legacy_runs', {})
+    particles = legacy_system()
+
+    for step in range(2):
+        # Schleife wie in der ursprünglichen run_strong_force_simulation
+        forces = [[0, 0, 0] for _ in particles]
+        for i, p1 in enumerate(particles):
+            for j, p2 in enumerate(particles):
+                if i != j:
+                    direction = np.subtract(p2['position'], p1['position'])
+                    forces[i] = list(forces[i] + compute_strong_force(p1, p2) * direction / np.linalg.norm(direction))
+        expected = compute_strong_force(legacy_particles(particles))
+        np.testing.assert_allclose(forces, expected, rtol=1e-12)
+
+        # Wie bisher ohne Geschwindigkeit: die Position rückt je Schritt nur um a * dt vor
+        moved = [np.add(p['position'], np.divide(force, p['mass']) * 60) for p, force in zip(particles, forces)]
+        update_particle_positions(particles, forces, 60)
+        np.testing.assert_array_equal([p['position'] for p in particles], moved)
+        insert_strong_force_data(step * 60, particles, forces)
+
+    conn = sqlite3.connect(strong_force_simulation.DB_PATH)
+    rows = conn.execute("SELECT run_id, time, particle_id, position_x FROM strong_force_data ORDER BY time, particle_id").fetchall()
+    conn.close()
+    assert len(rows) == 8 and len({row[0] for row in rows}) == 1
+    assert [row[3] for row in rows[4:]] == [particle['position'][0] for particle in particles]
+    assert compute_strong_force(particles[0], particles[0]) == 0